@@ -0,0 +1,37 @@
+'''Time spent serializing a screenshot across a 10-step run.
+
+"prepared" is the ImageMessage pipeline, which resizes and encodes the image once. "per step"
+re-scales and re-encodes the image on every step, as the adapters did before.
+Run with `python -m benchmarks.image_serialization` from the repository root.
+'''
+from src.messages import ImageMessage
+from PIL import Image
+import base64
+import time
+
+STEPS=10
+SIZES=[(1280,720),(1920,1080),(3840,2160)]
+
+def screenshot(size:tuple[int,int])->Image.Image:
+    return Image.effect_noise(size,64).convert('RGB')
+
+def prepared(image:Image.Image)->float:
+    message=ImageMessage(content='screen',images=[image])
+    start=time.perf_counter()
+    for _ in range(STEPS):
+        message.image_data_urls()
+    return time.perf_counter()-start
+
+def per_step(image:Image.Image)->float:
+    message=ImageMessage(content='screen',images=[image])
+    start=time.perf_counter()
+    for _ in range(STEPS):
+        message.scale_images(scale=0.7)
+        [f'data:{message.mime_type};base64,{base64.b64encode(message._to_bytes(image)).decode()}' for image in message.images]
+    return time.perf_counter()-start
+
+if __name__=='__main__':
+    print(f"{'image':>10} {'prepared ms':>12} {'per step ms':>12}")
+    for size in SIZES:
+        image=screenshot(size)
+        print(f"{f'{size[0]}x{size[1]}':>10} {prepared(image)*1000:>12.1f} {per_step(image)*1000:>12.1f}")
\ No newline at end of file
@@ -0,0 +1,39 @@
+'''New TCP connections and time per 100 calls against a local OpenAI-compatible server.
+
+"cached" is one adapter reused for every call, "per call" builds a new adapter, and with it a
+new connection pool, for each call as the adapters did before their clients were cached.
+Run with `python -m benchmarks.llm_connections` from the repository root.
+'''
+from tests.fixtures.openai_server import OpenAIServer
+from src.llms.openai import ChatOpenAI
+from src.messages import HumanMessage
+import asyncio
+import time
+
+CALLS=100
+MESSAGES=[HumanMessage(content='hi')]
+
+async def cached(url:str):
+    llm=ChatOpenAI(model='stub',api_key='test',base_url=url,max_retries=0)
+    for _ in range(CALLS):
+        await llm.ainvoke(MESSAGES)
+    await llm.aclose()
+
+async def per_call(url:str):
+    for _ in range(CALLS):
+        llm=ChatOpenAI(model='stub',api_key='test',base_url=url,max_retries=0)
+        await llm.ainvoke(MESSAGES)
+        await llm.aclose()
+
+async def main():
+    print(f"{'client':>9} {'connections':>12} {'ms/call':>8}")
+    for name,run in [('cached',cached),('per call',per_call)]:
+        server=await OpenAIServer().start()
+        start=time.perf_counter()
+        await run(server.url)
+        elapsed=time.perf_counter()-start
+        await server.stop()
+        print(f"{name:>9} {server.connections:>12} {elapsed*1000/CALLS:>8.2f}")
+
+if __name__=='__main__':
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,32 @@
+'''Requests per second of tools/call on one stdio session as the number of calls in flight grows.
+
+Run with `python -m benchmarks.stdio_concurrency` from the repository root.
+'''
+from src.mcp.client import MCPClient
+from pathlib import Path
+import asyncio
+import time
+import sys
+
+SERVER=str(Path(__file__).parent.parent/'tests'/'fixtures'/'stdio_server.py')
+CONCURRENCY=[1,10,50,100,500]
+CALLS=2000
+
+async def main():
+    client=MCPClient({'mcpServers':{'stub':{'command':sys.executable,'args':[SERVER]}}})
+    session=await client.create_session('stub')
+    try:
+        print(f"{'in flight':>10} {'requests/s':>12}")
+        for concurrency in CONCURRENCY:
+            semaphore=asyncio.Semaphore(concurrency)
+            async def call(i:int):
+                async with semaphore:
+                    return await session.tools_call('echo',text=str(i))
+            start=time.perf_counter()
+            await asyncio.gather(*(call(i) for i in range(CALLS)))
+            print(f"{concurrency:>10} {CALLS/(time.perf_counter()-start):>12.0f}")
+    finally:
+        await client.close_all_sessions()
+
+if __name__=='__main__':
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,30 @@
+'''Throughput of the stdio framing (LineBuffer and json_loads) for 1 KB, 1 MB and 50 MB messages.
+
+Messages are fed in READ_SIZE chunks as the stdio transport reads them.
+Run with `python -m benchmarks.stdio_framing` from the repository root.
+'''
+from src.mcp.transport.utils import LineBuffer,json_dumps,json_loads,orjson
+from src.mcp.transport.stdio import READ_SIZE
+import time
+
+PAYLOADS={'1 KB':1<<10,'1 MB':1<<20,'50 MB':50<<20}
+TOTAL=100<<20
+
+def run(size:int)->tuple[float,int]:
+    frame=json_dumps({'jsonrpc':'2.0','id':1,'result':{'content':[{'type':'text','text':'x'*size}]}})+b'\n'
+    data=frame*max(1,TOTAL//len(frame))
+    framer=LineBuffer()
+    messages=0
+    start=time.perf_counter()
+    for offset in range(0,len(data),READ_SIZE):
+        for line in framer.feed(data[offset:offset+READ_SIZE]):
+            json_loads(line)
+            messages+=1
+    return len(data)/(time.perf_counter()-start),messages
+
+if __name__=='__main__':
+    print(f"JSON backend: {'orjson' if orjson else 'json'}")
+    print(f"{'payload':>8} {'MB/s':>8} {'messages':>9}")
+    for name,size in PAYLOADS.items():
+        throughput,messages=run(size)
+        print(f"{name:>8} {throughput/(1<<20):>8.0f} {messages:>9}")
\ No newline at end of file
@@ -0,0 +1,45 @@
+'''Throughput and latency of tools/call over streamable HTTP for each way a server can answer.
+
+The server is the stub in tests/fixtures/http_server.py served through an httpx MockTransport,
+so the numbers are the client's own cost of framing, parsing and dispatching.
+Run with `python -m benchmarks.streamable_http` from the repository root.
+'''
+from tests.fixtures.http_server import StreamableHTTPStub,StubTransport
+from src.mcp.client.session import MCPSession
+from src.mcp.types.info import ClientInfo
+import statistics
+import asyncio
+import time
+
+CALLS=1000
+CONCURRENCY=20
+MODES=['json','sse','resume']
+
+async def run(mode:str)->tuple[float,float,float]:
+    session=MCPSession(transport=StubTransport(StreamableHTTPStub(mode)),client_info=ClientInfo(name='benchmark',version='1'))
+    await session.connect()
+    await session.initialize()
+    semaphore=asyncio.Semaphore(CONCURRENCY)
+    latencies=[]
+    async def call(i:int):
+        async with semaphore:
+            start=time.perf_counter()
+            await session.tools_call('echo',text=str(i))
+            latencies.append(time.perf_counter()-start)
+    # Resumed calls wait out the 10ms retry the stub asks for
+    calls=CALLS//10 if mode=='resume' else CALLS
+    start=time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    elapsed=time.perf_counter()-start
+    await session.transport.disconnect()
+    quantiles=statistics.quantiles(latencies,n=20)
+    return calls/elapsed,quantiles[9]*1000,quantiles[18]*1000
+
+async def main():
+    print(f"{'mode':>7} {'calls/s':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    for mode in MODES:
+        throughput,p50,p95=await run(mode)
+        print(f"{mode:>7} {throughput:>8.0f} {p50:>7.2f} {p95:>7.2f}")
+
+if __name__=='__main__':
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,37 @@
+'''Estimated tokens of the tools prompt with every schema against only the top-k retrieved schemas.
+
+Run with `python -m benchmarks.tool_prompt_size` from the repository root.
+'''
+from src.agent.registry import Registry
+from src.messages import SystemMessage,estimate_tokens
+from src.agent.tools import lookup_tool
+from src.tool import Tool
+import time
+
+TOOL_COUNTS=[10,50,200]
+K=5
+QUERY='read the contents of the report file'
+
+async def noop(**kwargs):
+    return ''
+
+def make_tools(count:int)->list[Tool]:
+    schema={'type':'object','properties':{'path':{'type':'string','description':'Path of the target'},'limit':{'type':'integer','description':'Maximum number of items'}}}
+    tools=[Tool(name='read_file',description='Read the complete contents of a file',args_schema=schema,func=noop,server='filesystem')]
+    tools+=[Tool(name=f'tool_{i}',description=f'Operation number {i} of service {i%7}',args_schema=schema,func=noop,server=f'server_{i%7}') for i in range(count-1)]
+    return tools
+
+def tokens(prompt:str)->int:
+    return estimate_tokens([SystemMessage(content=prompt)])
+
+if __name__=='__main__':
+    print(f"{'tools':>6} {'all schemas':>12} {f'top {K}':>8} {'search ms':>10}")
+    for count in TOOL_COUNTS:
+        registry=Registry(tools=[lookup_tool])
+        registry.add_tools(make_tools(count))
+        full=tokens(registry.get_tools_prompt())
+        registry.search_tools(QUERY,k=K)
+        start=time.perf_counter()
+        names=registry.search_tools(QUERY,k=K)
+        elapsed=time.perf_counter()-start
+        print(f"{count:>6} {full:>12} {tokens(registry.get_tools_prompt(tool_names=names)):>8} {elapsed*1000:>10.2f}")
\ No newline at end of file
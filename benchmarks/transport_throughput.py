@@ -0,0 +1,84 @@
+'''tools/call messages per second through the JSON-RPC dispatcher of each transport.
+
+The websocket server runs in process, streamable HTTP is served by the MockTransport stub in
+tests/fixtures/http_server.py, stdio talks to tests/fixtures/stdio_server.py, and "dispatch"
+skips I/O altogether.
+Run with `python -m benchmarks.transport_throughput` from the repository root.
+'''
+from tests.fixtures.http_server import StreamableHTTPStub,StubTransport
+from src.mcp.transport.websocket import WebSocketTransport
+from src.mcp.transport.stdio import StdioTransport
+from src.mcp.types.json_rpc import JSONRPCRequest
+from src.mcp.types.stdio import StdioServerParams
+from src.mcp.transport.base import BaseTransport
+from src.mcp.client.session import MCPSession
+from websockets.asyncio.server import serve
+from src.mcp.types.tools import ToolResult
+from src.mcp.types.info import ClientInfo
+from pathlib import Path
+import asyncio
+import json
+import time
+import sys
+
+SERVER=str(Path(__file__).parent.parent/'tests'/'fixtures'/'stdio_server.py')
+CALLS=2000
+CONCURRENCY=50
+CLIENT_INFO=ClientInfo(name='benchmark',version='1')
+
+def result(message:dict)->dict:
+    if message['method']=='initialize':
+        content={'protocolVersion':'2025-03-26','capabilities':{},'serverInfo':{'name':'stub','version':'1'}}
+    elif message['method']=='tools/call':
+        content={'content':[{'type':'text','text':message['params']['arguments'].get('text','')}]}
+    else:
+        content={}
+    return {'jsonrpc':'2.0','id':message['id'],'result':content}
+
+class LoopbackTransport(BaseTransport):
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        self.cancel_pending()
+
+    async def send_request(self,request:JSONRPCRequest,timeout:float|None=None):
+        future=self.add_pending(request.id)
+        await self.dispatch(json.loads(json.dumps(result(request.model_dump()))))
+        return await self.wait_response(request,future,self.request_timeout(request,timeout))
+
+    async def send_notification(self,notification):
+        pass
+
+async def websocket_handler(websocket):
+    async for data in websocket:
+        message=json.loads(data)
+        if 'id' in message and 'method' in message:
+            await websocket.send(json.dumps(result(message)))
+
+async def measure(transport:BaseTransport)->float:
+    session=MCPSession(transport=transport,client_info=CLIENT_INFO)
+    await session.connect()
+    await session.initialize()
+    semaphore=asyncio.Semaphore(CONCURRENCY)
+    async def call(i:int):
+        async with semaphore:
+            return await session.tools_call('echo',text=str(i))
+    start=time.perf_counter()
+    results=await asyncio.gather(*(call(i) for i in range(CALLS)))
+    elapsed=time.perf_counter()-start
+    assert all(isinstance(result,ToolResult) for result in results)
+    await transport.disconnect()
+    return CALLS/elapsed
+
+async def main():
+    print(f"{'transport':>16} {'messages/s':>11}")
+    print(f"{'dispatch':>16} {await measure(LoopbackTransport()):>11.0f}")
+    print(f"{'stdio':>16} {await measure(StdioTransport(StdioServerParams(command=sys.executable,args=[SERVER]))):>11.0f}")
+    async with serve(websocket_handler,'127.0.0.1',0,subprotocols=['mcp']) as server:
+        port=server.sockets[0].getsockname()[1]
+        print(f"{'websocket':>16} {await measure(WebSocketTransport(f'ws://127.0.0.1:{port}')):>11.0f}")
+    print(f"{'streamable http':>16} {await measure(StubTransport(StreamableHTTPStub('json'))):>11.0f}")
+
+if __name__=='__main__':
+    asyncio.run(main())
\ No newline at end of file
@@ -13,6 +13,7 @@ agent=Agent(client=client,llm=llm)
 async def main():
     query=input('Enter a task: ')
     await agent.print_response(query=query)
+    await llm.aclose()
 
 if __name__ == '__main__':
     import asyncio
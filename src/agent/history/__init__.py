@@ -0,0 +1,9 @@
+from src.agent.history.service import HistoryPolicy,SlidingWindowPolicy,TruncatePolicy,SummarizePolicy,estimate_tokens
+
+__all__=[
+    'HistoryPolicy',
+    'SlidingWindowPolicy',
+    'TruncatePolicy',
+    'SummarizePolicy',
+    'estimate_tokens'
+]
\ No newline at end of file
@@ -0,0 +1,92 @@
+from src.messages import BaseMessage,SystemMessage,HumanMessage,estimate_tokens
+from src.agent.prompt.service import Prompt
+from src.llms.base import BaseChatLLM
+from abc import ABC,abstractmethod
+import hashlib
+
+class HistoryPolicy(ABC):
+    '''Decides what part of the message history is sent to the LLM under a token budget.
+
+    The first message (the user query) and the last `keep_last` messages are always sent as is.
+    The system prompt shares the budget, so its estimate is reserved before the history is fitted.
+    '''
+    def __init__(self,max_tokens:int=32000,keep_last:int=2):
+        self.max_tokens=max_tokens
+        self.keep_last=keep_last
+
+    def within_budget(self,messages:list[BaseMessage],reserved:int=0)->bool:
+        return estimate_tokens(messages)+reserved<=self.max_tokens
+
+    def compactable(self,messages:list[BaseMessage])->list[int]:
+        '''Indexes of the old observations, oldest first'''
+        end=max(len(messages)-self.keep_last,1)
+        return [index for index in range(1,end) if isinstance(messages[index],HumanMessage)]
+
+    @abstractmethod
+    async def acompact(self,messages:list[BaseMessage],system_message:BaseMessage|None=None)->list[BaseMessage]:
+        '''Get the history to send alongside the system message, the given list is left untouched'''
+        pass
+
+class SlidingWindowPolicy(HistoryPolicy):
+    '''Drops the oldest action and observation pairs until the history fits'''
+    async def acompact(self,messages:list[BaseMessage],system_message:BaseMessage|None=None)->list[BaseMessage]:
+        reserved=estimate_tokens([system_message]) if system_message else 0
+        head,rest=messages[:1],messages[1:]
+        # A pair is only dropped if the last `keep_last` messages survive it, the history may end on an action
+        while not self.within_budget(head+rest,reserved) and len(rest)-2>=self.keep_last:
+            rest=rest[2:]
+        return head+rest
+
+class TruncatePolicy(HistoryPolicy):
+    '''Keeps only the head and tail of old observations until the history fits'''
+    def __init__(self,max_tokens:int=32000,keep_last:int=2,head:int=500,tail:int=500):
+        super().__init__(max_tokens=max_tokens,keep_last=keep_last)
+        self.head=head
+        self.tail=tail
+
+    def truncate(self,content:str)->str:
+        if len(content)<=self.head+self.tail:
+            return content
+        omitted=len(content)-self.head-self.tail
+        return f"{content[:self.head]}\n... [{omitted} characters truncated] ...\n{content[-self.tail:] if self.tail else ''}"
+
+    async def acompact(self,messages:list[BaseMessage],system_message:BaseMessage|None=None)->list[BaseMessage]:
+        reserved=estimate_tokens([system_message]) if system_message else 0
+        messages=list(messages)
+        for index in self.compactable(messages):
+            if self.within_budget(messages,reserved):
+                break
+            # Images of old observations are dropped along with the text
+            messages[index]=HumanMessage(content=self.truncate(messages[index].content))
+        return messages
+
+class SummarizePolicy(HistoryPolicy):
+    '''Replaces old observations with summaries written by a cheap LLM until the history fits'''
+    def __init__(self,llm:BaseChatLLM,max_tokens:int=32000,keep_last:int=2,min_length:int=1000):
+        super().__init__(max_tokens=max_tokens,keep_last=keep_last)
+        self.llm=llm
+        self.min_length=min_length
+        # Observations are summarized once, keyed by the hash of their content
+        self.summaries:dict[str,str]={}
+
+    async def asummarize(self,content:str)->str:
+        key=hashlib.sha256(content.encode()).hexdigest()
+        if key not in self.summaries:
+            llm_response=await self.llm.ainvoke([
+                SystemMessage(content=Prompt.summary_prompt()),
+                HumanMessage(content=content)
+            ])
+            self.summaries[key]=llm_response.content
+        return self.summaries[key]
+
+    async def acompact(self,messages:list[BaseMessage],system_message:BaseMessage|None=None)->list[BaseMessage]:
+        reserved=estimate_tokens([system_message]) if system_message else 0
+        messages=list(messages)
+        for index in self.compactable(messages):
+            if self.within_budget(messages,reserved):
+                break
+            if len(messages[index].content)<self.min_length:
+                continue
+            summary=await self.asummarize(messages[index].content)
+            messages[index]=HumanMessage(content=f"<Summary>{summary}</Summary>")
+        return messages
@@ -1,45 +1,121 @@
+from importlib.resources.abc import Traversable
 from importlib.resources import files
 from src.agent.registry import Registry
+from src.agent.views import ActionCall
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 import platform
 import json
 
+class PromptTemplates:
+    '''Holds the prompt templates in memory, loaded once from the prompt directory'''
+    def __init__(self,prompt_dir:Traversable,hot_reload:bool=False):
+        self.prompt_dir=prompt_dir
+        self.hot_reload=hot_reload
+        self.templates:dict[str,str]={}
+        self.mtimes:dict[str,float]={}
+        for template in prompt_dir.iterdir():
+            if template.name.endswith('.md'):
+                self.load(template.name)
+
+    def load(self,name:str)->str:
+        '''Read a template from disk into memory'''
+        template=self.prompt_dir.joinpath(name)
+        self.templates[name]=template.read_text()
+        if isinstance(template,Path):
+            self.mtimes[name]=template.stat().st_mtime
+        return self.templates[name]
+
+    def get(self,name:str)->str:
+        '''Get a template, re-reading it when hot reload is on and the file changed'''
+        if name not in self.templates:
+            return self.load(name)
+        if self.hot_reload:
+            template=self.prompt_dir.joinpath(name)
+            if not isinstance(template,Path) or template.stat().st_mtime!=self.mtimes.get(name):
+                return self.load(name)
+        return self.templates[name]
+
 class Prompt:
     prompt_dir = files('src.agent.prompt')
+    templates = PromptTemplates(prompt_dir)
+
+    @staticmethod
+    def hot_reload(enabled:bool=True):
+        '''Re-read templates edited on disk, meant for development'''
+        Prompt.templates.hot_reload=enabled
 
     @staticmethod
-    def system_prompt(max_steps:int,servers_info:list[dict[str,Any]],registry:Registry):
-        prompt=Prompt.prompt_dir.joinpath('system.md').read_text()
+    def system_prompt(max_steps:int,servers_info:list[dict[str,Any]],registry:Registry,parallel_actions:bool=False,cache_friendly:bool=False,tool_names:list[str]|None=None,structured_output:bool=False):
+        output_format=Prompt.templates.get(f"{'parallel_' if parallel_actions else ''}{'structured_' if structured_output else ''}format.md")
+        if cache_friendly:
+            # Only static content, so the prompt stays a stable prefix across steps
+            prompt=Prompt.templates.get('cached_system.md')
+            return prompt.format(**{
+                'operating_system': platform.system(),
+                'max_steps':max_steps,
+                'servers_info': '\n'.join(map(lambda x: f'- {x["name"]}: {x["description"]}', sorted(servers_info,key=lambda x: x["name"]))),
+                "tools":registry.get_tools_prompt(sort=True,tool_names=tool_names),
+                "output_format":output_format,
+            })
+        prompt=Prompt.templates.get('system.md')
         return prompt.format(**{
             'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'operating_system': platform.system(),
             'max_steps':max_steps,
             'servers_info': '\n'.join(map(lambda x: f'- {x["name"]}: {x["description"]} (Status: {"Connected" if x["status"] else "Disconnected"})', servers_info)),
-            "tools":registry.get_tools_prompt(),
+            "tools":registry.get_tools_prompt(tool_names=tool_names),
+            "output_format":output_format,
         })
     
+    @staticmethod
+    def context_prompt(steps:int,max_steps:int,servers_info:list[dict[str,Any]],tools:str=''):
+        prompt=Prompt.templates.get('context.md')
+        return prompt.format(**{
+            'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'steps':steps,
+            'max_steps':max_steps,
+            'servers_status': '\n'.join(map(lambda x: f'- {x["name"]}: {"Connected" if x["status"] else "Disconnected"}', servers_info)),
+            'tools': f'\nSchemas of the tools most relevant to this step:\n\n{tools}\n' if tools else '',
+        })
+
     @staticmethod
     def action_prompt(thought:str,action_name:str,action_input:dict):
-        prompt=Prompt.prompt_dir.joinpath('action.md').read_text()
+        prompt=Prompt.templates.get('action.md')
         return prompt.format(**{
             "thought":thought,
             "action_name":action_name,
             "action_input":json.dumps(action_input,ensure_ascii=False),
         })
 
+    @staticmethod
+    def actions_prompt(thought:str,actions:list[ActionCall]):
+        prompt=Prompt.templates.get('actions.md')
+        return prompt.format(**{
+            "thought":thought,
+            "actions":"\n".join([
+                f"    <Action>\n        <Action-Name>{action['action_name']}</Action-Name>\n        <Action-Input>{json.dumps(action['action_input'],ensure_ascii=False)}</Action-Input>\n    </Action>"
+                for action in actions
+            ]),
+        })
+
     @staticmethod
     def observation_prompt(steps:int,max_steps:int,observation:str):
-        prompt=Prompt.prompt_dir.joinpath('observation.md').read_text()
+        prompt=Prompt.templates.get('observation.md')
         return prompt.format(**{
             "steps":steps,
             "max_steps":max_steps,
             "observation":observation,
         })
 
+    @staticmethod
+    def summary_prompt():
+        return Prompt.templates.get('summary.md')
+
     @staticmethod
     def answer_prompt(thought:str,answer:str):
-        prompt=Prompt.prompt_dir.joinpath('answer.md').read_text()
+        prompt=Prompt.templates.get('answer.md')
         return prompt.format(**{
             "thought":thought,
             "final_answer":answer,
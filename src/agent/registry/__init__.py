@@ -1,3 +1,4 @@
+from src.agent.registry.cache import ToolResultCache
 from src.agent.registry.service import Registry
 
-__all__=['Registry']
+__all__=['Registry','ToolResultCache']
\ No newline at end of file
@@ -0,0 +1,51 @@
+from src.agent.registry.views import ToolResult
+from collections import OrderedDict
+from src.tool import Tool
+import json
+import time
+
+class ToolResultCache:
+    '''Results of MCP tools annotated read-only or idempotent, keyed on server, tool and canonical arguments.
+
+    Entries live for `ttl` seconds and the least recently used are dropped past `max_entries`.
+    Running any other tool of a server forgets that server's entries, as it may have changed what they read.
+    '''
+    def __init__(self,ttl:float=300.0,max_entries:int=256):
+        self.ttl=ttl
+        self.max_entries=max_entries
+        self.entries:OrderedDict[tuple[str,str,str],tuple[float,ToolResult]]=OrderedDict()
+        self.hits=0
+        self.misses=0
+
+    @staticmethod
+    def is_cacheable(tool:Tool)->bool:
+        return tool.repeatable
+
+    @staticmethod
+    def key(tool:Tool,kwargs:dict)->tuple[str,str,str]:
+        return (tool.server,tool.name,json.dumps(kwargs,sort_keys=True,separators=(',',':'),ensure_ascii=False,default=str))
+
+    def get(self,tool:Tool,kwargs:dict)->ToolResult|None:
+        key=self.key(tool,kwargs)
+        entry=self.entries.get(key)
+        if entry is None or entry[0]<time.monotonic():
+            self.entries.pop(key,None)
+            self.misses+=1
+            return None
+        self.entries.move_to_end(key)
+        self.hits+=1
+        return entry[1].model_copy(update={'cached':True})
+
+    def put(self,tool:Tool,kwargs:dict,result:ToolResult):
+        key=self.key(tool,kwargs)
+        self.entries[key]=(time.monotonic()+self.ttl,result)
+        self.entries.move_to_end(key)
+        while len(self.entries)>self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self,server:str):
+        for key in [key for key in self.entries if key[0]==server]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
\ No newline at end of file
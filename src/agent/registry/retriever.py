@@ -0,0 +1,55 @@
+from collections import Counter
+from src.tool import Tool
+import math
+import re
+
+STOPWORDS=frozenset(['a','an','and','are','as','at','be','by','for','from','in','is','it','of','on','or','that','the','this','to','with'])
+
+class ToolRetriever:
+    '''Ranks tools against a query with BM25 over their names, descriptions and parameter names'''
+    def __init__(self,k1:float=1.5,b:float=0.75):
+        self.k1=k1
+        self.b=b
+        self.term_frequencies:dict[str,Counter]={}
+        self.document_frequencies:Counter=Counter()
+        self.lengths:dict[str,int]={}
+        self.average_length=0.0
+
+    @staticmethod
+    def tokenize(text:str)->list[str]:
+        # Split camelCase and snake_case identifiers into words
+        text=re.sub(r"([a-z0-9])([A-Z])",r"\1 \2",text)
+        return [token for token in re.findall(r"[a-z0-9]+",text.lower()) if token not in STOPWORDS]
+
+    @staticmethod
+    def document(tool:Tool)->str:
+        schema=tool.args_schema if isinstance(tool.args_schema,dict) else {}
+        properties=schema.get('properties',{}) or {}
+        parameters=' '.join(f"{name} {prop.get('description','') if isinstance(prop,dict) else ''}" for name,prop in properties.items())
+        # The name is repeated so that it outweighs the description
+        return f"{tool.name} {tool.name} {tool.description or ''} {parameters}"
+
+    def build(self,tools:dict[str,Tool])->None:
+        '''Index the tools by their registered name'''
+        self.term_frequencies={name:Counter(self.tokenize(self.document(tool))) for name,tool in tools.items()}
+        self.lengths={name:sum(terms.values()) for name,terms in self.term_frequencies.items()}
+        self.document_frequencies=Counter(term for terms in self.term_frequencies.values() for term in terms)
+        self.average_length=sum(self.lengths.values())/len(self.lengths) if self.lengths else 0.0
+
+    def search(self,query:str,k:int)->list[str]:
+        '''Get the names of the k tools most relevant to the query'''
+        terms=set(self.tokenize(query))
+        count=len(self.term_frequencies)
+        scores:dict[str,float]={}
+        for name,frequencies in self.term_frequencies.items():
+            score=0.0
+            for term in terms:
+                frequency=frequencies.get(term)
+                if not frequency:
+                    continue
+                idf=math.log(1+(count-self.document_frequencies[term]+0.5)/(self.document_frequencies[term]+0.5))
+                norm=self.k1*(1-self.b+self.b*self.lengths[name]/(self.average_length or 1))
+                score+=idf*frequency*(self.k1+1)/(frequency+norm)
+            if score>0:
+                scores[name]=score
+        return sorted(scores,key=lambda name:(-scores[name],name))[:k]
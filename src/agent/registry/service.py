@@ -1,3 +1,5 @@
+from src.agent.registry.retriever import ToolRetriever
+from src.agent.registry.cache import ToolResultCache
 from src.agent.registry.views import ToolResult
 from src.mcp.client.service import MCPSession
 from functools import partial
@@ -7,48 +9,144 @@ import asyncio
 import json
 
 class Registry:
-    def __init__(self,tools:list[Tool]=[]):
-        self.mcp_tools:list[Tool]=[]
+    def __init__(self,tools:list[Tool]=[],tool_cache:ToolResultCache|None=None):
         self.tools=tools
+        # Results of read-only and idempotent MCP tools, None disables caching
+        self.tool_cache=tool_cache
+        # Tools of each connected server keyed by their original name
+        self.server_tools:dict[str,dict[str,Tool]]={}
+        # The tool list each server was indexed from, to detect when it changes
+        self.server_sources:dict[str,list]={}
+        # Registered name -> Tool, names shared by several providers are namespaced by server
+        self.index:dict[str,Tool]={}
+        self.aliases:dict[str,list[str]]={}
+        # Bumped whenever the tool set changes, derived values are memoized on it
+        self.version=0
+        self.tools_prompt_cache:dict[bool,tuple[int,str]]={}
+        self.retriever=ToolRetriever()
+        self.retriever_version=-1
+        self.reindex({tool.name for tool in tools})
 
     def tool_prompt(self, tool_name: str) -> str:
-        tool = self.registry_tools.get(tool_name)
+        tool = self.index.get(tool_name)
         if tool is None:
             return f"Tool '{tool_name}' not found."
         return dedent(f"""
-        Tool Name: {tool.name}
+        Tool Name: {tool_name}
         Tool Description: {tool.description}
         Tool Schema: {json.dumps(tool.args_schema,indent=4)}
         """)
 
     @property
-    def registry_tools(self):
-        tools=self.tools+self.mcp_tools
-        return {tool.name: tool for tool in tools}
+    def registry_tools(self) -> dict[str, Tool]:
+        return self.index
+
+    @property
+    def mcp_tools(self) -> list[Tool]:
+        return [tool for tools in self.server_tools.values() for tool in tools.values()]
     
-    def get_tools_prompt(self) -> str:
-        tools_prompt = [self.tool_prompt(tool.name) for tool in self.registry_tools.values()]
+    def get_tools_prompt(self, sort: bool = False, tool_names: list[str]|None = None) -> str:
+        if tool_names is not None:
+            return self.get_selected_tools_prompt(tool_names, sort=sort)
+        cached = self.tools_prompt_cache.get(sort)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        tool_names = list(self.index.keys())
+        if sort:
+            # Built-in tools first, then MCP tools grouped by server
+            tool_names.sort(key=lambda tool_name: (self.index[tool_name].server or '', tool_name))
+        tools_prompt = '\n\n'.join([self.tool_prompt(tool_name) for tool_name in tool_names])
+        self.tools_prompt_cache[sort] = (self.version, tools_prompt)
+        return tools_prompt
+
+    def get_selected_tools_prompt(self, tool_names: list[str], sort: bool = False) -> str:
+        '''Full schemas of the built-in tools and the given tools, the remaining tools are listed by name'''
+        selected = set(tool_names)
+        names = [name for name, tool in self.index.items() if tool.server is None or name in selected]
+        if sort:
+            names.sort(key=lambda tool_name: (self.index[tool_name].server or '', tool_name))
+        tools_prompt = [self.tool_prompt(tool_name) for tool_name in names]
+        others = sorted(name for name, tool in self.index.items() if tool.server is not None and name not in selected)
+        if others:
+            tools_prompt.append(f"Other available tools (use `Lookup Tool` to get their schema): {', '.join(others)}")
         return '\n\n'.join(tools_prompt)
+
+    def get_tool_schemas_prompt(self, tool_names: list[str]) -> str:
+        '''Full schemas of the given tools only'''
+        return '\n\n'.join([self.tool_prompt(tool_name) for tool_name in sorted(tool_names) if tool_name in self.index])
+
+    def search_tools(self, query: str, k: int) -> list[str]:
+        '''Names of the k MCP tools most relevant to the query'''
+        if self.retriever_version != self.version:
+            self.retriever.build({name: tool for name, tool in self.index.items() if tool.server is not None})
+            self.retriever_version = self.version
+        return self.retriever.search(query, k)
+
+    def get_server_tools(self, server: str) -> list[Tool]:
+        return list(self.server_tools.get(server, {}).values())
+
+    def reindex(self, names: set[str]):
+        '''Recompute the registered names of the given tool names'''
+        if not names:
+            return None
+        builtins = {tool.name: tool for tool in self.tools if tool.name in names}
+        for name in names:
+            for alias in self.aliases.pop(name, []):
+                self.index.pop(alias, None)
+            providers = [(server, tools[name]) for server, tools in self.server_tools.items() if name in tools]
+            aliases = []
+            if name in builtins:
+                self.index[name] = builtins[name]
+                aliases.append(name)
+            for server, tool in providers:
+                alias = name if name not in builtins and len(providers) == 1 else f"{server}/{name}"
+                self.index[alias] = tool
+                aliases.append(alias)
+            if aliases:
+                self.aliases[name] = aliases
+        self.version += 1
     
     def add_tool(self, tool: Tool):
         self.tools.append(tool)
+        self.reindex({tool.name})
     
     def add_tools(self, tools: list[Tool]):
         self.tools.extend(tools)
-    
-    async def add_tools_from_session(self,mcp_session:MCPSession):
-        mcp_tools=await mcp_session.tools_list()
-        tools=[Tool(
+        self.reindex({tool.name for tool in tools})
+
+    def set_server_tools(self, mcp_session: MCPSession, mcp_tools: list):
+        server = mcp_session.name or str(mcp_session.id)
+        # A session serves the same list object until its tools cache is invalidated
+        if self.server_sources.get(server) is mcp_tools:
+            return None
+        names = set(self.server_tools.get(server, {}))
+        self.server_tools[server] = {mcp_tool.name: Tool(
             name=mcp_tool.name,
             description=mcp_tool.description,
             args_schema=mcp_tool.inputSchema,
             func=partial(mcp_session.tools_call,mcp_tool.name),
-        ) for mcp_tool in mcp_tools]
-        self.mcp_tools.extend(tools)
+            server=mcp_session.name,
+            annotations=mcp_tool.annotations,
+        ) for mcp_tool in mcp_tools}
+        self.server_sources[server] = mcp_tools
+        self.reindex(names | set(self.server_tools[server]))
+
+    def remove_server_tools(self, server: str):
+        names = set(self.server_tools.pop(server, {}))
+        self.server_sources.pop(server, None)
+        self.reindex(names)
+    
+    async def add_tools_from_session(self,mcp_session:MCPSession):
+        mcp_tools=await mcp_session.get_tools()
+        self.set_server_tools(mcp_session,mcp_tools)
     
     async def add_tools_from_sessions(self,sessions:list[MCPSession]):
-        self.mcp_tools=[]
-        await asyncio.gather(*[self.add_tools_from_session(session) for session in sessions])
+        mcp_tools=await asyncio.gather(*[session.get_tools() for session in sessions])
+        for session,tools in zip(sessions,mcp_tools):
+            self.set_server_tools(session,tools)
+        servers={session.name or str(session.id) for session in sessions}
+        for server in [server for server in self.server_tools if server not in servers]:
+            self.remove_server_tools(server)
 
     def _sanitize_kwargs(self, tool: Tool, kwargs: dict) -> dict:
         # For MCP tools (dict schema, no pydantic model), keep only schema-defined keys
@@ -60,7 +158,7 @@ class Registry:
         return kwargs
 
     def execute(self, tool_name: str, **kwargs) -> ToolResult:
-        tool = self.registry_tools.get(tool_name)
+        tool = self.index.get(tool_name)
         if tool is None:
             return ToolResult(is_success=False, error=f"Tool '{tool_name}' not found.")
         try:
@@ -73,14 +171,27 @@ class Registry:
             return ToolResult(is_success=False, error=str(error))
         
     async def aexecute(self, tool_name: str, **kwargs) -> ToolResult:
-        tool = self.registry_tools.get(tool_name)
+        tool = self.index.get(tool_name)
         if tool is None:
             return ToolResult(is_success=False, error=f"Tool '{tool_name}' not found.")
         try:
             # Validate only if a pydantic model is present
             if tool.model is not None:
                 tool.model.model_validate(kwargs)
-            content = await tool.ainvoke(**self._sanitize_kwargs(tool, kwargs))
-            return ToolResult(is_success=True, content=content)
+            kwargs = self._sanitize_kwargs(tool, kwargs)
+            if self.tool_cache is None or tool.server is None:
+                content = await tool.ainvoke(**kwargs)
+                return ToolResult(is_success=True, content=content)
+            cacheable = self.tool_cache.is_cacheable(tool)
+            if cacheable and (result := self.tool_cache.get(tool, kwargs)) is not None:
+                return result
+            if not getattr(tool.annotations, 'readOnlyHint', None):
+                # The call may change what the other tools of its server return
+                self.tool_cache.invalidate(tool.server)
+            content = await tool.ainvoke(**kwargs)
+            result = ToolResult(is_success=True, content=content)
+            if cacheable and not getattr(content, 'isError', False):
+                self.tool_cache.put(tool, kwargs, result)
+            return result
         except Exception as error:
             return ToolResult(is_success=False, error=str(error))
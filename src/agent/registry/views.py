@@ -4,4 +4,6 @@ from typing import Any
 class ToolResult(BaseModel):
     is_success: bool
     content: Any | None = None
-    error: str | None = None
\ No newline at end of file
+    error: str | None = None
+    # Served from the tool result cache instead of a server round trip
+    cached: bool = False
\ No newline at end of file
@@ -0,0 +1,3 @@
+from src.agent.results.service import ResultStore
+
+__all__=['ResultStore']
\ No newline at end of file
@@ -0,0 +1,81 @@
+from pathlib import Path
+import tempfile
+import hashlib
+import mmap
+import re
+
+class ResultStore:
+    '''Spills large observations to content-addressed files and serves them back in pages.
+
+    Files are named by the sha256 of their content, so the same result is stored once,
+    and are memory-mapped when read so a page never loads the whole result.
+    '''
+    def __init__(self,directory:str|Path|None=None,threshold:int=8000,preview:int=1000):
+        self.directory=Path(directory) if directory else Path(tempfile.gettempdir())/'mcp-agent-results'
+        self.directory.mkdir(parents=True,exist_ok=True)
+        self.threshold=threshold
+        self.preview=preview
+
+    def path(self,handle:str)->Path:
+        if not re.fullmatch(r"[0-9a-f]{64}",handle):
+            raise ValueError(f"Invalid result handle: {handle}")
+        path=self.directory/f"{handle}.txt"
+        if not path.exists():
+            raise ValueError(f"Result {handle} not found")
+        return path
+
+    def put(self,content:str)->str:
+        '''Store the content, returns its handle'''
+        data=content.encode('utf-8')
+        handle=hashlib.sha256(data).hexdigest()
+        path=self.directory/f"{handle}.txt"
+        if not path.exists():
+            # Written under a temporary name of its own so neither a reader nor a concurrent
+            # writer of the same content ever sees a partial file
+            descriptor,temp_name=tempfile.mkstemp(dir=self.directory,prefix=f"{handle}.",suffix='.tmp')
+            try:
+                with open(descriptor,'wb') as file:
+                    file.write(data)
+                Path(temp_name).replace(path)
+            except BaseException:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        return handle
+
+    def spill(self,content:str)->str:
+        '''Get the content as is when small, else store it and get a preview with its handle'''
+        if len(content)<=self.threshold:
+            return content
+        handle=self.put(content)
+        size=self.size(handle)
+        return f"{content[:self.preview]}\n... [Result truncated, {size} bytes in total. Use `Read Result Tool` with handle '{handle}' to read more] ..."
+
+    def size(self,handle:str)->int:
+        return self.path(handle).stat().st_size
+
+    def read(self,handle:str,offset:int=0,length:int=4000)->str:
+        '''Read `length` bytes of the result starting at `offset`'''
+        with open(self.path(handle),'rb') as file:
+            if file.seek(0,2)==0:
+                return ''
+            with mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ) as view:
+                return view[offset:offset+length].decode('utf-8',errors='ignore')
+
+    def grep(self,handle:str,pattern:str,max_matches:int=50)->str:
+        '''Find the lines of the result matching the pattern, with their byte offsets'''
+        regex=re.compile(pattern.encode('utf-8'),re.IGNORECASE)
+        matches=[]
+        with open(self.path(handle),'rb') as file:
+            if file.seek(0,2)==0:
+                return ''
+            with mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ) as view:
+                for match in regex.finditer(view):
+                    start=view.rfind(b'\n',0,match.start())+1
+                    end=view.find(b'\n',match.end())
+                    end=len(view) if end==-1 else end
+                    line=view[start:end].decode('utf-8',errors='ignore')
+                    if not matches or matches[-1][0]!=start:
+                        matches.append((start,line))
+                    if len(matches)>=max_matches:
+                        break
+        return '\n'.join(f"[{start}] {line}" for start,line in matches)
@@ -0,0 +1,3 @@
+from src.agent.runner.service import AgentRunner
+
+__all__=['AgentRunner']
\ No newline at end of file
@@ -0,0 +1,74 @@
+from src.agent.runner.views import TaskResult,RunReport
+from typing import Any,AsyncIterable,Iterable
+from src.agent.views import AgentResponse
+from src.llms.base import BaseChatLLM
+from src.mcp.client import MCPClient
+from src.agent.service import Agent
+import logging
+import asyncio
+import math
+import time
+
+logger=logging.getLogger(__name__)
+
+class AgentRunner:
+    '''Runs many queries concurrently, each with its own Agent (registry and history) over a fork of the shared client.
+
+    With MCPClient(keep_alive=True) the forks lease warm sessions from the one session pool,
+    and every agent shares the same LLM and its connection pool.
+    '''
+    def __init__(self,client:MCPClient,llm:BaseChatLLM,concurrency:int=4,**agent_kwargs:Any):
+        self.client=client
+        self.llm=llm
+        self.concurrency=concurrency
+        self.agent_kwargs=agent_kwargs
+
+    @staticmethod
+    def percentile(latencies:list[float],percent:float)->float:
+        '''Nearest-rank percentile'''
+        if not latencies:
+            return 0.0
+        ordered=sorted(latencies)
+        return ordered[max(math.ceil(percent/100*len(ordered))-1,0)]
+
+    async def arun_task(self,query:str)->TaskResult:
+        agent=Agent(client=self.client.fork(),llm=self.llm,**self.agent_kwargs)
+        start=time.perf_counter()
+        try:
+            response=await agent.ainvoke(query)
+        except Exception as e:
+            response=AgentResponse(is_success=False,response=f"Error in agent operation: {e}")
+        latency=time.perf_counter()-start
+        logger.info(f"Task finished in {latency:.2f}s: {query}")
+        return TaskResult(query=query,response=response,latency=latency)
+
+    async def arun(self,queries:Iterable[str]|AsyncIterable[str])->RunReport:
+        '''Run the queries, at most `concurrency` at once, as they arrive from the iterable'''
+        queue:asyncio.Queue[str|None]=asyncio.Queue(maxsize=self.concurrency*2)
+        results:list[TaskResult]=[]
+
+        async def produce():
+            if isinstance(queries,AsyncIterable):
+                async for query in queries:
+                    await queue.put(query)
+            else:
+                for query in queries:
+                    await queue.put(query)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            while (query:=await queue.get()) is not None:
+                results.append(await self.arun_task(query))
+
+        start=time.perf_counter()
+        await asyncio.gather(produce(),*[work() for _ in range(self.concurrency)])
+        duration=time.perf_counter()-start
+        latencies=[result.latency for result in results]
+        return RunReport(
+            results=results,
+            duration=duration,
+            tasks_per_minute=len(results)/duration*60 if duration else 0.0,
+            p50_latency=self.percentile(latencies,50),
+            p95_latency=self.percentile(latencies,95)
+        )
\ No newline at end of file
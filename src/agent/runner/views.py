@@ -0,0 +1,16 @@
+from src.agent.views import AgentResponse
+from dataclasses import dataclass,field
+
+@dataclass
+class TaskResult:
+    query:str
+    response:AgentResponse
+    latency:float
+
+@dataclass
+class RunReport:
+    results:list[TaskResult]=field(default_factory=list)
+    duration:float=0.0
+    tasks_per_minute:float=0.0
+    p50_latency:float=0.0
+    p95_latency:float=0.0
\ No newline at end of file
@@ -1,106 +1,163 @@
 from src.mcp.types.tools import ToolResult,TextContent as ToolTextContent,ImageContent as ToolImageContent,Content as ToolContent
-from src.agent.tools import connect_tool,disconnect_tool,done_tool,search_tool,resource_tool
+from src.agent.tools import connect_tool,disconnect_tool,done_tool,search_tool,resource_tool,lookup_tool,read_result_tool
 from src.mcp.types.resources import ResourceResult,TextContent as ResourceTextContent
 from src.messages import AIMessage,HumanMessage,SystemMessage,ImageMessage
-from src.agent.utils import extract_llm_response
+from src.agent.registry.views import ToolResult as ActionResult
+from src.agent.history import HistoryPolicy,estimate_tokens
+from src.llms.limiter import backoff_delay,is_retryable
+from src.mcp.transport.base import deadline,remaining_time
+from src.agent.results import ResultStore
+from src.agent.utils import extract_llm_response,extract_structured_response,repair_llm_response,is_well_formed,ActionStreamParser
+from src.agent.views import AgentResponse,ActionCall,AgentOutput,LLMResponse,ParseStats
 from src.agent.prompt.service import Prompt
-from src.agent.views import AgentResponse
-from src.agent.registry import Registry
-from src.llms.base import BaseChatLLM
+from src.agent.registry import Registry,ToolResultCache
+from src.llms.base import BaseChatLLM,StructuredOutputError
+from src.llms.views import ChatLLMResponse
 from src.mcp.client import MCPClient
 from rich.markdown import Markdown
 from rich.console import Console
-from typing import List,cast
+from typing import List,Callable,Literal,cast
 import logging
+import asyncio
+import time
 
 logger=logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 logger.addHandler(logging.StreamHandler())
 
 class Agent:
-    def __init__(self,client:MCPClient,llm:BaseChatLLM,max_steps:int=10,max_consecutive_failures:int=3):
+    def __init__(self,client:MCPClient,llm:BaseChatLLM,max_steps:int=10,max_consecutive_failures:int=3,parallel_actions:bool=False,max_concurrency_per_server:int=4,stream:bool=False,cache_friendly_prompt:bool=False,max_tools:int|None=None,history_policy:HistoryPolicy|None=None,result_store:ResultStore|None=None,time_budget:float|None=None,cache_tool_results:bool=False,tool_cache:ToolResultCache|None=None,action_mode:Literal['xml','structured']='xml'):
         self.name="MCP Agent"
         self.description="A MCP Agent that can use mutliple MCP Servers to perform tasks using their tools."
-        self.registry=Registry(tools=[connect_tool,disconnect_tool,done_tool,search_tool,resource_tool])
+        self.registry=Registry(tools=[connect_tool,disconnect_tool,done_tool,search_tool,resource_tool]+([lookup_tool] if max_tools else [])+([read_result_tool] if result_store else []),tool_cache=tool_cache)
         self.max_consecutive_failures=max_consecutive_failures
         self.max_steps=max_steps
+        self.parallel_actions=parallel_actions
+        self.max_concurrency_per_server=max_concurrency_per_server
+        self.stream=stream
+        self.cache_friendly_prompt=cache_friendly_prompt
+        self.max_tools=max_tools
+        self.history_policy=history_policy
+        self.result_store=result_store
+        # Seconds the whole run may take, every MCP request is bounded by what is left of it
+        self.time_budget=time_budget
+        # A fresh cache of read-only/idempotent tool results per run, unless a tool_cache is shared across runs
+        self.cache_tool_results=cache_tool_results
+        self.tool_cache=tool_cache
+        # 'structured' asks the LLM for an AgentOutput JSON object instead of the XML block format
+        self.action_mode=action_mode
+        # LLM calls, retries and local repairs of the action mode, kept across runs
+        self.parse_stats=ParseStats(mode=action_mode)
         self.console=Console()
         self.client=client
         self.llm=llm
 
-    async def ainvoke(self,query:str)->str:
+    async def ainvoke(self,query:str,on_delta:Callable[[str],None]|None=None)->str:
         messages=[]
         agent_response=None
         servers_info=self.client.get_servers_info()
+        thought=''
+        if self.cache_tool_results and self.tool_cache is None:
+            self.registry.tool_cache=ToolResultCache()
         try:
-            messages.append(HumanMessage(content=f"<User-Query>{query}</User-Query>"))
-            for steps in range(1,self.max_steps+1):
-                sessions=self.client.get_all_sessions()
-                await self.registry.add_tools_from_sessions(sessions=sessions)
-                system_message=SystemMessage(content=Prompt.system_prompt(**{
-                    'max_steps':self.max_steps,
-                    'registry':self.registry,
-                    'servers_info':servers_info
-                }))
-                for attempt in range(self.max_consecutive_failures):
-                    try:
-                        llm_response=await self.llm.ainvoke([system_message,*messages])
-                        response=extract_llm_response(llm_response.content)
+            with deadline(self.time_budget):
+                messages.append(HumanMessage(content=f"<User-Query>{query}</User-Query>"))
+                for steps in range(1,self.max_steps+1):
+                    remaining=remaining_time()
+                    if remaining is not None and remaining<=0:
+                        logger.error(f"Time budget of {self.time_budget}s exhausted after {steps-1} steps.")
+                        agent_response=AgentResponse(is_success=False,response=f"Time budget of {self.time_budget}s exhausted after {steps-1} steps.")
                         break
-                    except Exception as e:
-                        logger.error(f"Error in LLM invocation or response extraction: {e}")
-                        if attempt+1<self.max_consecutive_failures-1:
-                            continue
-                        logger.error(f"Max consecutive failures reached. Failed to get a valid response after {self.max_consecutive_failures} attempts.")
-                        agent_response=AgentResponse(is_success=False,response=f"Failed to get a valid response after {self.max_consecutive_failures} attempts.")
+                    sessions=self.client.get_all_sessions()
+                    await self.registry.add_tools_from_sessions(sessions=sessions)
+                    # Only the schemas of the tools most relevant to the query and the latest thought are sent
+                    tool_names=self.registry.search_tools(query=f"{query} {thought}",k=self.max_tools) if self.max_tools else None
+                    system_message=SystemMessage(content=Prompt.system_prompt(**{
+                        'max_steps':self.max_steps,
+                        'registry':self.registry,
+                        'servers_info':servers_info,
+                        'parallel_actions':self.parallel_actions,
+                        'cache_friendly':self.cache_friendly_prompt,
+                        # The selection changes every step, so a cache-friendly prompt only lists the tools by name
+                        'tool_names':[] if self.cache_friendly_prompt and tool_names is not None else tool_names,
+                        'structured_output':self.action_mode=='structured'
+                    }))
+                    history=await self.history_policy.acompact(messages,system_message=system_message) if self.history_policy else messages
+                    if self.cache_friendly_prompt:
+                        history=self.with_context(history,steps=steps,tool_names=tool_names)
+                    logger.info(f"Prompt size: ~{estimate_tokens([system_message,*history])} tokens")
+                    dispatched=None
+                    for attempt in range(self.max_consecutive_failures):
+                        try:
+                            self.parse_stats.llm_calls+=1
+                            if self.stream and self.action_mode=='xml':
+                                content,dispatched=await self.astream_llm([system_message,*history],on_delta=on_delta)
+                            else:
+                                try:
+                                    llm_response=await self.llm.ainvoke([system_message,*history],structured_output=AgentOutput if self.action_mode=='structured' else None)
+                                except StructuredOutputError as e:
+                                    # The adapter rejected a near miss against the schema, its text still gets the local repair
+                                    llm_response=ChatLLMResponse(content=e.raw)
+                                content=llm_response.content
+                                usage=llm_response.usage
+                                if usage and usage.cached_tokens is not None:
+                                    logger.info(f"Cached tokens: {usage.cached_tokens}/{usage.prompt_tokens}")
+                            response=self.parse_response(content)
+                            break
+                        except Exception as e:
+                            if dispatched:
+                                dispatched[1].cancel()
+                                dispatched=None
+                            logger.error(f"Error in LLM invocation or response extraction: {e}")
+                            if attempt+1<self.max_consecutive_failures:
+                                self.parse_stats.retries+=1
+                                if is_retryable(e):
+                                    # Rate limits and provider errors back off instead of retrying at once
+                                    delay=backoff_delay(attempt,e)
+                                    logger.info(f"Retrying in {delay:.2f}s")
+                                    await asyncio.sleep(delay)
+                                continue
+                            logger.error(f"Max consecutive failures reached. Failed to get a valid response after {self.max_consecutive_failures} attempts.")
+                            agent_response=AgentResponse(is_success=False,response=f"Failed to get a valid response after {self.max_consecutive_failures} attempts.")
+                            break
+                    if agent_response is not None:
+                        # Retries ran out, the previous step's response must not run again
+                        break
+                    thought=response.get('thought','')
+                    logger.info(f"Step {steps}")
+                    logger.info(f"Thought: {response.get('thought','')}")
+                    actions=response.get('actions',[])
+                    if self.parallel_actions and len(actions)>1:
+                        messages.append(AIMessage(content=Prompt.actions_prompt(thought=thought,actions=actions)))
+                        observation,images=await self.aexecute_actions(actions)
+                        messages.append(self.observation_message(steps=steps,observation=observation,images=images))
+                        logger.info(f"Observation: {observation}\n")
+                        continue
+                    action_name=response.get('action_name','')
+                    action_input=response.get('action_input',{})
+                    messages.append(AIMessage(content=Prompt.action_prompt(thought=thought,action_name=action_name,action_input=action_input)))
+                    if dispatched and dispatched[0]==ActionCall(action_name=action_name,action_input=action_input):
+                        # The action was already started while the response was streaming
+                        action_result=await dispatched[1]
+                    else:
+                        if dispatched:
+                            dispatched[1].cancel()
+                        action_result=await self.registry.aexecute(tool_name=action_name,**(action_input|self.tool_context()))
+                    if action_name.startswith("Done"):
+                        answer=action_result.content
+                        logger.info(f"Final Answer: {answer}\n")
+                        messages.append(HumanMessage(content=Prompt.answer_prompt(thought=thought,answer=answer)))
+                        await self.client.close_all_sessions()
+                        agent_response=AgentResponse(is_success=True,response=answer)
                         break
-                
-                thought=response.get('thought','')
-                logger.info(f"Step {steps}")
-                logger.info(f"Thought: {response.get('thought','')}")
-                action_name=response.get('action_name','')
-                action_input=response.get('action_input',{})
-                messages.append(AIMessage(content=Prompt.action_prompt(thought=thought,action_name=action_name,action_input=action_input)))
-                action_result=await self.registry.aexecute(tool_name=action_name,**(action_input|{'client':self.client}))
-                if action_name.startswith("Done"):
-                    answer=action_result.content
-                    logger.info(f"Final Answer: {answer}\n")
-                    messages.append(HumanMessage(content=Prompt.answer_prompt(thought=thought,answer=answer)))
-                    await self.client.close_all_sessions()
-                    agent_response=AgentResponse(is_success=True,response=answer)
-                    break
-                else:
-                    logger.info(f"Action: {action_name}({', '.join([f'{k}={v}' for k,v in action_input.items()])})")
-                    if isinstance(action_result.content,ToolResult):
-                        texts,images=[],[]
-                        tool_result=action_result.content
-                        if isinstance(tool_result.content,list):
-                            contents=tool_result.content
-                            for content in contents:
-                                if isinstance(content,ToolTextContent):
-                                    texts.append(content.text)
-                                elif isinstance(content,ToolImageContent):
-                                    images.append(content.data)
-                                else:
-                                    # TODO handle other content types
-                                    logger.warning(f"Unsupported content type: {type(content)}")
-                                    pass
-                        elif isinstance(action_result,ResourceResult):
-                            contents=action_result.contents
-                            for content in contents:
-                                if isinstance(content,ResourceTextContent):
-                                    texts.append(content.text)
-                                else:
-                                    pass
-                        observation="\n".join(texts)
-                        if images:
-                            messages.append(ImageMessage(content=Prompt.observation_prompt(steps=steps,max_steps=self.max_steps,observation=observation),images=images))
-                        elif texts:
-                            messages.append(HumanMessage(content=Prompt.observation_prompt(steps=steps,max_steps=self.max_steps,observation=observation)))
                     else:
-                        observation=action_result.content if action_result.is_success else action_result.error  
-                        messages.append(HumanMessage(content=Prompt.observation_prompt(steps=steps,max_steps=self.max_steps,observation=observation)))
-                    logger.info(f"Observation: {observation}\n")
+                        logger.info(f"Action: {action_name}({', '.join([f'{k}={v}' for k,v in action_input.items()])}){' [cached]' if action_result.cached else ''}")
+                        observation,images=self.get_observation(action_result)
+                        messages.append(self.observation_message(steps=steps,observation=observation,images=images))
+                        logger.info(f"Observation: {observation}\n")
+                else:
+                    logger.error(f"Max steps reached. No answer after {self.max_steps} steps.")
+                    agent_response=AgentResponse(is_success=False,response=f"No answer after {self.max_steps} steps.")
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received. Exiting...")
             agent_response=AgentResponse(is_success=False,response="Keyboard interrupt received. Exiting...")
@@ -108,13 +165,162 @@ class Agent:
             logger.error(f"Error in agent operation: {e}")
             agent_response=AgentResponse(is_success=False,response=f"Error in agent operation: {e}")
         finally:
+            logger.info(f"Action mode '{self.parse_stats.mode}': {self.parse_stats.llm_calls} LLM calls, {self.parse_stats.retries} retries, {self.parse_stats.repairs} repaired locally")
+            if self.registry.tool_cache:
+                logger.info(f"Tool cache: {self.registry.tool_cache.hits} hits, {self.registry.tool_cache.misses} misses")
             # Safely close all sessions before quitting just in case agent misses to disconnect
             if self.client.get_all_sessions():
                 await self.client.close_all_sessions()
         return agent_response
         
 
+    async def astream_llm(self,messages:list,on_delta:Callable[[str],None]|None=None)->tuple[str,tuple[ActionCall,asyncio.Task]|None]:
+        '''Stream the LLM response, acting on each action as soon as its tags are closed'''
+        parser=ActionStreamParser()
+        dispatched=None
+        start=time.perf_counter()
+        try:
+            async for delta in self.llm.astream(messages):
+                if on_delta:
+                    on_delta(delta)
+                _,actions=parser.feed(delta)
+                # Only the first action of a single action step is dispatched early
+                if self.parallel_actions or dispatched or not actions or actions[0] is not parser.actions[0]:
+                    continue
+                action=actions[0]
+                if not self.can_dispatch_early(action):
+                    continue
+                logger.info(f"Time to first action: {time.perf_counter()-start:.2f}s")
+                dispatched=(action,asyncio.create_task(self.adispatch_action(action)))
+        except BaseException:
+            if dispatched:
+                dispatched[1].cancel()
+            raise
+        return parser.text,dispatched
+
+    def parse_response(self,content:str|AgentOutput)->LLMResponse:
+        '''Parse the LLM response of the action mode, repairing a near miss locally before a retry is spent'''
+        error=None
+        try:
+            response=extract_structured_response(content) if self.action_mode=='structured' else extract_llm_response(content)
+            if not isinstance(content,str) or (response['actions'] and (self.action_mode=='structured' or is_well_formed(content))):
+                return response
+        except Exception as e:
+            if not isinstance(content,str):
+                raise
+            error,response=e,None
+        try:
+            repaired=repair_llm_response(content)
+        except Exception:
+            repaired=None
+        if repaired and repaired['actions']:
+            logger.info("Repaired a malformed response locally")
+            self.parse_stats.repairs+=1
+            return repaired
+        if response is None:
+            raise error
+        return response
+
+    def with_context(self,history:list,steps:int,tool_names:list[str]|None)->list:
+        '''Append the volatile context to the latest user turn, so the prefix before it stays cacheable
+        and the conversation never holds two user turns in a row'''
+        context=Prompt.context_prompt(**{
+            'steps':steps,
+            'max_steps':self.max_steps,
+            'servers_info':self.client.get_servers_info(),
+            'tools':self.registry.get_tool_schemas_prompt(tool_names) if tool_names else ''
+        })
+        if not history or not isinstance(history[-1],HumanMessage):
+            return [*history,HumanMessage(content=context)]
+        latest=history[-1]
+        return [*history[:-1],latest.model_copy(update={'content':f"{latest.content}\n\n{context}"})]
+
+    def can_dispatch_early(self,action:ActionCall)->bool:
+        '''Only actions that are safe to run again can start before the response is complete,
+        as a failed stream or parse cancels them and the retry may issue them once more'''
+        if action['action_name']=="Connect Tool":
+            return True
+        tool=self.registry.registry_tools.get(action['action_name'])
+        return tool is not None and tool.repeatable
+
+    async def adispatch_action(self,action:ActionCall)->ActionResult:
+        '''Execute an action ahead of the full response, warming the tools of a newly connected server'''
+        action_result=await self.registry.aexecute(tool_name=action['action_name'],**(action['action_input']|self.tool_context()))
+        if action['action_name']=="Connect Tool" and action_result.is_success:
+            name=str(action['action_input'].get('name','')).lower()
+            if self.client.is_connected(name):
+                await self.client.get_session(name).get_tools()
+        return action_result
+
+    def tool_context(self)->dict:
+        '''Extra keyword arguments handed to the built-in tools'''
+        return {'client':self.client,'registry':self.registry,'result_store':self.result_store}
+
+    def get_observation(self,action_result:ActionResult)->tuple[str,list]:
+        '''Flatten the result of an action into the observation text and its images'''
+        if not isinstance(action_result.content,ToolResult):
+            observation=action_result.content if action_result.is_success else action_result.error
+            return observation,[]
+        texts,images=[],[]
+        tool_result=action_result.content
+        if isinstance(tool_result.content,list):
+            contents=tool_result.content
+            for content in contents:
+                if isinstance(content,ToolTextContent):
+                    texts.append(content.text)
+                elif isinstance(content,ToolImageContent):
+                    images.append(content.data)
+                else:
+                    # TODO handle other content types
+                    logger.warning(f"Unsupported content type: {type(content)}")
+                    pass
+        elif isinstance(action_result,ResourceResult):
+            contents=action_result.contents
+            for content in contents:
+                if isinstance(content,ResourceTextContent):
+                    texts.append(content.text)
+                else:
+                    pass
+        observation="\n".join(texts)
+        if self.result_store:
+            # Large results are kept on disk, the history only holds a preview and the handle
+            observation=self.result_store.spill(observation)
+        return observation,images
+
+    def observation_message(self,steps:int,observation:str,images:list)->HumanMessage:
+        content=Prompt.observation_prompt(steps=steps,max_steps=self.max_steps,observation=observation)
+        if images:
+            return ImageMessage(content=content,images=images)
+        return HumanMessage(content=content)
+
+    async def aexecute_actions(self,actions:list[ActionCall])->tuple[str,list]:
+        '''Execute independent actions concurrently and merge their results into one observation'''
+        semaphores:dict[str|None,asyncio.Semaphore]={}
+        # Done Tool ends the run, so it is never mixed with other actions
+        executable=[action for action in actions if not action['action_name'].startswith("Done")]
+
+        async def execute(action:ActionCall)->ActionResult:
+            tool=self.registry.registry_tools.get(action['action_name'])
+            server=tool.server if tool else None
+            if server not in semaphores:
+                # Built-in tools change the set of connected servers, so they run one at a time
+                semaphores[server]=asyncio.Semaphore(self.max_concurrency_per_server if server else 1)
+            async with semaphores[server]:
+                return await self.registry.aexecute(tool_name=action['action_name'],**(action['action_input']|self.tool_context()))
+
+        action_results=await asyncio.gather(*[execute(action) for action in executable])
+        observations,images=[],[]
+        for index,(action,action_result) in enumerate(zip(executable,action_results),start=1):
+            logger.info(f"Action: {action['action_name']}({', '.join([f'{k}={v}' for k,v in action['action_input'].items()])}){' [cached]' if action_result.cached else ''}")
+            observation,action_images=self.get_observation(action_result)
+            observations.append(f"[{index}] {action['action_name']}:\n{observation}")
+            images.extend(action_images)
+        if len(executable)<len(actions):
+            observations.append("`Done Tool` was skipped, it must be the only action in its response.")
+        return "\n\n".join(observations),images
+
     async def print_response(self,query:str)->None:
-        agent_response=await self.ainvoke(query)
+        on_delta=(lambda delta:self.console.print(delta,end='',markup=False,highlight=False)) if self.stream else None
+        agent_response=await self.ainvoke(query,on_delta=on_delta)
         self.console.print(Markdown(agent_response.response if agent_response.is_success else agent_response.error))
         
\ No newline at end of file
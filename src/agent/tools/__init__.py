@@ -1,9 +1,11 @@
-from src.agent.tools.service import done_tool,connect_tool,disconnect_tool,search_tool,resource_tool
+from src.agent.tools.service import done_tool,connect_tool,disconnect_tool,search_tool,resource_tool,lookup_tool,read_result_tool
 
 __all__=[
     'done_tool',
     'connect_tool',
     'disconnect_tool',
     'search_tool',
-    'resource_tool'
+    'resource_tool',
+    'lookup_tool',
+    'read_result_tool'
 ]
\ No newline at end of file
@@ -1,6 +1,8 @@
 from src.mcp.types.registry import ListServersRequest,SpecificServerVersionRequest,ListServersResponse,SpecificServerVersionResponse
-from src.agent.tools.views import Done,Connect,Disconnect,Resource,Search
+from src.agent.tools.views import Done,Connect,Disconnect,Resource,Search,Lookup,ReadResult
 from src.mcp.registry.service import MCPRegistry
+from src.agent.results import ResultStore
+from src.agent.registry import Registry
 from src.mcp.client import MCPClient
 from typing import cast, Any,Literal
 from textwrap import dedent
@@ -31,6 +33,22 @@ async def connect_tool(name:str,**kwargs):
     client.sessions[name.lower()]=session
     return f'{name.lower()} now connected.'
 
+@Tool('Lookup Tool',args_schema=Lookup)
+async def lookup_tool(name:str,**kwargs):
+    '''Get the full schema of a tool from a connected MCP server'''
+    registry=cast(Registry,kwargs['registry'])
+    return registry.tool_prompt(name)
+
+@Tool('Read Result Tool',args_schema=ReadResult)
+async def read_result_tool(handle:str,offset:int=0,length:int=4000,pattern:str|None=None,**kwargs):
+    '''Page through or search a large tool result that was stored by reference'''
+    result_store=cast(ResultStore,kwargs['result_store'])
+    if pattern:
+        return result_store.grep(handle,pattern) or f'No matches for {pattern}'
+    size=result_store.size(handle)
+    page=result_store.read(handle,offset=offset,length=length)
+    return f'Bytes {offset}-{min(offset+length,size)} of {size}:\n{page}'
+
 @Tool('Disconnect Tool',args_schema=Disconnect)
 async def disconnect_tool(name:str,**kwargs):
     '''Disconnect from a specific MCP server'''
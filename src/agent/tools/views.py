@@ -22,3 +22,12 @@ class Search(SharedBaseModel):
     name:str = Field(...,description="only the keyword of the server to search for in the MCP registry",examples=["filesystem","docker","github"])
     limit:int = Field(10,description="Number of items per page (1-100)",gt=1,lt=100,example=10)
     # cursor:str = Field(description="Pagination cursor",example="server-cursor-123")
+
+class Lookup(SharedBaseModel):
+    name:str = Field(...,description="the name of the tool to get the full schema of",examples=["read_file"])
+
+class ReadResult(SharedBaseModel):
+    handle:str = Field(...,description="the handle of the stored result given in the observation")
+    offset:int = Field(0,description="the byte offset to start reading from",ge=0)
+    length:int = Field(4000,description="the number of bytes to read",gt=0,le=20000)
+    pattern:str|None = Field(None,description="a regex to search the result for, returns the matching lines with their offsets instead of a page",examples=["error"])
\ No newline at end of file
@@ -1,28 +1,168 @@
-from src.agent.views import LLMResponse
+from src.agent.views import LLMResponse,ActionCall,AgentOutput
+from pydantic import BaseModel
 from typing import Any
 import json
 import ast
 import re
 
-def extract_llm_response(text)->LLMResponse:
-    # Dictionary to store extracted values
-    result=LLMResponse(thought='',action_name='',action_input={})
-    # Extract Thought
-    thought_match = re.search(r"<Thought>(.*?)<\/Thought>", text, re.DOTALL)
-    if thought_match:
-        result['thought'] = thought_match.group(1).strip()
+def parse_action_input(action_input_str:str)->dict[str,Any]:
+    try:
+        # Convert string to dictionary safely using ast.literal_eval
+        return ast.literal_eval(action_input_str)
+    except (ValueError, SyntaxError):
+        # If there's an issue with conversion, fall back to JSON
+        return json.loads(action_input_str)
+
+def extract_action(text)->ActionCall:
+    action=ActionCall(action_name='',action_input={})
     # Extract Action-Name
     action_name_match = re.search(r"<Action-Name>(.*?)<\/Action-Name>", text, re.DOTALL)
     if action_name_match:
-        result['action_name'] = action_name_match.group(1).strip()  
+        action['action_name'] = action_name_match.group(1).strip()
     # Extract and convert Action-Input to a dictionary
     action_input_match = re.search(r"<Action-Input>(.*?)<\/Action-Input>", text, re.DOTALL)
     if action_input_match:
-        action_input_str = action_input_match.group(1).strip()
-        try:
-            # Convert string to dictionary safely using ast.literal_eval
-            result['action_input'] = ast.literal_eval(action_input_str)
-        except (ValueError, SyntaxError):
-            # If there's an issue with conversion, store it as raw string
-            result['action_input'] = json.loads(action_input_str)
+        action['action_input'] = parse_action_input(action_input_match.group(1).strip())
+    return action
+
+def extract_llm_response(text)->LLMResponse:
+    # Dictionary to store extracted values
+    result=LLMResponse(thought='',action_name='',action_input={},actions=[])
+    # Extract Thought
+    thought_match = re.search(r"<Thought>(.*?)<\/Thought>", text, re.DOTALL)
+    if thought_match:
+        result['thought'] = thought_match.group(1).strip()
+    # Extract every <Action> block, a response without them holds a single bare action
+    action_blocks = re.findall(r"<Action>(.*?)<\/Action>", text, re.DOTALL)
+    for block in action_blocks or [text]:
+        action=extract_action(block)
+        if action['action_name']:
+            result['actions'].append(action)
+    # The first action is kept at the top level for single action steps
+    if result['actions']:
+        result['action_name'] = result['actions'][0]['action_name']
+        result['action_input'] = result['actions'][0]['action_input']
     return result
+
+def extract_structured_response(content:str|dict|BaseModel)->LLMResponse:
+    '''Convert the output of the structured action mode, given as a model, a dict or JSON text'''
+    if isinstance(content,str):
+        if re.search(r"<Action-Name>",content):
+            # The provider ignored the schema and answered in the block format
+            return extract_llm_response(content)
+        match=re.search(r"\{.*\}",content,re.DOTALL)
+        if match is None:
+            raise ValueError("No JSON object in the response")
+        output=AgentOutput.model_validate_json(match.group(0))
+    elif isinstance(content,AgentOutput):
+        output=content
+    else:
+        output=AgentOutput.model_validate(content.model_dump() if isinstance(content,BaseModel) else content)
+    actions=[ActionCall(action_name=action.action_name,action_input=action.action_input) for action in output.actions]
+    return LLMResponse(
+        thought=output.thought,
+        action_name=actions[0]['action_name'] if actions else '',
+        action_input=actions[0]['action_input'] if actions else {},
+        actions=actions
+    )
+
+TAG_PATTERN=re.compile(r"<\s*(/?)\s*(thought|action[\s_-]*name|action[\s_-]*input|action|output)\s*>",re.IGNORECASE)
+TAG_NAMES={'thought':'Thought','actionname':'Action-Name','actioninput':'Action-Input','action':'Action','output':'Output'}
+LEAF_TAGS={'Thought','Action-Name','Action-Input'}
+
+def is_well_formed(text:str)->bool:
+    '''Every tag of the block format is spelled exactly and closed in order'''
+    stack=[]
+    for match in TAG_PATTERN.finditer(text):
+        tag=TAG_NAMES[re.sub(r"[\s_-]","",match.group(2).lower())]
+        if match.group(0)!=f"<{match.group(1)}{tag}>":
+            return False
+        if not match.group(1):
+            stack.append(tag)
+        elif not stack or stack.pop()!=tag:
+            return False
+    return not stack
+
+def repair_literal(text:str)->Any:
+    '''Parse a near-miss JSON object or Python dict: code fences, trailing commas, JSON literals, missing closing braces'''
+    text=re.sub(r"^```[a-z]*|```$","",text.strip()).strip()
+    text=re.sub(r",\s*([}\]])",r"\1",text)
+    text+='}'*max(text.count('{')-text.count('}'),0)
+    try:
+        return parse_action_input(text)
+    except (ValueError,SyntaxError):
+        pass
+    text=re.sub(r"\btrue\b","True",re.sub(r"\bfalse\b","False",re.sub(r"\bnull\b","None",text)))
+    return ast.literal_eval(text)
+
+def repair_llm_response(text:str)->LLMResponse:
+    '''Recover an action from a near-miss response locally instead of spending another LLM call.
+
+    Tags are normalized (<action_name>, <ActionName>, ...), unclosed tags get closed before the next one
+    and Action-Input is re-parsed leniently, a JSON response is repaired with `repair_literal`.
+    '''
+    stripped=re.sub(r"^```[a-z]*|```$","",text.strip()).strip()
+    if stripped.startswith('{') and not TAG_PATTERN.search(stripped):
+        return extract_structured_response(repair_literal(stripped))
+    parts,stack,position=[],[],0
+    for match in TAG_PATTERN.finditer(stripped):
+        parts.append(stripped[position:match.start()])
+        position=match.end()
+        tag=TAG_NAMES[re.sub(r"[\s_-]","",match.group(2).lower())]
+        if match.group(1):
+            if tag not in stack:
+                continue
+            while stack[-1]!=tag:
+                parts.append(f"</{stack.pop()}>")
+            parts.append(f"</{stack.pop()}>")
+            continue
+        # A leaf holds no other tag and an open tag does not contain itself, so both get closed first
+        if stack and stack[-1] in LEAF_TAGS:
+            parts.append(f"</{stack.pop()}>")
+        if tag in stack:
+            while stack[-1]!=tag:
+                parts.append(f"</{stack.pop()}>")
+            parts.append(f"</{stack.pop()}>")
+        stack.append(tag)
+        parts.append(f"<{tag}>")
+    parts.append(stripped[position:])
+    parts.extend(f"</{tag}>" for tag in reversed(stack))
+    repaired=''.join(parts)
+    repaired=re.sub(r"<Action-Input>(.*?)</Action-Input>",lambda match:f"<Action-Input>{json.dumps(repair_literal(match.group(1)),ensure_ascii=False)}</Action-Input>",repaired,flags=re.DOTALL)
+    return extract_llm_response(repaired)
+
+
+class ActionStreamParser:
+    '''Parse a streamed response incrementally, reporting each action as soon as its tags are closed'''
+    action_name_pattern=re.compile(r"<Action-Name>(.*?)<\/Action-Name>", re.DOTALL)
+    action_input_pattern=re.compile(r"<Action-Input>(.*?)<\/Action-Input>", re.DOTALL)
+
+    def __init__(self):
+        self.text=''
+        self.action_names:list[str]=[]
+        self.actions:list[ActionCall]=[]
+        self.name_offset=0
+        self.input_offset=0
+
+    def feed(self,delta:str)->tuple[list[str],list[ActionCall]]:
+        '''Add a delta, returns the action names and the actions completed by it'''
+        self.text+=delta
+        names,actions=[],[]
+        for match in self.action_name_pattern.finditer(self.text,self.name_offset):
+            names.append(match.group(1).strip())
+            self.name_offset=match.end()
+        self.action_names.extend(names)
+        for match in self.action_input_pattern.finditer(self.text,self.input_offset):
+            self.input_offset=match.end()
+            index=len(self.actions)
+            try:
+                action_input=parse_action_input(match.group(1).strip())
+            except Exception:
+                # Left to the final parse of the whole response
+                action_input=None
+            action_name=self.action_names[index] if index<len(self.action_names) else ''
+            action=ActionCall(action_name=action_name,action_input=action_input)
+            self.actions.append(action)
+            if action_name and isinstance(action_input,dict):
+                actions.append(action)
+        return names,actions
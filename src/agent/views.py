@@ -1,13 +1,37 @@
+from pydantic import BaseModel,Field
 from typing import TypedDict,Any
 from dataclasses import dataclass
 
+class ActionCall(TypedDict):
+    action_name:str
+    action_input:dict[str,Any]
+
 class LLMResponse(TypedDict):
     thought:str
     action_name:str
     action_input:dict[str,Any]={}
+    actions:list[ActionCall]
 
 @dataclass
 class AgentResponse:
     is_success:bool=False
     response:str=''
-    error:str=''
\ No newline at end of file
+    error:str=''
+
+
+class Action(BaseModel):
+    action_name:str=Field(description="Name of the tool to use")
+    action_input:dict[str,Any]=Field(default_factory=dict,description="Arguments of the tool")
+
+class AgentOutput(BaseModel):
+    '''Schema the LLM fills in when the agent runs in structured action mode'''
+    thought:str=Field(description="Next logical step to be done")
+    actions:list[Action]=Field(description="Actions to execute in this step")
+
+@dataclass
+class ParseStats:
+    '''How many LLM calls an action mode needed, to compare the modes'''
+    mode:str='xml'
+    llm_calls:int=0
+    retries:int=0
+    repairs:int=0
\ No newline at end of file
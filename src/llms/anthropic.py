@@ -1,15 +1,16 @@
 from anthropic.types import Message,MessageParam,ImageBlockParam,Base64ImageSourceParam,TextBlockParam,CacheControlEphemeralParam
 from src.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ImageMessage
 from src.llms.views import ChatLLMResponse, ChatLLMUsage
-from anthropic import Anthropic,AsyncAnthropic
-from src.llms.base import BaseChatLLM
+from anthropic import Anthropic,AsyncAnthropic,DefaultHttpxClient,DefaultAsyncHttpxClient
+from src.llms.base import BaseChatLLM, DEFAULT_LIMITS
+from typing import AsyncIterator
 from dataclasses import dataclass
 from pydantic import BaseModel
-from httpx import Client
+from httpx import Client, AsyncClient, Limits
 
 @dataclass
 class ChatAnthropic(BaseChatLLM):
-    def __init__(self, model: str, api_key: str, temperature: float = 0.7, max_tokens: int = 8192, auth_token: str | None = None, base_url: str | None = None, timeout: float | None = None, max_retries: int = 3, default_headers: dict[str, str] | None = None, default_query: dict[str, object] | None = None, http_client: Client | None = None, strict_response_validation: bool = False):
+    def __init__(self, model: str, api_key: str, temperature: float = 0.7, max_tokens: int = 8192, auth_token: str | None = None, base_url: str | None = None, timeout: float | None = None, max_retries: int = 3, default_headers: dict[str, str] | None = None, default_query: dict[str, object] | None = None, http_client: Client | None = None, async_http_client: AsyncClient | None = None, limits: Limits = DEFAULT_LIMITS, strict_response_validation: bool = False):
         self.model = model
         self.api_key = api_key
         self.auth_token = auth_token
@@ -21,11 +22,17 @@ class ChatAnthropic(BaseChatLLM):
         self.default_headers = default_headers
         self.default_query = default_query
         self.http_client = http_client
+        self.async_http_client = async_http_client
+        self.limits = limits
         self.strict_response_validation = strict_response_validation
+        self._client: Anthropic | None = None
+        self._async_client: AsyncAnthropic | None = None
 
     @property
     def client(self):
-        return Anthropic(**{
+        if self._client is not None:
+            return self._client
+        self._client = Anthropic(**{
             "api_key": self.api_key,
             "auth_token": self.auth_token,
             "base_url": self.base_url,
@@ -33,13 +40,16 @@ class ChatAnthropic(BaseChatLLM):
             "max_retries": self.max_retries,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
-            "http_client": self.http_client,
+            "http_client": self.http_client or DefaultHttpxClient(limits=self.limits),
             "_strict_response_validation": self.strict_response_validation
         })
+        return self._client
     
     @property
     def async_client(self):
-        return AsyncAnthropic(**{
+        if self._async_client is not None:
+            return self._async_client
+        self._async_client = AsyncAnthropic(**{
             "api_key": self.api_key,
             "auth_token": self.auth_token,
             "base_url": self.base_url,
@@ -47,9 +57,18 @@ class ChatAnthropic(BaseChatLLM):
             "max_retries": self.max_retries,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
-            "http_client": self.http_client,
+            "http_client": self.async_http_client or DefaultAsyncHttpxClient(limits=self.limits),
             "_strict_response_validation": self.strict_response_validation
         })
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
 
     @property
     def provider(self):
@@ -68,15 +87,9 @@ class ChatAnthropic(BaseChatLLM):
                     type="text",text=message.content,
                     cache_control=CacheControlEphemeralParam(type="ephemeral",ttl='5m')
                 )]
-            elif isinstance(message, HumanMessage):
-                content=[TextBlockParam(type="text",text=message.content)]
-                serialized.append(MessageParam(role="user",content=content))
-            elif isinstance(message, AIMessage):
-                content=[TextBlockParam(type="text",text=message.content)]
-                serialized.append(MessageParam(role="assistant",content=content))
             elif isinstance(message, ImageMessage):
-                message.scale_images(scale=0.7)
-                images=[f"data:{message.mime_type};base64,{image}" for image in message.convert_images("base64")]
+                # Checked before HumanMessage, its base class
+                images=message.image_base64()
                 content=[
                     TextBlockParam(type="text",text=message.content),
                     *[ImageBlockParam(type="image",source=Base64ImageSourceParam(
@@ -84,6 +97,12 @@ class ChatAnthropic(BaseChatLLM):
                     )) for image in images]
                 ]
                 serialized.append(MessageParam(role="user",content=content))
+            elif isinstance(message, HumanMessage):
+                content=[TextBlockParam(type="text",text=message.content)]
+                serialized.append(MessageParam(role="user",content=content))
+            elif isinstance(message, AIMessage):
+                content=[TextBlockParam(type="text",text=message.content)]
+                serialized.append(MessageParam(role="assistant",content=content))
             else:
                 raise ValueError(f"Unsupported message type: {type(message)}")
         return system_instruction,serialized
@@ -107,29 +126,48 @@ class ChatAnthropic(BaseChatLLM):
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage.input_tokens,
                 completion_tokens=completion.usage.output_tokens,
-                total_tokens=completion.usage.input_tokens+completion.usage.output_tokens
+                total_tokens=completion.usage.input_tokens+completion.usage.output_tokens,
+                cached_tokens=completion.usage.cache_read_input_tokens
             )
         )
 
     async def ainvoke(self, messages: list[BaseMessage], structured_output:BaseModel|None = None):
-        system_instruction, messages = self.serialize_messages(messages)
-        completion = await self.async_client.messages.create(
-            max_tokens=self.max_tokens,
-            model=self.model,
-            system=system_instruction,
-            messages=messages,
-            temperature=self.temperature,
-        )
+        system_instruction, serialized_messages = self.serialize_messages(messages)
+        async with self.limiter.acquire(messages) as slot:
+            completion = await self.async_client.messages.create(
+                max_tokens=self.max_tokens,
+                model=self.model,
+                system=system_instruction,
+                messages=serialized_messages,
+                temperature=self.temperature,
+            )
 
         if not isinstance(completion,Message):
             raise ValueError("Unexpected response type from Anthropic API")
         text_block = completion.content[0]
         content=text_block.text
-        return ChatLLMResponse(
+        response = ChatLLMResponse(
             content=content,
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage.input_tokens,
                 completion_tokens=completion.usage.output_tokens,
-                total_tokens=completion.usage.input_tokens+completion.usage.output_tokens
+                total_tokens=completion.usage.input_tokens+completion.usage.output_tokens,
+                cached_tokens=completion.usage.cache_read_input_tokens
             )
-        )
\ No newline at end of file
+        )
+        slot.record(response.usage)
+        return response
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        system_instruction, serialized_messages = self.serialize_messages(messages)
+        async with self.limiter.acquire(messages, stream=True) as slot:
+            async with self.async_client.messages.stream(
+                max_tokens=self.max_tokens,
+                model=self.model,
+                system=system_instruction,
+                messages=serialized_messages,
+                temperature=self.temperature,
+            ) as stream:
+                async for text in stream.text_stream:
+                    slot.add_output(text)
+                    yield text
@@ -1,7 +1,25 @@
-from typing import Protocol,runtime_checkable,overload
+from typing import Protocol,AsyncIterator,runtime_checkable,overload
+from src.llms.limiter import RateLimiter,get_limiter
 from src.llms.views import ChatLLMResponse
 from src.messages import BaseMessage
-from pydantic import BaseModel
+from pydantic import BaseModel,ValidationError
+from httpx import Limits
+
+# Connection pool shared by every call of an adapter, reused across agent steps
+DEFAULT_LIMITS=Limits(max_connections=100,max_keepalive_connections=20,keepalive_expiry=30.0)
+
+class StructuredOutputError(ValueError):
+    '''The structured output of the provider does not match the schema, `raw` keeps the text for a local repair'''
+    def __init__(self, raw: str, error: Exception):
+        self.raw = raw
+        super().__init__(f"Structured output does not match the schema: {error}")
+
+def validate_structured_output(structured_output: BaseModel, raw: str) -> BaseModel:
+    '''Validate the JSON text of a structured response against the schema'''
+    try:
+        return structured_output.model_validate_json(raw)
+    except ValidationError as e:
+        raise StructuredOutputError(raw, e) from e
 
 @runtime_checkable
 class BaseChatLLM(Protocol):
@@ -14,6 +32,11 @@ class BaseChatLLM(Protocol):
     def provider(self) -> str:
         ...
 
+    @property
+    def limiter(self) -> RateLimiter:
+        # Shared by every instance of the same provider and model, configure it with set_limiter
+        return get_limiter(self.provider,self.model_name)
+
     @overload
     def invoke(self, messages: list[BaseMessage],structured_output:BaseModel|None=None) -> ChatLLMResponse:
         ...
@@ -22,5 +45,11 @@ class BaseChatLLM(Protocol):
     async def ainvoke(self, messages: list[BaseMessage],structured_output:BaseModel|None=None) -> ChatLLMResponse:
         ...
 
+    def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
 
     
\ No newline at end of file
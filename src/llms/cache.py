@@ -0,0 +1,158 @@
+from src.messages import BaseMessage, ImageMessage
+from src.llms.views import ChatLLMResponse
+from src.llms.base import BaseChatLLM
+from typing import AsyncIterator, Callable
+from pydantic import BaseModel
+from pathlib import Path
+import threading
+import tempfile
+import hashlib
+import sqlite3
+import asyncio
+import json
+import time
+import re
+
+# The agent's prompts carry the current date and time, e.g. "Today is 2025-01-31 12:00:00"
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?')
+# Whitespace delimited pieces that a cached response is replayed in by `astream`
+REPLAY_PATTERN = re.compile(r'\s*\S+\s*|\s+')
+
+def strip_timestamps(content: str) -> str:
+    return TIMESTAMP_PATTERN.sub('<timestamp>', content)
+
+class CachedChatLLM(BaseChatLLM):
+    '''Wraps any chat LLM with an on-disk response cache.
+
+    Responses are keyed on the provider, model, temperature, messages (images by digest)
+    and structured output schema, stored in SQLite and evicted least recently used first
+    once the stored responses exceed `max_size` bytes.
+
+    Message content goes through `normalize` before it is hashed, by default timestamps are
+    masked so the agent's "Today is ..." lines do not turn every replay into a miss. Pass a
+    function of your own for other volatile fields, or None to hash the content as is.
+
+    The one SQLite connection is shared by sync calls, worker threads and every event loop,
+    so each read and write holds a thread lock rather than a lock bound to one loop.
+    '''
+    def __init__(self, llm: BaseChatLLM, path: str | Path | None = None, max_size: int = 100 * 1024 * 1024, normalize: Callable[[str], str] | None = strip_timestamps):
+        self.llm = llm
+        self.normalize = normalize
+        self.path = Path(path) if path else Path(tempfile.gettempdir()) / 'mcp-agent-llm-cache.sqlite'
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self.connection.commit()
+        self.lock = threading.Lock()
+
+    @property
+    def provider(self):
+        return self.llm.provider
+
+    @property
+    def model_name(self):
+        return self.llm.model_name
+
+    @property
+    def limiter(self):
+        return self.llm.limiter
+
+    def cache_key(self, messages: list[BaseMessage], structured_output: BaseModel | None = None) -> str:
+        serialized = []
+        for message in messages:
+            content = self.normalize(message.content) if self.normalize else message.content
+            item = {'type': type(message).__name__, 'content': content}
+            if isinstance(message, ImageMessage):
+                item['images'] = [hashlib.sha256(image).hexdigest() for image in message.image_bytes()]
+            serialized.append(item)
+        payload = {
+            'provider': self.provider,
+            'model': self.model_name,
+            'temperature': getattr(self.llm, 'temperature', None),
+            'messages': serialized,
+            'schema': structured_output.model_json_schema() if structured_output else None
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            row = self.connection.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute('UPDATE responses SET accessed = ? WHERE key = ?', (time.time(), key))
+            self.connection.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO responses (key, response, size, accessed) VALUES (?, ?, ?, ?)', (key, response, len(response.encode('utf-8')), time.time()))
+            total, = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()
+            if total > self.max_size:
+                # Drop the least recently used responses until the cache fits again
+                excess = total - self.max_size
+                for old_key, size in self.connection.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+                    if excess <= 0:
+                        break
+                    self.connection.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                    excess -= size
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM responses')
+            self.connection.commit()
+
+    def dump_response(self, response: ChatLLMResponse) -> str:
+        data = response.model_dump(mode='json')
+        if isinstance(response.content, BaseModel):
+            data['content'] = response.content.model_dump(mode='json')
+        return json.dumps(data, ensure_ascii=False)
+
+    def load_response(self, data: str, structured_output: BaseModel | None = None) -> ChatLLMResponse:
+        response = json.loads(data)
+        if structured_output:
+            response['content'] = structured_output.model_validate(response['content'])
+        return ChatLLMResponse.model_validate(response)
+
+    def invoke(self, messages: list[BaseMessage], structured_output: BaseModel | None = None) -> ChatLLMResponse:
+        key = self.cache_key(messages, structured_output)
+        if (data := self.get(key)) is not None:
+            return self.load_response(data, structured_output)
+        response = self.llm.invoke(messages, structured_output=structured_output)
+        self.put(key, self.dump_response(response))
+        return response
+
+    async def ainvoke(self, messages: list[BaseMessage], structured_output: BaseModel | None = None) -> ChatLLMResponse:
+        key = await asyncio.to_thread(self.cache_key, messages, structured_output)
+        data = await asyncio.to_thread(self.get, key)
+        if data is not None:
+            return self.load_response(data, structured_output)
+        response = await self.llm.ainvoke(messages, structured_output=structured_output)
+        await asyncio.to_thread(self.put, key, self.dump_response(response))
+        return response
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        key = await asyncio.to_thread(self.cache_key, messages)
+        data = await asyncio.to_thread(self.get, key)
+        if data is not None:
+            # A replay is chunked at whitespace, so stream consumers such as early action
+            # dispatch see deltas as they would from the provider, only without the latency
+            for chunk in REPLAY_PATTERN.findall(self.load_response(data).content):
+                yield chunk
+                await asyncio.sleep(0)
+            return
+        deltas = []
+        async for delta in self.llm.astream(messages):
+            deltas.append(delta)
+            yield delta
+        await asyncio.to_thread(self.put, key, self.dump_response(ChatLLMResponse(content=''.join(deltas))))
+
+    async def aclose(self) -> None:
+        await self.llm.aclose()
+        with self.lock:
+            self.connection.close()
\ No newline at end of file
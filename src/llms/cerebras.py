@@ -2,15 +2,16 @@ from cerebras.cloud.sdk.types.chat.completion_create_params import MessageSystem
 from cerebras.cloud.sdk.types.chat.completion_create_params import ResponseFormatResponseFormatJsonSchemaJsonSchemaTyped,ResponseFormatResponseFormatJsonSchemaTyped
 from src.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ImageMessage
 from src.llms.views import ChatLLMResponse, ChatLLMUsage
-from cerebras.cloud.sdk import Cerebras, AsyncCerebras
-from src.llms.base import BaseChatLLM
+from cerebras.cloud.sdk import Cerebras, AsyncCerebras, DefaultHttpxClient, DefaultAsyncHttpxClient
+from src.llms.base import BaseChatLLM, DEFAULT_LIMITS, validate_structured_output
+from typing import AsyncIterator
 from dataclasses import dataclass
 from pydantic import BaseModel
-from httpx import Client
+from httpx import Client, AsyncClient, Limits
 
 @dataclass
 class ChatCerebras(BaseChatLLM):
-    def __init__(self, model: str, api_key: str, temperature: float = 0.7,  base_url: str | None = None, timeout: float | None = None, max_retries: int = 3, default_headers: dict[str, str] | None = None, default_query: dict[str, object] | None = None, http_client: Client | None = None, strict_response_validation: bool = False, warm_tcp_connection: bool = True):
+    def __init__(self, model: str, api_key: str, temperature: float = 0.7,  base_url: str | None = None, timeout: float | None = None, max_retries: int = 3, default_headers: dict[str, str] | None = None, default_query: dict[str, object] | None = None, http_client: Client | None = None, async_http_client: AsyncClient | None = None, limits: Limits = DEFAULT_LIMITS, strict_response_validation: bool = False, warm_tcp_connection: bool = True):
         self.model = model
         self.api_key = api_key
         self.temperature = temperature
@@ -20,36 +21,54 @@ class ChatCerebras(BaseChatLLM):
         self.default_headers = default_headers
         self.default_query = default_query
         self.http_client = http_client
+        self.async_http_client = async_http_client
+        self.limits = limits
         self.strict_response_validation = strict_response_validation
         self.warm_tcp_connection = warm_tcp_connection
+        self._client: Cerebras | None = None
+        self._async_client: AsyncCerebras | None = None
 
     @property
     def client(self) -> Cerebras:
-        return Cerebras(**{
+        if self._client is not None:
+            return self._client
+        self._client = Cerebras(**{
             "api_key": self.api_key,
             "base_url": self.base_url,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
-            "http_client": self.http_client,
+            "http_client": self.http_client or DefaultHttpxClient(limits=self.limits),
             "_strict_response_validation": self.strict_response_validation,
             "warm_tcp_connection": self.warm_tcp_connection
         })
+        return self._client
     
     @property
     def async_client(self) -> AsyncCerebras:
-        return AsyncCerebras(**{
+        if self._async_client is not None:
+            return self._async_client
+        self._async_client = AsyncCerebras(**{
             "api_key": self.api_key,
             "base_url": self.base_url,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
-            "http_client": self.http_client,
+            "http_client": self.async_http_client or DefaultAsyncHttpxClient(limits=self.limits),
             "_strict_response_validation": self.strict_response_validation,
             "warm_tcp_connection": self.warm_tcp_connection
         })
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
 
     @property
     def provider(self) -> str:
@@ -65,14 +84,16 @@ class ChatCerebras(BaseChatLLM):
             if isinstance(message, SystemMessage):
                 content = [MessageSystemMessageRequestContentUnionMember1Typed(type="text",text=message.content)]
                 serialized.append(MessageSystemMessageRequestTyped(role="system",content=content))
+            elif isinstance(message, ImageMessage):
+                # Checked before HumanMessage, its base class. Cerebras models take no images, so only the text is sent
+                content = [MessageUserMessageRequestContentUnionMember1Typed(type="text",text=message.content)]
+                serialized.append(MessageUserMessageRequestTyped(role="user",content=content))
             elif isinstance(message, HumanMessage):
                 content = [MessageUserMessageRequestContentUnionMember1Typed(type="text",text=message.content)]
                 serialized.append(MessageUserMessageRequestTyped(role="user",content=content))
             elif isinstance(message, AIMessage):
                 content = [MessageAssistantMessageRequestContentUnionMember1Typed(type="text",text=message.content)]
                 serialized.append(MessageAssistantMessageRequestTyped(role="assistant",content=content))
-            elif isinstance(message, ImageMessage):
-                pass
             else:
                 raise ValueError(f"Unsupported message type: {type(message)}")
         return serialized
@@ -92,7 +113,7 @@ class ChatCerebras(BaseChatLLM):
             ) if structured_output else None
         )
         if structured_output:
-            content=structured_output.model_validate_json(completion.choices[0].message.content)
+            content=validate_structured_output(structured_output, completion.choices[0].message.content)
         else:
             content=completion.choices[0].message.content
         return ChatLLMResponse(
@@ -100,32 +121,50 @@ class ChatCerebras(BaseChatLLM):
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage.prompt_tokens,
                 completion_tokens=completion.usage.completion_tokens,
-                total_tokens=completion.usage.total_tokens
+                total_tokens=completion.usage.total_tokens,
+                cached_tokens=completion.usage.prompt_tokens_details.cached_tokens if completion.usage.prompt_tokens_details else None
             )
         )
     
     async def ainvoke(self, messages: list[BaseMessage],structured_output:BaseModel|None=None) -> str:
-        completion=await self.async_client.chat.completions.create(
-            model=self.model,
-            messages=self.serialize_messages(messages),
-            temperature=self.temperature,
-            response_format=ResponseFormatResponseFormatJsonSchemaTyped(
-                json_schema=ResponseFormatResponseFormatJsonSchemaJsonSchemaTyped(
-                    name=structured_output.__class__.__name__,
-                    description="Model output structured as JSON schema",
-                    schema=structured_output.model_json_schema()
-                ),
-                type="json_schema"
-            ) if structured_output else None
-        )
+        async with self.limiter.acquire(messages) as slot:
+            completion=await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=self.serialize_messages(messages),
+                temperature=self.temperature,
+                response_format=ResponseFormatResponseFormatJsonSchemaTyped(
+                    json_schema=ResponseFormatResponseFormatJsonSchemaJsonSchemaTyped(
+                        name=structured_output.__class__.__name__,
+                        description="Model output structured as JSON schema",
+                        schema=structured_output.model_json_schema()
+                    ),
+                    type="json_schema"
+                ) if structured_output else None
+            )
         if structured_output:
-            content=structured_output.model_validate_json(completion.choices[0].message.content)
+            content=validate_structured_output(structured_output, completion.choices[0].message.content)
         else:
             content=completion.choices[0].message.content
-        return ChatLLMResponse(
+        response=ChatLLMResponse(
             content=content,
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage.prompt_tokens,
                 completion_tokens=completion.usage.completion_tokens,
-                total_tokens=completion.usage.total_tokens
-            ))
\ No newline at end of file
+                total_tokens=completion.usage.total_tokens,
+                cached_tokens=completion.usage.prompt_tokens_details.cached_tokens if completion.usage.prompt_tokens_details else None
+            ))
+        slot.record(response.usage)
+        return response
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        async with self.limiter.acquire(messages, stream=True) as slot:
+            stream=await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=self.serialize_messages(messages),
+                temperature=self.temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    slot.add_output(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
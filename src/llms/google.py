@@ -1,36 +1,19 @@
 from src.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ImageMessage
+from src.llms.base import BaseChatLLM, DEFAULT_LIMITS, validate_structured_output
 from google.genai.types import Part, Content, GenerateContentConfigDict,Modality
 from src.llms.views import ChatLLMResponse, ChatLLMUsage
 from google.genai.client import Client,DebugConfig
 from google.auth.credentials import Credentials
-from src.llms.base import BaseChatLLM
+from typing import AsyncIterator
 from dataclasses import dataclass
 from google.genai import types
 from pydantic import BaseModel
-import asyncio
-
-def run_async(coro):
-    """
-    Run an async coroutine in both Jupyter notebooks and normal Python scripts.
-    Returns the *actual result*, not a Task.
-    """
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
-
-    if loop and loop.is_running():
-        # Running inside Jupyter — patch and run safely
-        import nest_asyncio
-        nest_asyncio.apply()
-        return asyncio.get_event_loop().run_until_complete(coro)
-    else:
-        # Running in normal Python script
-        return asyncio.run(coro)
+from httpx import Limits
+import httpx
 
 @dataclass
 class ChatGoogle(BaseChatLLM):
-    def __init__(self, model: str, api_key: str, vertexai: bool|None=None, project: str|None=None, location: str|None=None, credentials: Credentials|None=None,http_options: types.HttpOptions | types.HttpOptionsDict | None = None, debug_config: DebugConfig | None = None, temperature: float = 0.7):
+    def __init__(self, model: str, api_key: str, vertexai: bool|None=None, project: str|None=None, location: str|None=None, credentials: Credentials|None=None,http_options: types.HttpOptions | types.HttpOptionsDict | None = None, debug_config: DebugConfig | None = None, temperature: float = 0.7, limits: Limits = DEFAULT_LIMITS):
         self.model = model
         self.api_key = api_key
         self.vertexai = vertexai
@@ -40,7 +23,9 @@ class ChatGoogle(BaseChatLLM):
         self.location = location
         self.http_options = http_options
         self.debug_config = debug_config
-        
+        self.limits = limits
+        self._client: Client | None = None
+
     @property
     def provider(self) -> str:
         return "google"
@@ -51,27 +36,34 @@ class ChatGoogle(BaseChatLLM):
     
     @property
     def client(self) -> Client:
-        return Client(**{
+        if self._client is not None:
+            return self._client
+        http_options = types.HttpOptions.model_validate(self.http_options or {}).model_copy()
+        # Pooled httpx clients sized by limits, unless the caller configured their own
+        if http_options.httpx_client is None and http_options.client_args is None:
+            http_options.httpx_client = httpx.Client(limits=self.limits)
+        if http_options.httpx_async_client is None and http_options.async_client_args is None:
+            http_options.httpx_async_client = httpx.AsyncClient(limits=self.limits)
+        self._client = Client(**{
             "api_key": self.api_key,
             "vertexai": self.vertexai,
             "project": self.project,
             "location": self.location,
             "credentials": self.credentials,
-            "http_options": self.http_options,
+            "http_options": http_options,
             "debug_config": self.debug_config
         })
+        return self._client
     
     @property
     def async_client(self) -> Client:
-        return Client(**{
-            "api_key": self.api_key,
-            "vertexai": self.vertexai,
-            "project": self.project,
-            "location": self.location,
-            "credentials": self.credentials,
-            "http_options": self.http_options,
-            "debug_config": self.debug_config
-        })
+        return self.client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aio.aclose()
+            self._client.close()
+            self._client = None
     
     def serialize_messages(self, messages: list[BaseMessage])-> tuple[str|None,list[dict]]:
         serialized = []
@@ -79,19 +71,19 @@ class ChatGoogle(BaseChatLLM):
         for message in messages:
             if isinstance(message, SystemMessage):
                 system_instruction = message.content
-            elif isinstance(message, HumanMessage):
-                serialized.append(Content(role="user",parts=[Part(text=message.content)]))
-            elif isinstance(message, AIMessage):
-                serialized.append(Content(role="model",parts=[Part(text=message.content)]))
             elif isinstance(message, ImageMessage):
-                message.scale_images(scale=0.7)
-                images=message.convert_images("bytes")
+                # Checked before HumanMessage, its base class
+                images=message.image_bytes()
                 serialized.append(
                     Content(role="user",parts=[
                         Part(text=message.content),
                         *[Part.from_bytes(data=image,mime_type=message.mime_type) for image in images]
                     ])
                 )
+            elif isinstance(message, HumanMessage):
+                serialized.append(Content(role="user",parts=[Part(text=message.content)]))
+            elif isinstance(message, AIMessage):
+                serialized.append(Content(role="model",parts=[Part(text=message.content)]))
             else:
                 raise ValueError(f"Unsupported message type: {type(message)}")
         return system_instruction, serialized
@@ -105,13 +97,13 @@ class ChatGoogle(BaseChatLLM):
             "response_modalities": [Modality.TEXT],
             "response_json_schema":structured_output.model_json_schema() if structured_output else None
         }
-        completion =run_async(self.client.aio.models.generate_content(
+        completion =self.client.models.generate_content(
             model=self.model,
             config=config,
             contents=contents
-            ))
+            )
         if structured_output:
-            content=structured_output.model_validate(completion.parsed)
+            content=validate_structured_output(structured_output, completion.text or '')
         else:
             content=completion.text
         return ChatLLMResponse(
@@ -119,7 +111,8 @@ class ChatGoogle(BaseChatLLM):
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage_metadata.prompt_token_count or 0,
                 completion_tokens=completion.usage_metadata.candidates_token_count or 0,
-                total_tokens=completion.usage_metadata.total_token_count or 0
+                total_tokens=completion.usage_metadata.total_token_count or 0,
+                cached_tokens=completion.usage_metadata.cached_content_token_count
             )
         )
     
@@ -132,22 +125,43 @@ class ChatGoogle(BaseChatLLM):
             "response_modalities": [Modality.TEXT],
             "response_json_schema":structured_output.model_json_schema() if structured_output else None
         }
-        completion =await self.async_client.aio.models.generate_content(
-            model=self.model,
-            config=config,
-            contents=contents
-            )
+        async with self.limiter.acquire(messages) as slot:
+            completion =await self.async_client.aio.models.generate_content(
+                model=self.model,
+                config=config,
+                contents=contents
+                )
         if structured_output:
-            content=structured_output.model_validate(completion.parsed)
+            content=validate_structured_output(structured_output, completion.text or '')
         else:
             content=completion.text
-        return ChatLLMResponse(
+        response=ChatLLMResponse(
             content=content,
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage_metadata.prompt_token_count or 0,
                 completion_tokens=completion.usage_metadata.candidates_token_count or 0,
-                total_tokens=completion.usage_metadata.total_token_count or 0
+                total_tokens=completion.usage_metadata.total_token_count or 0,
+                cached_tokens=completion.usage_metadata.cached_content_token_count
             )
         )
-        
+        slot.record(response.usage)
+        return response
 
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        system_instruction, contents = self.serialize_messages(messages)
+        config: GenerateContentConfigDict = {
+            "temperature": self.temperature,
+            "system_instruction":system_instruction,
+            "response_mime_type": "text/plain",
+            "response_modalities": [Modality.TEXT],
+        }
+        async with self.limiter.acquire(messages, stream=True) as slot:
+            stream=await self.async_client.aio.models.generate_content_stream(
+                model=self.model,
+                config=config,
+                contents=contents
+                )
+            async for chunk in stream:
+                if chunk.text:
+                    slot.add_output(chunk.text)
+                    yield chunk.text
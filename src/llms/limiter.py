@@ -0,0 +1,228 @@
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from src.messages import BaseMessage, estimate_tokens
+from src.llms.views import ChatLLMUsage
+from typing import AsyncIterator
+from datetime import datetime
+import asyncio
+import weakref
+import random
+import time
+
+class TokenBucket:
+    '''Refills `rate` units per minute up to one minute's worth, an unset rate never blocks'''
+    def __init__(self, rate: float | None = None):
+        self.rate = rate
+        self.tokens = rate or 0.0
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.rate:
+            return 0.0
+        self.refill()
+        # A request bigger than the bucket only waits for a full bucket
+        amount = min(amount, self.rate)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) * 60 / self.rate
+
+    def take(self, amount: float):
+        if self.rate:
+            self.tokens -= amount
+
+class LimiterSlot:
+    def __init__(self, limiter: 'RateLimiter', tokens: int, stream: bool = False):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.stream = stream
+        self.start: float | None = None
+        self.elapsed: float | None = None
+        self.first_output: float | None = None
+        self.output_chars = 0
+
+    def add_output(self, text: str):
+        '''Count a streamed delta, streams report no usage so their output is estimated'''
+        if self.first_output is None:
+            self.first_output = time.monotonic()
+        self.output_chars += len(text)
+
+    def charge(self, total_tokens: int):
+        self.limiter.tpm.take(total_tokens - self.tokens)
+        self.tokens = total_tokens
+
+    def record(self, usage: ChatLLMUsage | None):
+        '''Charge the bucket with what the request actually used instead of the estimate.
+
+        The latency signal is the call's time per completion token, so long answers are not
+        mistaken for an overloaded provider. Without usage only the additive increase applies.
+        '''
+        if usage is not None:
+            self.charge(usage.total_tokens)
+        if self.elapsed is None:
+            return
+        if usage is not None and usage.completion_tokens:
+            self.limiter.on_success(self.elapsed / usage.completion_tokens, 'completion')
+        else:
+            self.limiter.on_success()
+
+class LoopState:
+    '''The asyncio primitives of a limiter, which bind to the event loop they are first used on'''
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.condition = asyncio.Condition()
+        self.active = 0
+
+class RateLimiter:
+    '''Requests-per-minute and tokens-per-minute buckets with AIMD concurrency.
+
+    Concurrency grows by about one per window of successful calls and is halved on a 429,
+    which also pauses every caller for the Retry-After of the response. When the smoothed
+    latency drifts past `latency_tolerance` times the best seen, concurrency is eased down.
+    Latency is time to first token for streams and time per completion token otherwise.
+
+    The buckets and the concurrency window are shared, the locks and the count of active
+    calls are kept per event loop, so a limiter is safe to reuse across `asyncio.run` calls.
+    '''
+    def __init__(self, rpm: float | None = None, tpm: float | None = None, initial_concurrency: int = 8, min_concurrency: int = 1, max_concurrency: int = 64, latency_tolerance: float = 2.0, default_retry_after: float = 1.0):
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.concurrency = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_tolerance = latency_tolerance
+        self.default_retry_after = default_retry_after
+        self.blocked_until = 0.0
+        self.latency: dict[str, float] = {}
+        self.best_latency: dict[str, float] = {}
+        self.rate_limited = 0
+        self.loops: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LoopState] = weakref.WeakKeyDictionary()
+
+    @property
+    def state(self) -> LoopState:
+        loop = asyncio.get_running_loop()
+        if loop not in self.loops:
+            self.loops[loop] = LoopState()
+        return self.loops[loop]
+
+    @property
+    def active(self) -> int:
+        return sum(state.active for state in list(self.loops.values()))
+
+    async def wait_slot(self):
+        state = self.state
+        async with state.condition:
+            await state.condition.wait_for(lambda: state.active < max(int(self.concurrency), self.min_concurrency))
+            state.active += 1
+
+    async def wait_budget(self, tokens: int):
+        # The lock keeps callers in arrival order while one of them waits on the buckets
+        async with self.state.lock:
+            while (delay := max(self.blocked_until - time.monotonic(), self.rpm.wait_time(1), self.tpm.wait_time(tokens))) > 0:
+                await asyncio.sleep(delay)
+            self.rpm.take(1)
+            self.tpm.take(tokens)
+
+    async def release(self):
+        state = self.state
+        async with state.condition:
+            state.active -= 1
+            state.condition.notify_all()
+
+    def on_success(self, latency: float | None = None, kind: str = 'completion'):
+        # Time to first token and time per completion token are smoothed separately
+        if latency is not None:
+            smoothed = latency if kind not in self.latency else 0.8 * self.latency[kind] + 0.2 * latency
+            self.latency[kind] = smoothed
+            self.best_latency[kind] = min(self.best_latency.get(kind, smoothed), smoothed)
+        if latency is not None and self.latency[kind] > self.best_latency[kind] * self.latency_tolerance:
+            self.concurrency = max(self.min_concurrency, self.concurrency * 0.9)
+        else:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def on_rate_limited(self, error: Exception):
+        self.rate_limited += 1
+        self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+        delay = retry_after(error) or self.default_retry_after
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    @asynccontextmanager
+    async def acquire(self, messages: list[BaseMessage], stream: bool = False) -> AsyncIterator[LimiterSlot]:
+        '''Wait for a concurrency slot and budget, a non streamed call then reports usage with `slot.record`'''
+        slot = LimiterSlot(self, estimate_tokens(messages), stream)
+        await self.wait_slot()
+        try:
+            await self.wait_budget(slot.tokens)
+            slot.start = time.monotonic()
+            try:
+                yield slot
+            except Exception as e:
+                if is_rate_limited(e):
+                    self.on_rate_limited(e)
+                raise
+            finally:
+                if slot.stream and slot.output_chars:
+                    # Charge the streamed output, even of a stream the caller stopped early
+                    slot.charge(slot.tokens + slot.output_chars // 4)
+            slot.elapsed = time.monotonic() - slot.start
+            if slot.stream:
+                self.on_success(slot.first_output - slot.start if slot.first_output else None, 'first_token')
+        finally:
+            await self.release()
+
+LIMITERS: dict[tuple[str, str], RateLimiter] = {}
+
+def get_limiter(provider: str, model: str) -> RateLimiter:
+    '''The limiter shared by every adapter instance talking to the same provider and model'''
+    key = (provider, model)
+    if key not in LIMITERS:
+        LIMITERS[key] = RateLimiter()
+    return LIMITERS[key]
+
+def set_limiter(provider: str, model: str, **kwargs) -> RateLimiter:
+    '''Configure the quota of a provider and model, e.g. set_limiter("openai", "gpt-4o", rpm=500, tpm=30000)'''
+    LIMITERS[(provider, model)] = RateLimiter(**kwargs)
+    return LIMITERS[(provider, model)]
+
+def status_code(error: Exception) -> int | None:
+    # openai, anthropic, groq, cerebras, ollama and mistral expose status_code, google-genai exposes code
+    code = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return code if isinstance(code, int) else None
+
+def is_rate_limited(error: Exception) -> bool:
+    return status_code(error) == 429
+
+def is_retryable(error: Exception) -> bool:
+    code = status_code(error)
+    return code is not None and (code == 429 or code >= 500)
+
+def retry_after(error: Exception) -> float | None:
+    response = getattr(error, 'response', None) or getattr(error, 'raw_response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    if (value := headers.get('retry-after-ms')) is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if (value := headers.get('retry-after')) is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+        return max(0.0, (date - datetime.now(tz=date.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, error: Exception | None = None, base: float = 1.0, cap: float = 30.0) -> float:
+    '''Retry-After when the provider sent one, else exponential backoff with full jitter'''
+    if error is not None and (delay := retry_after(error)) is not None:
+        return min(delay, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
\ No newline at end of file
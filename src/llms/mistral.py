@@ -1,16 +1,18 @@
 from mistralai import HttpClient,AsyncHttpClient,RetryConfig,OptionalNullable, UserMessage, AssistantMessage, SystemMessage as MainMessage, TextChunk, ThinkChunk, ImageURL,ImageURLChunk, ResponseFormat, JSONSchema
 from src.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ImageMessage
+from src.llms.base import BaseChatLLM, DEFAULT_LIMITS, validate_structured_output
 from src.llms.views import ChatLLMResponse, ChatLLMUsage
-from src.llms.base import BaseChatLLM
-from typing import Union,Dict,Type
+from typing import Union,Dict,Type,AsyncIterator
 from dataclasses import dataclass
 from mistralai import Mistral
 from pydantic import BaseModel
+from httpx import Limits
 import logging
+import httpx
 
 @dataclass
 class ChatMistral(BaseChatLLM):
-    def __init__(self, model: str, api_key: str, max_tokens: int|None=None, temperature: float = 0.7, server: Union[str, None] = None, server_url: Union[str, None] = None, url_params: Dict[str, str] = None, client: Type[HttpClient] = None, async_client: Type[AsyncHttpClient] = None,retry_config: OptionalNullable[RetryConfig] = None,timeout_ms: Union[int, None] = None,debug_logger: Union[logging.Logger, None] = None):
+    def __init__(self, model: str, api_key: str, max_tokens: int|None=None, temperature: float = 0.7, server: Union[str, None] = None, server_url: Union[str, None] = None, url_params: Dict[str, str] = None, client: Type[HttpClient] = None, async_client: Type[AsyncHttpClient] = None,retry_config: OptionalNullable[RetryConfig] = None,timeout_ms: Union[int, None] = None,debug_logger: Union[logging.Logger, None] = None, limits: Limits = DEFAULT_LIMITS):
         self.model = model
         self.api_key = api_key
         self.temperature = temperature
@@ -18,25 +20,46 @@ class ChatMistral(BaseChatLLM):
         self.max_tokens = max_tokens
         self.server_url = server_url
         self.url_params = url_params
-        self._client = client
-        self.async_client = async_client
+        self.http_client = client
+        self.async_http_client = async_client
         self.retry_config = retry_config
         self.timeout_ms = timeout_ms
         self.debug_logger = debug_logger
+        self.limits = limits
+        self._client: Mistral | None = None
 
     @property
     def client(self) -> Mistral:
-        return Mistral(**{
+        if self._client is not None:
+            return self._client
+        # One sync and one async pool per adapter, shared by every call
+        self.http_client = self.http_client or httpx.Client(follow_redirects=True,limits=self.limits)
+        self.async_http_client = self.async_http_client or httpx.AsyncClient(follow_redirects=True,limits=self.limits)
+        self._client = Mistral(**{
             "api_key": self.api_key,
             "server": self.server,
             "server_url": self.server_url,
             "url_params": self.url_params,
-            "client": self._client,
-            "async_client": self.async_client,
+            "client": self.http_client,
+            "async_client": self.async_http_client,
             "retry_config": self.retry_config,
             "timeout_ms": self.timeout_ms,
             "debug_logger": self.debug_logger
         })
+        return self._client
+
+    @property
+    def async_client(self) -> Mistral:
+        return self.client
+
+    async def aclose(self) -> None:
+        if self._client is None:
+            return None
+        self.http_client.close()
+        await self.async_http_client.aclose()
+        self.http_client = None
+        self.async_http_client = None
+        self._client = None
 
     @property
     def provider(self) -> str:
@@ -52,20 +75,20 @@ class ChatMistral(BaseChatLLM):
             if isinstance(message, SystemMessage):
                 content=[TextChunk(text=message.content)]
                 serialized.append(MainMessage(content=content))
+            elif isinstance(message, ImageMessage):
+                # Checked before HumanMessage, its base class
+                images=message.image_data_urls()
+                content=[
+                    TextChunk(text=message.content),
+                    *[ImageURLChunk(type="image_url",image_url=ImageURL(url=image,detail="auto")) for image in images]
+                ]
+                serialized.append(UserMessage(role="user",content=content))
             elif isinstance(message, HumanMessage):
                 content=[TextChunk(text=message.content)]
                 serialized.append(UserMessage(content=content))
             elif isinstance(message, AIMessage):
                 content=[TextChunk(text=message.content)]
                 serialized.append(AssistantMessage(content=content))
-            elif isinstance(message, ImageMessage):
-                message.scale_images(scale=0.7)
-                images=[f"data:{message.mime_type};base64,{image}" for image in message.convert_images("base64")]
-                content=[
-                    TextChunk(text=message.content),
-                    *[ImageURLChunk(type="image_url",url=ImageURL(url=image,detail="auto")) for image in images]
-                ]
-                serialized.append(UserMessage(role="user",content=content))
             else:
                 raise ValueError(f"Unsupported message type: {type(message)}")
         return serialized
@@ -87,7 +110,7 @@ class ChatMistral(BaseChatLLM):
             ) if structured_output else None
         )
         if structured_output:
-            content=structured_output.model_validate_json(completion.choices[0].message.content)
+            content=validate_structured_output(structured_output, completion.choices[0].message.content)
             thinking=None
         else:
             thinking=None
@@ -116,6 +139,70 @@ class ChatMistral(BaseChatLLM):
         )
 
     async def ainvoke(self, messages: list[BaseMessage],structured_output:BaseModel|None=None) -> ChatLLMResponse:
-        pass
+        async with self.limiter.acquire(messages) as slot:
+            completion=await self.async_client.chat.complete_async(
+                model=self.model,
+                messages=self.serialize_messages(messages),
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                stream=False,
+                response_format=ResponseFormat(
+                    json_schema=JSONSchema(
+                        name=structured_output.__class__.__name__,
+                        description="Model output structured as JSON schema",
+                        schema_definition=structured_output.model_json_schema()
+                    ),
+                    type="json_schema"
+                ) if structured_output else None
+            )
+        if structured_output:
+            content=validate_structured_output(structured_output, completion.choices[0].message.content)
+            thinking=None
+        else:
+            thinking=None
+            ai_contents=completion.choices[0].message.content
+            if isinstance(ai_contents,str):
+                content=ai_contents
+            elif isinstance(ai_contents,list):
+                for ai_content in ai_contents:
+                    if isinstance(ai_content,TextChunk):
+                        content=ai_content.text
+                    elif isinstance(ai_content,ThinkChunk):
+                        thinking=ai_content.thinking[0].text
+                    else:
+                        raise ValueError(f"Unsupported message type: {type(ai_content)}")
+            else:
+                raise ValueError(f"Unsupported message type: {type(ai_contents)}")
 
-    
+        response=ChatLLMResponse(
+            thinking=thinking,
+            content=content,
+            usage=ChatLLMUsage(
+                prompt_tokens=completion.usage.prompt_tokens,
+                completion_tokens=completion.usage.completion_tokens,
+                total_tokens=completion.usage.total_tokens
+            )
+        )
+        slot.record(response.usage)
+        return response
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        async with self.limiter.acquire(messages, stream=True) as slot:
+            stream=await self.async_client.chat.stream_async(
+                model=self.model,
+                messages=self.serialize_messages(messages),
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+            async for event in stream:
+                if not event.data.choices:
+                    continue
+                delta=event.data.choices[0].delta.content
+                if isinstance(delta,str):
+                    slot.add_output(delta)
+                    yield delta
+                elif isinstance(delta,list):
+                    for chunk in delta:
+                        if isinstance(chunk,TextChunk):
+                            slot.add_output(chunk.text)
+                            yield chunk.text
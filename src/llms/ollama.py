@@ -1,17 +1,22 @@
 from src.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ImageMessage
+from src.llms.base import BaseChatLLM, DEFAULT_LIMITS, validate_structured_output
 from src.llms.views import ChatLLMResponse, ChatLLMUsage
 from ollama import Client, AsyncClient,Image,Message
-from src.llms.base import BaseChatLLM
+from typing import AsyncIterator
 from dataclasses import dataclass
 from pydantic import BaseModel
+from httpx import Limits
 
 @dataclass
 class ChatOllama(BaseChatLLM):
-    def __init__(self,host: str|None=None, model: str|None=None, temperature: float = 0.7,timeout: int|None=None):
+    def __init__(self,host: str|None=None, model: str|None=None, temperature: float = 0.7,timeout: int|None=None, limits: Limits = DEFAULT_LIMITS):
         self.host = host
         self.model = model
         self.temperature = temperature
         self.timeout = timeout
+        self.limits = limits
+        self._client: Client | None = None
+        self._async_client: AsyncClient | None = None
     
     @property
     def provider(self) -> str:
@@ -19,11 +24,24 @@ class ChatOllama(BaseChatLLM):
     
     @property
     def client(self) -> Client:
-        return Client(host=self.host,timeout=self.timeout)
+        if self._client is None:
+            self._client = Client(host=self.host,timeout=self.timeout,limits=self.limits)
+        return self._client
 
     @property
     def async_client(self) -> AsyncClient:
-        return AsyncClient(host=self.host,timeout=self.timeout)
+        if self._async_client is None:
+            self._async_client = AsyncClient(host=self.host,timeout=self.timeout,limits=self.limits)
+        return self._async_client
+
+    async def aclose(self) -> None:
+        # The ollama clients keep their httpx pool in _client
+        if self._client is not None:
+            self._client._client.close()
+            self._client = None
+        if self._async_client is not None:
+            await self._async_client._client.aclose()
+            self._async_client = None
     
     @property
     def model_name(self) -> str:
@@ -34,14 +52,14 @@ class ChatOllama(BaseChatLLM):
         for message in messages:
             if isinstance(message, SystemMessage):
                 serialized.append(Message(role="system", content=message.content))
+            elif isinstance(message, ImageMessage):
+                # Checked before HumanMessage, its base class
+                images=message.image_bytes()
+                serialized.append(Message(role="user", content=message.content,images=[Image(value=image) for image in images]))
             elif isinstance(message, HumanMessage):
                 serialized.append(Message(role="user", content=message.content))
             elif isinstance(message, AIMessage):
                 serialized.append(Message(role="assistant", content=message.content))
-            elif isinstance(message, ImageMessage):
-                message.scale_images(scale=0.7)
-                images=message.convert_images("bytes")
-                serialized.append(Message(role="user", content=message.content,images=[Image(value=image) for image in images]))
             else:
                 raise ValueError(f"Unsupported message type: {type(message)}")
         return serialized
@@ -54,7 +72,7 @@ class ChatOllama(BaseChatLLM):
             format=structured_output.model_json_schema() if structured_output else "",
         )
         if structured_output:
-            content=structured_output.model_validate_json(completion.message.content)
+            content=validate_structured_output(structured_output, completion.message.content)
         else:
             content=completion.message.content
         return ChatLLMResponse(
@@ -66,17 +84,18 @@ class ChatOllama(BaseChatLLM):
             )
         )
     async def ainvoke(self, messages: list[BaseMessage],structured_output:BaseModel|None=None) -> ChatLLMResponse:
-        completion=await self.async_client.chat(
-            model=self.model,
-            stream=False,
-            messages=self.serialize_messages(messages),
-            format=structured_output.model_json_schema() if structured_output else "",
-        )
+        async with self.limiter.acquire(messages) as slot:
+            completion=await self.async_client.chat(
+                model=self.model,
+                stream=False,
+                messages=self.serialize_messages(messages),
+                format=structured_output.model_json_schema() if structured_output else "",
+            )
         if structured_output:
-            content=structured_output.model_validate_json(completion.message.content)
+            content=validate_structured_output(structured_output, completion.message.content)
         else:
             content=completion.message.content
-        return ChatLLMResponse(
+        response=ChatLLMResponse(
             content=content,
             usage=ChatLLMUsage(
                 prompt_tokens=completion.get("prompt_eval_count"),
@@ -84,8 +103,17 @@ class ChatOllama(BaseChatLLM):
                 total_tokens=completion.get("eval_count")+completion.get("prompt_eval_count"),
             )
         )
-        
+        slot.record(response.usage)
+        return response
 
-
-        
-    
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        async with self.limiter.acquire(messages, stream=True) as slot:
+            stream=await self.async_client.chat(
+                model=self.model,
+                stream=True,
+                messages=self.serialize_messages(messages),
+            )
+            async for part in stream:
+                if part.message.content:
+                    slot.add_output(part.message.content)
+                    yield part.message.content
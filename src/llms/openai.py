@@ -3,15 +3,16 @@ from openai.types.shared_params.response_format_json_schema import JSONSchema, R
 from src.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ImageMessage
 from openai.types.chat.chat_completion_content_part_image_param import ImageURL
 from src.llms.views import ChatLLMResponse, ChatLLMUsage
-from openai import OpenAI, AsyncOpenAI
-from src.llms.base import BaseChatLLM
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from src.llms.base import BaseChatLLM, DEFAULT_LIMITS
+from httpx import Client, AsyncClient, Limits
+from typing import AsyncIterator
 from dataclasses import dataclass
 from pydantic import BaseModel
-from httpx import Client
 
 @dataclass
 class ChatOpenAI(BaseChatLLM):
-    def __init__(self, model: str, api_key: str|None=None, organization: str|None=None, project: str|None=None, base_url: str|None=None, websocket_base_url: str|None=None, temperature: float = 0.7,max_retries: int = 3,timeout: int|None=None, default_headers: dict[str, str] | None = None, default_query: dict[str, object] | None = None, http_client: Client | None = None, strict_response_validation: bool = False):
+    def __init__(self, model: str, api_key: str|None=None, organization: str|None=None, project: str|None=None, base_url: str|None=None, websocket_base_url: str|None=None, temperature: float = 0.7,max_retries: int = 3,timeout: int|None=None, default_headers: dict[str, str] | None = None, default_query: dict[str, object] | None = None, http_client: Client | None = None, async_http_client: AsyncClient | None = None, limits: Limits = DEFAULT_LIMITS, strict_response_validation: bool = False):
         self.model = model
         self.api_key = api_key
         self.temperature = temperature
@@ -23,12 +24,18 @@ class ChatOpenAI(BaseChatLLM):
         self.default_headers = default_headers
         self.default_query = default_query
         self.http_client = http_client
+        self.async_http_client = async_http_client
+        self.limits = limits
         self.websocket_base_url = websocket_base_url
         self.strict_response_validation = strict_response_validation
+        self._client: OpenAI | None = None
+        self._async_client: AsyncOpenAI | None = None
     
     @property
     def client(self):
-        return OpenAI(**{
+        if self._client is not None:
+            return self._client
+        self._client = OpenAI(**{
             "api_key": self.api_key,
             "base_url": self.base_url,
             "max_retries": self.max_retries,
@@ -38,13 +45,16 @@ class ChatOpenAI(BaseChatLLM):
             "project": self.project,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
-            "http_client": self.http_client,
+            "http_client": self.http_client or DefaultHttpxClient(limits=self.limits),
             "_strict_response_validation": self.strict_response_validation
         })
+        return self._client
     
     @property
     def async_client(self):
-        return AsyncOpenAI(**{
+        if self._async_client is not None:
+            return self._async_client
+        self._async_client = AsyncOpenAI(**{
             "api_key": self.api_key,
             "base_url": self.base_url or 'https://api.openai.com/v1',
             "max_retries": self.max_retries,
@@ -53,9 +63,18 @@ class ChatOpenAI(BaseChatLLM):
             "project": self.project,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
-            "http_client": self.http_client,
+            "http_client": self.async_http_client or DefaultAsyncHttpxClient(limits=self.limits),
             "_strict_response_validation": self.strict_response_validation
         })
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
     
     @property
     def provider(self):
@@ -71,20 +90,20 @@ class ChatOpenAI(BaseChatLLM):
             if isinstance(message, SystemMessage):
                 content=[ChatCompletionContentPartTextParam(type="text",text=message.content)]
                 serialized.append(ChatCompletionSystemMessageParam(role="system",content=content))
+            elif isinstance(message, ImageMessage):
+                # Checked before HumanMessage, its base class
+                images=message.image_data_urls()
+                content=[
+                    ChatCompletionContentPartTextParam(type="text",text=message.content),
+                    *[ChatCompletionContentPartImageParam(type="image_url",image_url=ImageURL(url=image,detail="auto")) for image in images]
+                ]
+                serialized.append(ChatCompletionUserMessageParam(role="user",content=content))
             elif isinstance(message, HumanMessage):
                 content=[ChatCompletionContentPartTextParam(type="text",text=message.content)]
                 serialized.append(ChatCompletionUserMessageParam(role="user",content=content))
             elif isinstance(message, AIMessage):
                 content=[ChatCompletionContentPartTextParam(type="text",text=message.content)]
                 serialized.append(ChatCompletionAssistantMessageParam(role="assistant",content=content))
-            elif isinstance(message, ImageMessage):
-                message.scale_images(scale=0.7)
-                images=[f"data:{message.mime_type};base64,{image}" for image in message.convert_images("base64")]
-                content=[
-                    ChatCompletionContentPartTextParam(type="text",text=message.content),
-                    *[ChatCompletionContentPartImageParam(type="image_url",url=ImageURL(url=image,detail="auto")) for image in images]
-                ]
-                serialized.append(ChatCompletionUserMessageParam(role="user",content=content))
             else:
                 raise ValueError(f"Unsupported message type: {type(message)}")
         return serialized
@@ -109,30 +128,48 @@ class ChatOpenAI(BaseChatLLM):
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage.prompt_tokens,
                 completion_tokens=completion.usage.completion_tokens,
-                total_tokens=completion.usage.total_tokens
+                total_tokens=completion.usage.total_tokens,
+                cached_tokens=completion.usage.prompt_tokens_details.cached_tokens if completion.usage.prompt_tokens_details else None
             )
         )
     
     async def ainvoke(self, messages: list[BaseMessage],structured_output:BaseModel|None=None) -> ChatLLMResponse:
-        completion=await self.async_client.chat.completions.create(
-            model=self.model,
-            messages=self.serialize_messages(messages),
-            temperature=self.temperature,
-            response_format=ResponseFormatJSONSchema(
-                type="json_schema",
-                json_schema=JSONSchema(
-                    name=structured_output.__class__.__name__,
-                    description="Model output structured as JSON schema",
-                    schema=structured_output.model_json_schema()
-                )
-            ) if structured_output else None
-        )
+        async with self.limiter.acquire(messages) as slot:
+            completion=await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=self.serialize_messages(messages),
+                temperature=self.temperature,
+                response_format=ResponseFormatJSONSchema(
+                    type="json_schema",
+                    json_schema=JSONSchema(
+                        name=structured_output.__class__.__name__,
+                        description="Model output structured as JSON schema",
+                        schema=structured_output.model_json_schema()
+                    )
+                ) if structured_output else None
+            )
         content=completion.choices[0].message.content
-        return ChatLLMResponse(
+        response=ChatLLMResponse(
             content=content,
             usage=ChatLLMUsage(
                 prompt_tokens=completion.usage.prompt_tokens,
                 completion_tokens=completion.usage.completion_tokens,
-                total_tokens=completion.usage.total_tokens
+                total_tokens=completion.usage.total_tokens,
+                cached_tokens=completion.usage.prompt_tokens_details.cached_tokens if completion.usage.prompt_tokens_details else None
+            )
+        )
+        slot.record(response.usage)
+        return response
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        async with self.limiter.acquire(messages, stream=True) as slot:
+            stream=await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=self.serialize_messages(messages),
+                temperature=self.temperature,
+                stream=True
             )
-        )
\ No newline at end of file
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    slot.add_output(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
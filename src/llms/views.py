@@ -5,6 +5,7 @@ class ChatLLMUsage(BaseModel):
     completion_tokens: int
     total_tokens: int
     image_tokens: int|None = None
+    cached_tokens: int|None = None
 
 class ChatLLMResponse(BaseModel):
     content: str|BaseModel
@@ -0,0 +1,161 @@
+from src.mcp.transport.base import remaining_time
+from src.mcp.client.session import MCPSession
+from src.mcp.exception import MCPError
+from typing import Awaitable,Callable
+from dataclasses import dataclass
+import asyncio
+import time
+
+@dataclass
+class IdleSession:
+    session:MCPSession
+    released_at:float
+
+class SessionPool:
+    '''Keeps released sessions warm so the next lease skips the server startup and initialize.
+
+    Several sessions of the same server may be leased at once (one per concurrent run),
+    but at most `max_sessions` sessions (leased, starting or idle) are live in total.
+    Idle sessions are closed after `idle_timeout` seconds and pinged before reuse.
+    A lease waits for a free slot at most `lease_timeout` seconds, or until the current deadline.
+    '''
+    def __init__(self,factory:Callable[[str],Awaitable[MCPSession]],max_sessions:int=8,idle_timeout:float=300.0,ping_timeout:float=5.0,lease_timeout:float=30.0)->None:
+        self.factory=factory
+        self.max_sessions=max_sessions
+        self.idle_timeout=idle_timeout
+        self.ping_timeout=ping_timeout
+        self.lease_timeout=lease_timeout
+        self.leased:set[MCPSession]=set()
+        self.idle:dict[str,list[IdleSession]]={}
+        # Leases reserved while their session is checked or started
+        self.starting=0
+        self.condition=asyncio.Condition()
+        self.reaper:asyncio.Task|None=None
+        self.hits=0
+        self.misses=0
+
+    def idle_sessions(self)->int:
+        return sum(len(sessions) for sessions in self.idle.values())
+
+    def live_sessions(self)->int:
+        return len(self.leased)+self.starting+self.idle_sessions()
+
+    def pop_idle(self,name:str)->IdleSession|None:
+        sessions=self.idle.get(name)
+        if not sessions:
+            return None
+        # The most recently released session is the least likely to have gone stale
+        idle=sessions.pop()
+        if not sessions:
+            del self.idle[name]
+        return idle
+
+    def pop_oldest_idle(self)->IdleSession:
+        name=min(self.idle,key=lambda key:self.idle[key][0].released_at)
+        idle=self.idle[name].pop(0)
+        if not self.idle[name]:
+            del self.idle[name]
+        return idle
+
+    async def healthy(self,session:MCPSession)->bool:
+        try:
+            return await asyncio.wait_for(session.ping(),timeout=self.ping_timeout)
+        except Exception:
+            return False
+
+    async def close_session(self,session:MCPSession)->None:
+        try:
+            await session.shutdown()
+        except Exception:
+            pass
+
+    async def lease(self,name:str)->MCPSession:
+        '''Get a warm session of the server or start a new one'''
+        evicted=None
+        loop=asyncio.get_running_loop()
+        remaining=remaining_time()
+        timeout=self.lease_timeout if remaining is None else min(self.lease_timeout,remaining)
+        expires=loop.time()+timeout
+        async with self.condition:
+            while True:
+                idle=self.pop_idle(name)
+                if idle or self.live_sessions()<self.max_sessions:
+                    break
+                if self.idle:
+                    # Take over the slot of the least recently used idle session, closed once the lock is released
+                    evicted=self.pop_oldest_idle().session
+                    break
+                try:
+                    # Agents holding one server while waiting on another would otherwise wait on each other forever
+                    await asyncio.wait_for(self.condition.wait(),timeout=max(expires-loop.time(),0))
+                except asyncio.TimeoutError:
+                    raise MCPError(code=-1,message=f"No session of {name} available within {timeout:.1f}s, all {self.max_sessions} sessions are in use")
+            self.starting+=1
+        checked=False
+        try:
+            if evicted:
+                await self.close_session(evicted)
+            healthy=bool(idle) and await self.healthy(idle.session)
+            checked=True
+            if healthy:
+                self.hits+=1
+                session=idle.session
+            else:
+                if idle:
+                    await self.close_session(idle.session)
+                self.misses+=1
+                session=await self.factory(name)
+        except BaseException:
+            async with self.condition:
+                self.starting-=1
+                if idle and not checked:
+                    # Cancelled while pinging, the session goes back to the pool and is pinged again on its next lease
+                    self.idle.setdefault(name,[]).append(idle)
+                self.condition.notify_all()
+            raise
+        self.starting-=1
+        self.leased.add(session)
+        return session
+
+    async def release(self,session:MCPSession)->None:
+        '''Return a leased session to the pool'''
+        async with self.condition:
+            if session not in self.leased:
+                raise ValueError(f"Session {session.name} not leased")
+            self.leased.discard(session)
+            self.idle.setdefault(session.name,[]).append(IdleSession(session=session,released_at=time.monotonic()))
+            self.condition.notify_all()
+        if self.reaper is None or self.reaper.done():
+            self.reaper=asyncio.create_task(self.reap())
+
+    async def evict_idle(self)->None:
+        '''Close the sessions idle for longer than the idle timeout'''
+        now=time.monotonic()
+        expired=[]
+        async with self.condition:
+            for name in list(self.idle):
+                sessions=self.idle[name]
+                expired.extend(idle.session for idle in sessions if now-idle.released_at>=self.idle_timeout)
+                sessions[:]=[idle for idle in sessions if now-idle.released_at<self.idle_timeout]
+                if not sessions:
+                    del self.idle[name]
+            self.condition.notify_all()
+        for session in expired:
+            await self.close_session(session)
+
+    async def reap(self)->None:
+        while self.idle:
+            await asyncio.sleep(self.idle_timeout/2)
+            await self.evict_idle()
+
+    async def close(self)->None:
+        '''Close every idle and leased session'''
+        if self.reaper and not self.reaper.done():
+            self.reaper.cancel()
+        async with self.condition:
+            sessions=[idle.session for sessions in self.idle.values() for idle in sessions]+list(self.leased)
+            self.idle.clear()
+            self.leased.clear()
+            self.condition.notify_all()
+        for session in sessions:
+            await self.close_session(session)
@@ -3,22 +3,30 @@ from src.mcp.types.elicitation import ElicitationFn
 from src.mcp.registry.service import MCPRegistry
 from src.mcp.types.sampling import SamplingFn
 from src.mcp.client.session import MCPSession
+from src.mcp.client.views import SessionReport
+from src.mcp.client.pool import SessionPool
 from src.mcp.types.roots import ListRootsFn
 from src.mcp.types.info import ClientInfo
-from typing import Callable, Optional
+from typing import Callable, Optional, Awaitable
 from uuid import uuid4
 from typing import Any
+import asyncio
 import json
+import time
 
 class MCPClient:
     client_info=ClientInfo(name="MCP Client",version="0.1.0")
-    def __init__(self,config:dict[str,dict[str,Any]]={},sampling_callback:Optional[SamplingFn]=None,elicitation_callback:Optional[ElicitationFn]=None,list_roots_callback:Optional[ListRootsFn]=None)->None:
+    def __init__(self,config:dict[str,dict[str,Any]]={},sampling_callback:Optional[SamplingFn]=None,elicitation_callback:Optional[ElicitationFn]=None,list_roots_callback:Optional[ListRootsFn]=None,keep_alive:bool=False,max_sessions:int=8,idle_timeout:float=300.0,lease_timeout:float=30.0)->None:
         self.servers=config.get("mcpServers",{})
         self.sampling_callback=sampling_callback
         self.list_roots_callback=list_roots_callback
         self.elicitation_callback=elicitation_callback
         self.sessions:dict[str,MCPSession]={}
         self.registry=MCPRegistry()
+        # With keep_alive, closed sessions go back to a pool and stay warm for the next run
+        self.pool=SessionPool(factory=self.open_session,max_sessions=max_sessions,idle_timeout=idle_timeout,lease_timeout=lease_timeout) if keep_alive else None
+        # Forks share the pool and registry of their parent, which owns closing them
+        self.shared=False
         
     @classmethod
     def from_config(cls,config:dict[str,dict[str,Any]],sampling_callback:Optional[Callable]=None,elicitation_callback:Optional[Callable]=None,list_roots_callback:Optional[Callable]=None,logging_callback:Optional[Callable]=None)->'MCPClient':
@@ -26,12 +34,20 @@ class MCPClient:
         return cls(config=config,sampling_callback=sampling_callback,elicitation_callback=elicitation_callback,list_roots_callback=list_roots_callback,logging_callback=logging_callback)
     
     @classmethod
-    def from_config_file(cls,config_file_path:str)->'MCPClient':
+    def from_config_file(cls,config_file_path:str,keep_alive:bool=False)->'MCPClient':
         '''Create a client from a configuration file'''
         with open(config_file_path) as f:
             config=json.load(f)
-        return cls(config=config)
+        return cls(config=config,keep_alive=keep_alive)
     
+    def fork(self)->'MCPClient':
+        '''Get a client over the same servers, session pool and registry but with its own sessions, so concurrent agents do not share connections'''
+        client=MCPClient(config=self.to_config(),sampling_callback=self.sampling_callback,elicitation_callback=self.elicitation_callback,list_roots_callback=self.list_roots_callback)
+        client.pool=self.pool
+        client.registry=self.registry
+        client.shared=True
+        return client
+
     def get_server_names(self)->list[str]:
         '''Get the MCP server names'''
         return list(self.servers.keys())
@@ -69,11 +85,17 @@ class MCPClient:
         del self.servers[name]
 
     async def create_session(self,name:str)->MCPSession:
-        '''Create a MCPSession'''
+        '''Create a MCPSession, leased from the pool when keep_alive is on'''
         if not self.servers:
             raise Exception("No MCP servers available")
         if name not in self.servers:
             raise ValueError(f"{name} not found")
+        session=await self.pool.lease(name) if self.pool else await self.open_session(name)
+        self.sessions[name]=session
+        return session
+
+    async def open_session(self,name:str)->MCPSession:
+        '''Start the server and initialize a new MCPSession'''
         server_config=self.servers.get(name)
         transport=create_transport_from_server_config(server_config=server_config)
         transport.attach_callbacks({
@@ -81,10 +103,14 @@ class MCPClient:
             'elicitation':self.elicitation_callback,
             'list_roots':self.list_roots_callback,
         })
-        session=MCPSession(transport=transport,client_info=self.client_info)
-        await session.connect()
-        await session.initialize()
-        self.sessions[name]=session
+        session=MCPSession(transport=transport,client_info=self.client_info,name=name)
+        try:
+            await session.connect()
+            await session.initialize()
+        except BaseException:
+            # A server that fails or times out during startup must not be left running
+            await session.shutdown()
+            raise
         return session
     
     def is_connected(self,server_name:str)->bool:
@@ -101,28 +127,57 @@ class MCPClient:
             raise ValueError(f"Session {name} not found")
         return self.sessions.get(name)
     
+    def get_tools_cache_stats(self)->dict[str,dict[str,int]]:
+        '''Get the tools cache hits and misses of each session'''
+        return {name:{
+            'hits':session.tools_cache_hits,
+            'misses':session.tools_cache_misses
+        } for name,session in self.sessions.items()}
+    
     async def close_session(self,name:str)->None:
         '''Close a session'''
         if not self.is_connected(name):
             raise ValueError(f"Session {name} not found")
-        session=self.sessions.get(name)
-        await session.shutdown()
-        del self.sessions[name]
+        session=self.sessions.pop(name)
+        if self.pool:
+            await self.pool.release(session)
+        else:
+            await session.shutdown()
 
-    async def create_all_sessions(self)->None:
-        '''Create a session for each server'''
+    async def run_timed(self,name:str,operation:str,coroutine:Awaitable,semaphore:asyncio.Semaphore,timeout:float)->SessionReport:
+        '''Run a session operation under the concurrency limit and timeout, reporting instead of raising'''
+        async with semaphore:
+            start=time.perf_counter()
+            try:
+                await asyncio.wait_for(coroutine,timeout=timeout)
+                return SessionReport(name=name,operation=operation,duration=time.perf_counter()-start,is_success=True)
+            except asyncio.TimeoutError:
+                error=f"Timed out after {timeout}s"
+            except Exception as e:
+                error=str(e)
+            return SessionReport(name=name,operation=operation,duration=time.perf_counter()-start,is_success=False,error=error)
+
+    async def create_all_sessions(self,max_concurrency:int=8,timeout:float=60.0)->list[SessionReport]:
+        '''Create a session for each server concurrently, a failing server does not stop the others'''
         if not self.servers:
             raise Exception("No MCP servers available")
-        for name in self.servers:
-            await self.create_session(name=name)
+        semaphore=asyncio.Semaphore(max_concurrency)
+        names=[name for name in self.servers if not self.is_connected(name)]
+        return list(await asyncio.gather(*[self.run_timed(name,"startup",self.create_session(name=name),semaphore,timeout) for name in names]))
 
-    async def close_all_sessions(self)->None:
-        '''Close all sessions'''
+    async def close_all_sessions(self,max_concurrency:int=8,timeout:float=10.0)->list[SessionReport]:
+        '''Close all sessions concurrently, a failing server does not stop the others'''
         if not self.sessions:
-            return None
-        for name in list(self.sessions.keys()):
-            await self.close_session(name=name)
-    
-
-        
+            return []
+        semaphore=asyncio.Semaphore(max_concurrency)
+        names=list(self.sessions.keys())
+        return list(await asyncio.gather(*[self.run_timed(name,"shutdown",self.close_session(name=name),semaphore,timeout) for name in names]))
 
+    async def aclose(self)->None:
+        '''Close all sessions, including the warm ones kept in the pool'''
+        await self.close_all_sessions()
+        if self.shared:
+            return None
+        if self.pool:
+            await self.pool.close()
+        await self.registry.aclose()
\ No newline at end of file
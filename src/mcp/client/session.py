@@ -7,14 +7,25 @@ from src.mcp.types.prompts import Prompt, PromptResult
 from src.mcp.transport.base import BaseTransport
 from src.mcp.types.info import ClientInfo
 from typing import Optional,Any
+from itertools import count
 from uuid import uuid4
 
 class MCPSession:
-    def __init__(self,transport:BaseTransport,client_info:ClientInfo,)->None:
+    def __init__(self,transport:BaseTransport,client_info:ClientInfo,name:Optional[str]=None)->None:
         self.id=str(uuid4())
+        self.name=name
+        self.request_ids=count(1)
         self.transport=transport
         self.client_info=client_info
         self.initialize_result:Optional[InitializeResult]=None
+        self.tools_cache:Optional[list[Tool]]=None
+        self.tools_cache_hits=0
+        self.tools_cache_misses=0
+        self.transport.on_notification(Method.NOTIFICATION_TOOLS_LIST_CHANGED,self.invalidate_tools_cache)
+
+    def next_request_id(self)->int:
+        '''Allocate a unique JSON-RPC id so concurrent requests never share a pending future'''
+        return next(self.request_ids)
 
     async def connect(self)->None:
         await self.transport.connect()
@@ -28,65 +39,79 @@ class MCPSession:
         sampling=SamplingCapability() if self.transport.callbacks.get("sampling") else None
         elicitation=ElicitationCapability() if self.transport.callbacks.get("elicitation") else None
         params=InitializeParams(clientInfo=self.client_info,capabilities=ClientCapabilities(roots=roots,sampling=sampling,elicitation=elicitation),protocolVersion=PROTOCOL_VERSION)
-        request=JSONRPCRequest(id=self.id,method=Method.INITIALIZE,params=params.model_dump(exclude_none=True))
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.INITIALIZE,params=params.model_dump(exclude_none=True))
         response=await self.transport.send_request(request=request)
         notification=JSONRPCNotification(method=Method.NOTIFICATION_INITIALIZED)
         await self.transport.send_notification(notification=notification)
-        self.initialize_result=InitializeResult.model_validate(response.result)
-        return InitializeResult.model_validate(response.result)
+        self.initialize_result=response.result_as(InitializeResult)
+        return self.initialize_result
     
     async def ping(self)->bool:
-        request=JSONRPCRequest(id=self.id,method=Method.PING)
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.PING)
         response=await self.transport.send_request(request=request)
         return response is not None
 
     async def prompts_list(self)->list[Prompt]:
-        request=JSONRPCRequest(id=self.id,method=Method.PROMPTS_LIST)
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.PROMPTS_LIST)
         response=await self.transport.send_request(request=request)
-        return [Prompt.model_validate(prompt) for prompt in response.result.get("prompts")]
+        return response.result_as(list[Prompt],key="prompts")
     
     async def prompts_get(self,name:str,arguments:Optional[dict[str,Any]]=None)->PromptResult:
-        request=JSONRPCRequest(id=self.id,method=Method.PROMPTS_GET,params={"name":name,"arguments":arguments})
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.PROMPTS_GET,params={"name":name,"arguments":arguments})
         response=await self.transport.send_request(request=request)
-        return PromptResult.model_validate(response.result)
+        return response.result_as(PromptResult)
     
     async def resources_list(self,cursor:Optional[str]=None)->list[Resource]:
-        request=JSONRPCRequest(id=self.id,method=Method.RESOURCES_LIST,params={"cursor":cursor} if cursor else {})
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.RESOURCES_LIST,params={"cursor":cursor} if cursor else {})
         response=await self.transport.send_request(request=request)
-        return [Resource.model_validate(resource) for resource in response.result.get("resources")]
+        return response.result_as(list[Resource],key="resources")
     
     async def resources_read(self,uri:str)->ResourceResult:
-        request=JSONRPCRequest(id=self.id,method=Method.RESOURCES_READ,params={"uri":uri})
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.RESOURCES_READ,params={"uri":uri})
         response=await self.transport.send_request(request=request)
-        return [ResourceResult.model_validate(resource) for resource in response.result.get("contents")]
+        return response.result_as(list[ResourceResult],key="contents")
     
     async def resources_templates_list(self)->list[ResourceTemplate]:
-        request=JSONRPCRequest(id=self.id,method=Method.RESOURCES_TEMPLATES_LIST)
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.RESOURCES_TEMPLATES_LIST)
         response=await self.transport.send_request(request=request)
-        return [ResourceTemplate.model_validate(template) for template in response.result.get("resourceTemplates")]
+        return response.result_as(list[ResourceTemplate],key="resourceTemplates")
     
     async def resources_subscribe(self,uri:str)->None:
-        request=JSONRPCRequest(id=self.id,method=Method.RESOURCES_SUBSCRIBE,params={"uri":uri})
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.RESOURCES_SUBSCRIBE,params={"uri":uri})
         await self.transport.send_request(request=request)
 
     async def resources_unsubscribe(self,uri:str)->None:
-        request=JSONRPCRequest(id=self.id,method=Method.RESOURCES_UNSUBSCRIBE,params={"uri":uri})
+        request=JSONRPCRequest(id=self.next_request_id(),method=Method.RESOURCES_UNSUBSCRIBE,params={"uri":uri})
         await self.transport.send_request(request=request)
     
     async def tools_list(self,cursor:Optional[str]=None)->list[Tool]:
-        message=JSONRPCRequest(id=self.id,method=Method.TOOLS_LIST,params={"cursor":cursor} if cursor else {})
+        message=JSONRPCRequest(id=self.next_request_id(),method=Method.TOOLS_LIST,params={"cursor":cursor} if cursor else {})
         response=await self.transport.send_request(request=message)
-        return [Tool.model_validate(tool) for tool in response.result.get("tools")]
+        return response.result_as(list[Tool],key="tools")
     
+    async def get_tools(self)->list[Tool]:
+        '''Get the tools of the server, served from the cache until the server reports a change'''
+        if self.tools_cache is not None:
+            self.tools_cache_hits+=1
+            return self.tools_cache
+        self.tools_cache_misses+=1
+        self.tools_cache=await self.tools_list()
+        return self.tools_cache
+
+    def invalidate_tools_cache(self,notification:Optional[JSONRPCNotification]=None)->None:
+        '''Drop the cached tools, the next get_tools call refetches them from the server'''
+        self.tools_cache=None
+
     async def tools_call(self,tool_name:str,**arguments)->ToolResult:
         tool_request=ToolRequest(name=tool_name,arguments=arguments)
-        message=JSONRPCRequest(id=self.id,method=Method.TOOLS_CALL,params=tool_request.model_dump())
+        message=JSONRPCRequest(id=self.next_request_id(),method=Method.TOOLS_CALL,params=tool_request.model_dump())
         response=await self.transport.send_request(request=message)
-        return ToolResult.model_validate(response.result)
+        return response.result_as(ToolResult)
     
     async def roots_list_changed(self)->None:
         notification=JSONRPCNotification(method=Method.NOTIFICATION_ROOTS_LIST_CHANGED)
         await self.transport.send_notification(notification=notification)
 
     async def shutdown(self)->None:
+        self.invalidate_tools_cache()
         await self.transport.disconnect()
\ No newline at end of file
@@ -15,17 +15,26 @@ def create_transport_from_server_config(server_config:dict[str,Any])->BaseTransp
     Returns:
         The transport instance for the server
     '''
+    # Response timeouts, e.g. "timeout": 30 and "timeouts": {"tools/call": 120}
+    timeout=server_config.get('timeout')
+    timeouts=server_config.get('timeouts',{})
+    server_config={key:value for key,value in server_config.items() if key not in ('timeout','timeouts')}
     if is_sse_transport(server_config):
-        return SSETransport(**server_config)
+        transport=SSETransport(**server_config)
     elif is_stdio_transport(server_config):
         params=StdioServerParams(**server_config)
-        return StdioTransport(params=params)
+        transport=StdioTransport(params=params)
     elif is_streamable_http_transport(server_config):
-        return StreamableHTTPTransport(**server_config)
+        transport=StreamableHTTPTransport(**server_config)
     elif is_websocket_transport(server_config):
-        return WebSocketTransport(**server_config)
+        transport=WebSocketTransport(**server_config)
     else:
         raise ValueError(f'Invalid server configuration: {server_config}')
+    if timeout is not None:
+        transport.set_timeout(timeout)
+    for method,method_timeout in timeouts.items():
+        transport.set_timeout(method_timeout,method=method)
+    return transport
 
 
 def is_sse_transport(server_config:dict[str,Any])->bool:
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Literal,Optional
+
+class SessionReport(BaseModel):
+    name: str
+    operation: Literal["startup","shutdown"]
+    duration: float
+    is_success: bool
+    error: Optional[str]=None
\ No newline at end of file
@@ -1,28 +1,146 @@
 from src.mcp.types.registry import (ListServersRequest,ListServersResponse,
 ListServerVersionsRequest,ListServerVersionsResponse,HealthCheckRequest,
 HealthCheckResponse,PingRequest,PingResponse,VersionRequest,VersionResponse,
-SpecificServerVersionRequest,SpecificServerVersionResponse,ErrorResponse) 
-from httpx import AsyncClient,Client,HTTPStatusError
+SpecificServerVersionRequest,SpecificServerVersionResponse,ErrorResponse,Metadata,Server) 
+from httpx import AsyncClient,HTTPStatusError,Limits
+from collections import OrderedDict
+from urllib.parse import quote
 from typing import Literal
+from pathlib import Path
+import asyncio
+import json
+import time
 
 class MCPRegistry:
-    def __init__(self,version:Literal["v0","v0.1"]="v0.1"):
+    def __init__(self,version:Literal["v0","v0.1"]="v0.1",cache_ttl:float=300.0,cache_size:int=128,snapshot_path:str|Path|None=None,offline:bool=False,limits:Limits=Limits(max_connections=10,max_keepalive_connections=5,keepalive_expiry=30.0)):
         self.base_url=f"https://registry.modelcontextprotocol.io/{version}"
         self.headers={
             "Accept":"application/json, application/problem+json",
         }
+        self.limits=limits
+        self.client:AsyncClient|None=None
+        # TTL/LRU cache of list_servers responses keyed on the request
+        self.cache_ttl=cache_ttl
+        self.cache_size=cache_size
+        self.cache:OrderedDict[str,tuple[float,ListServersResponse]]=OrderedDict()
+        # Fetches in flight keyed like the cache, so a page being prefetched is awaited rather than fetched again
+        self.inflight:dict[str,asyncio.Task]={}
+        # Local copy of the whole registry, searched instead of the network when offline
+        self.snapshot_path=Path(snapshot_path) if snapshot_path else None
+        self.offline=offline
+        self.snapshot:list[Server]|None=None
 
     @property
     def aclient(self)->AsyncClient:
-        return AsyncClient(base_url=self.base_url,headers=self.headers)
-    
-    async def list_servers(self,request:ListServersRequest)->ListServersResponse:
-        response=await self.aclient.get("/servers",params=request.model_dump(exclude_none=True))
-        return ListServersResponse(**response.json())
+        if self.client is None:
+            self.client=AsyncClient(base_url=self.base_url,headers=self.headers,limits=self.limits)
+        return self.client
+
+    async def aclose(self)->None:
+        '''Close the pooled client and stop pending fetches'''
+        for task in self.inflight.values():
+            task.cancel()
+        self.inflight.clear()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client=None
+
+    def cache_get(self,key:str)->ListServersResponse|None:
+        entry=self.cache.get(key)
+        if entry is None:
+            return None
+        expires_at,response=entry
+        if expires_at<time.monotonic():
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return response
+
+    def cache_put(self,key:str,response:ListServersResponse)->None:
+        self.cache[key]=(time.monotonic()+self.cache_ttl,response)
+        self.cache.move_to_end(key)
+        while len(self.cache)>self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def fetch_servers(self,request:ListServersRequest,key:str)->ListServersResponse:
+        http_response=await self.aclient.get("/servers",params=request.model_dump(exclude_none=True,mode="json"))
+        response=ListServersResponse(**http_response.json())
+        self.cache_put(key,response)
+        return response
+
+    def start_fetch(self,request:ListServersRequest,key:str)->asyncio.Task:
+        task=self.inflight.get(key)
+        if task is None:
+            task=asyncio.create_task(self.fetch_servers(request,key))
+            self.inflight[key]=task
+            def done(task:asyncio.Task)->None:
+                self.inflight.pop(key,None)
+                # A failed prefetch nobody awaited is dropped, the page is fetched again when asked for
+                if not task.cancelled():
+                    task.exception()
+            task.add_done_callback(done)
+        return task
+
+    async def list_servers(self,request:ListServersRequest,prefetch:bool=False)->ListServersResponse:
+        '''List servers, served from the cache or the snapshot when possible. With prefetch the next page is fetched in the background'''
+        if self.offline:
+            return self.search_snapshot(request)
+        key=request.model_dump_json(exclude_none=True)
+        response=self.cache_get(key)
+        if response is None:
+            response=await asyncio.shield(self.start_fetch(request,key))
+        next_cursor=response.metadata.nextCursor
+        if prefetch and next_cursor:
+            next_request=request.model_copy(update={"cursor":next_cursor})
+            next_key=next_request.model_dump_json(exclude_none=True)
+            if self.cache_get(next_key) is None:
+                self.start_fetch(next_request,next_key)
+        return response
+
+    async def sync_snapshot(self,path:str|Path|None=None)->int:
+        '''Download every server of the registry into the snapshot file, returns the number of servers'''
+        path=Path(path) if path else self.snapshot_path
+        if path is None:
+            raise ValueError("No snapshot path given")
+        servers:list[Server]=[]
+        request=ListServersRequest(limit=99)
+        while True:
+            response=await self.list_servers(request,prefetch=True)
+            servers.extend(response.servers)
+            if not response.metadata.nextCursor:
+                break
+            request=request.model_copy(update={"cursor":response.metadata.nextCursor})
+        path.parent.mkdir(parents=True,exist_ok=True)
+        path.write_text(json.dumps([server.model_dump(mode="json",exclude_none=True) for server in servers]))
+        self.snapshot_path=path
+        self.snapshot=servers
+        return len(servers)
+
+    def load_snapshot(self)->list[Server]:
+        if self.snapshot is None:
+            if self.snapshot_path is None or not self.snapshot_path.exists():
+                raise ValueError("No registry snapshot available, run sync_snapshot first")
+            self.snapshot=[Server.model_validate(server) for server in json.loads(self.snapshot_path.read_text())]
+        return self.snapshot
+
+    def search_snapshot(self,request:ListServersRequest)->ListServersResponse:
+        '''Substring search over the snapshot, paginated with the offset as cursor'''
+        search=(request.search or "").lower()
+        servers=[server for server in self.load_snapshot() if search in " ".join(filter(None,[
+            server.server.name,server.server.title,server.server.description
+        ])).lower()]
+        cursor=request.cursor or "0"
+        if not cursor.isdigit():
+            raise ValueError(f"Cursor '{cursor}' is not a snapshot cursor, restart the search without a cursor to page through the snapshot")
+        offset=int(cursor)
+        limit=request.limit or 30
+        page=servers[offset:offset+limit]
+        next_cursor=str(offset+limit) if offset+limit<len(servers) else None
+        return ListServersResponse(metadata=Metadata(count=len(page),nextCursor=next_cursor),servers=page)
     
     async def list_server_versions(self,request:ListServerVersionsRequest)->ListServerVersionsResponse:
         try:
-            response=await self.aclient.get(f"/servers/{request.serverName}/versions")
+            response=await self.aclient.get(f"/servers/{quote(request.serverName,safe='')}/versions")
             response.raise_for_status()
         except HTTPStatusError:
             return ErrorResponse(**response.json())
@@ -30,7 +148,7 @@ class MCPRegistry:
     
     async def specific_server_version(self,request:SpecificServerVersionRequest)->SpecificServerVersionResponse:
         try:
-            response=await self.aclient.get(f"/servers/{request.server_id}/versions/{request.version}")
+            response=await self.aclient.get(f"/servers/{quote(request.serverName,safe='')}/versions/{quote(request.version,safe='')}")
             response.raise_for_status()
         except HTTPStatusError:
             return ErrorResponse(**response.json())
@@ -46,4 +164,4 @@ class MCPRegistry:
     
     async def version(self,request:VersionRequest|None=None)->VersionResponse:
         response=await self.aclient.get(f"/version")
-        return VersionResponse(**response.json())
+        return VersionResponse(**response.json())
\ No newline at end of file
@@ -3,9 +3,61 @@ from src.mcp.types.json_rpc import (
     JSONRPCResponse,
     JSONRPCError,
     JSONRPCNotification,
+    Error,
+    Method,
 )
+from src.mcp.types.elicitation import ElicitRequest
+from src.mcp.types.sampling import MessageRequest
+from src.mcp.types.roots import ListRootsRequest
+from src.mcp.exception import MCPError
+from contextlib import contextmanager
+from pydantic import BaseModel
+from contextvars import ContextVar
 from abc import ABC, abstractmethod
-from typing import Callable
+from typing import Callable, Any
+import asyncio
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+# Seconds a notifications/cancelled may take to send, it is best effort and never holds up the caller
+CANCEL_TIMEOUT = 5.0
+# Server-initiated requests (sampling, elicitation, roots) handled at once per transport
+MAX_SERVER_REQUESTS = 4
+
+# Event loop time by which every request of the current context must complete, None for no deadline
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: float | None):
+    """
+    Bound every request made inside the block to complete within the given seconds.
+    Nested deadlines never extend an outer one.
+
+    Args:
+        seconds: The time budget, None leaves the current deadline unchanged
+    """
+    if seconds is None:
+        yield
+        return
+    expires = asyncio.get_running_loop().time() + seconds
+    current = request_deadline.get()
+    token = request_deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
+
+def remaining_time() -> float | None:
+    """
+    Seconds left before the current deadline, None when there is no deadline.
+    """
+    expires = request_deadline.get()
+    if expires is None:
+        return None
+    return expires - asyncio.get_running_loop().time()
 
 class BaseTransport(ABC):
     """
@@ -14,9 +66,158 @@ class BaseTransport(ABC):
     sending notifications, and listening for incoming messages.
     """
 
+    def __init__(self):
+        self.callbacks: dict[str, Callable] = {}
+        self.notification_handlers: dict[Method, list[Callable]] = {}
+        self.pending: dict[str | int, asyncio.Future] = {}  # Maps request id -> Future
+        self.default_timeout: float = DEFAULT_TIMEOUT
+        self.method_timeouts: dict[Method, float] = {}
+        self.background_tasks: set[asyncio.Task] = set()
+        self.request_tasks: set[asyncio.Task] = set()
+        self.request_semaphore = asyncio.Semaphore(MAX_SERVER_REQUESTS)
+
     def attach_callbacks(self, callbacks:dict[str,Callable]):
         self.callbacks = callbacks
 
+    def on_notification(self, method: Method, handler: Callable) -> None:
+        """
+        Register a handler for a server notification.
+
+        Args:
+            method: The notification method to listen for
+            handler: Sync or async callable receiving the JSONRPCNotification
+        """
+        self.notification_handlers.setdefault(method, []).append(handler)
+
+    def add_pending(self, request_id: str | int) -> asyncio.Future:
+        """
+        Register an in-flight request and return the future its response resolves.
+
+        Args:
+            request_id: The id of the outgoing request
+
+        Returns:
+            The future awaiting the response
+
+        Raises:
+            MCPError: If a request with the same id is already in flight.
+        """
+        if request_id in self.pending:
+            raise MCPError(code=-1, message=f"Request id {request_id} already in flight")
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        return future
+
+    def resolve_pending(self, request_id: str | int | None, message: Any) -> None:
+        """
+        Resolve the in-flight request matching the response id, ignoring unknown ids.
+
+        Args:
+            request_id: The id of the incoming response
+            message: The JSONRPCResponse or JSONRPCError received
+        """
+        future = self.pending.pop(request_id, None)
+        if future and not future.done():
+            future.set_result(message)
+
+    def fail_pending(self, request_id: str | int, error: Exception) -> None:
+        """
+        Fail the in-flight request with the given error, used when its response can never arrive.
+
+        Args:
+            request_id: The id of the outgoing request
+            error: The exception raised to the caller
+        """
+        future = self.pending.pop(request_id, None)
+        if future and not future.done():
+            future.set_exception(error)
+
+    def set_timeout(self, timeout: float, method: Method | str | None = None) -> None:
+        """
+        Set the response timeout of every request, or of one method.
+
+        Args:
+            timeout: Seconds to wait for a response
+            method: The method the timeout applies to, None for the default
+        """
+        if method is None:
+            self.default_timeout = timeout
+        else:
+            self.method_timeouts[Method(method)] = timeout
+
+    def request_timeout(self, request: JSONRPCRequest, timeout: float | None = None) -> float:
+        """
+        Resolve the timeout of a request: the per-call timeout, else the method's, else the default,
+        capped by the remaining time of the current deadline.
+
+        Raises:
+            MCPError: If the deadline has already passed.
+        """
+        if timeout is None:
+            timeout = self.method_timeouts.get(request.method, self.default_timeout)
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise MCPError(code=-1, message=f"Deadline exceeded before sending {request.method}")
+            timeout = min(timeout, remaining)
+        return timeout
+
+    async def send_cancelled(self, request_id: str | int, reason: str) -> None:
+        """
+        Tell the server to stop working on a request we no longer wait for, giving up after CANCEL_TIMEOUT.
+        """
+        notification = JSONRPCNotification(
+            method=Method.NOTIFICATION_CANCELLED,
+            params={"requestId": request_id, "reason": reason},
+        )
+        try:
+            await asyncio.wait_for(self.send_notification(notification), timeout=CANCEL_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Could not cancel request {request_id}: {e}")
+
+    def cancel_in_background(self, request_id: str | int, reason: str) -> None:
+        """
+        Send notifications/cancelled from a separate task, so the caller is not held up by a slow server.
+        """
+        task = asyncio.create_task(self.send_cancelled(request_id, reason))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def wait_response(self, request: JSONRPCRequest, future: asyncio.Future, timeout: float) -> Any:
+        """
+        Wait for the response of a sent request, cancelling it on the server on timeout or cancellation.
+
+        Args:
+            request: The sent request
+            future: The future returned by add_pending
+            timeout: Seconds to wait, see request_timeout
+
+        Raises:
+            MCPError: If the request times out.
+        """
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.cancel_in_background(request.id, f"Request timed out after {timeout:.2f}s")
+            raise MCPError(code=-1, message="Request timed out")
+        except asyncio.CancelledError:
+            self.cancel_in_background(request.id, "Request cancelled by the client")
+            raise
+        finally:
+            self.pending.pop(request.id, None)
+
+    def cancel_pending(self) -> None:
+        """
+        Cancel every in-flight request, used when the connection goes away.
+        """
+        for future in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+        for task in self.request_tasks:
+            task.cancel()
+        self.request_tasks.clear()
+
     @abstractmethod
     async def connect(self) -> None:
         """
@@ -33,13 +234,14 @@ class BaseTransport(ABC):
 
     @abstractmethod
     async def send_request(
-        self, request: JSONRPCRequest
+        self, request: JSONRPCRequest, timeout: float | None = None
     ) -> JSONRPCResponse | JSONRPCError | None:
         """
         Send a JSON-RPC request to the MCP server and wait for a response.
 
         Args:
             request: JSONRPCRequest object
+            timeout: Seconds to wait for this call, overrides the method's timeout
 
         Returns:
             JSONRPCResponse or JSONRPCError
@@ -60,7 +262,71 @@ class BaseTransport(ABC):
         """
         pass
 
-    @abstractmethod
+    async def send_response(self, response: JSONRPCResponse | JSONRPCError) -> None:
+        """
+        Send the response of a server-initiated request back to the MCP server.
+
+        Args:
+            response: JSONRPCResponse or JSONRPCError object
+        """
+        raise MCPError(code=-1, message=f"{type(self).__name__} does not support server requests")
+
+    async def dispatch(self, content: dict) -> None:
+        """
+        Route one decoded message from the MCP server.
+
+        Responses are built with model_construct, so their result stays the raw decoded dict
+        and is validated once, when the caller asks for its typed form (see JSONRPCResponse.result_as).
+
+        Args:
+            content: The decoded JSON-RPC message
+        """
+        message_id = content.get("id")
+        method = content.get("method")
+        if "result" in content: # Response
+            response = JSONRPCResponse.model_construct(id=message_id, result=content["result"])
+            self.resolve_pending(message_id, response)
+        elif "error" in content: # Error
+            error = Error.model_validate(content["error"])
+            self.resolve_pending(message_id, JSONRPCError(id=message_id, error=error, message=error.message))
+        elif "method" in content and "id" not in content: # Notification
+            if method not in Method._value2member_map_:
+                # Notifications need no answer, so one this client does not know is dropped
+                logger.debug(f"Ignoring unknown notification: {method}")
+                return
+            notification = JSONRPCNotification.model_validate(content)
+            await self.recieved_notification(notification)
+        elif "method" in content: # Request
+            if method in Method._value2member_map_:
+                request = JSONRPCRequest.model_validate(content)
+            else:
+                # Left unvalidated, recieved_request answers it with "Method not found"
+                request = JSONRPCRequest.model_construct(id=message_id, method=method, params=content.get("params"))
+            # Callbacks may run a full LLM call, so they never block the read loop
+            task = asyncio.create_task(self.handle_request(request))
+            self.request_tasks.add(task)
+            task.add_done_callback(self.request_tasks.discard)
+
+    async def handle_request(self, request: JSONRPCRequest) -> None:
+        """
+        Answer a server-initiated request, at most MAX_SERVER_REQUESTS at once.
+        Failures are sent back to the server as JSON-RPC errors.
+
+        Args:
+            request: JSONRPCRequest object
+        """
+        async with self.request_semaphore:
+            try:
+                response = await self.recieved_request(request)
+            except MCPError as e:
+                response = JSONRPCError(id=request.id, error=Error(code=e.code, message=e.message))
+            except Exception as e:
+                response = JSONRPCError(id=request.id, error=Error(code=-32603, message=str(e)))
+        try:
+            await self.send_response(response)
+        except Exception as e:
+            logger.warning(f"Error sending response to {request.method}: {e}")
+
     async def recieved_request(self, request: JSONRPCRequest) -> JSONRPCResponse:
         """
         Receive a JSON-RPC request from the MCP server and await response.
@@ -71,4 +337,50 @@ class BaseTransport(ABC):
         Returns:
             JSONRPCResponse
         """
-        pass
+        match request.method:
+            case Method.SAMPLING_CREATE_MESSAGE:
+                params=MessageRequest.model_validate(request.params)
+                sampling_callback = self.callbacks.get("sampling")
+                if sampling_callback is None:
+                    raise Exception("Sampling callback not found")
+                result=await sampling_callback(params=params)
+                return JSONRPCResponse(id=request.id,result=self.dump_result(result))
+
+            case Method.ELICITATION_CREATE:
+                params=ElicitRequest.model_validate(request.params)
+                elicitation_callback = self.callbacks.get("elicitation")
+                if elicitation_callback is None:
+                    raise Exception("Elicitation callback not found")
+                result=await elicitation_callback(params=params)
+                return JSONRPCResponse(id=request.id,result=self.dump_result(result))
+
+            case Method.ROOTS_LIST:
+                params=ListRootsRequest.model_validate(request.params)
+                list_roots_callback = self.callbacks.get("list_roots")
+                if list_roots_callback is None:
+                    raise Exception("List roots callback not found")
+                result=await list_roots_callback(params=params)
+                return JSONRPCResponse(id=request.id,result=self.dump_result(result))
+
+            case _:
+                raise MCPError(code=-32601, message=f"Method not found: {request.method}")
+
+    def dump_result(self, result: Any) -> Any:
+        """
+        Convert a callback result to the plain dict sent over the wire.
+        """
+        if isinstance(result, BaseModel):
+            return result.model_dump(exclude_none=True)
+        return result
+
+    async def recieved_notification(self, notification: JSONRPCNotification) -> None:
+        """
+        Receive a JSON-RPC notification from the MCP server and route it to the registered handlers.
+
+        Args:
+            notification: JSONRPCNotification object
+        """
+        for handler in self.notification_handlers.get(notification.method, []):
+            result = handler(notification)
+            if inspect.isawaitable(result):
+                await result
@@ -1,12 +1,15 @@
-from src.mcp.types.json_rpc import JSONRPCRequest, JSONRPCError, Error, JSONRPCResponse
+from src.mcp.types.json_rpc import JSONRPCRequest, JSONRPCError, JSONRPCResponse
 from src.mcp.transport.base import BaseTransport
+from src.mcp.transport.utils import json_loads
 from httpx import AsyncClient, Limits
 from httpx_sse import aconnect_sse
 from src.mcp.exception import MCPError
 from urllib.parse import urljoin
 from typing import Optional
 import asyncio
-import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class SSETransport(BaseTransport):
@@ -15,13 +18,13 @@ class SSETransport(BaseTransport):
     """
 
     def __init__(self, url: str, headers: Optional[dict[str, str]] = None):
+        super().__init__()
         self.url = url
         self.session_url = None
         self.headers = headers or {}
         self.client: AsyncClient | None = None
         self.listen_task: asyncio.Task | None = None
         self.ready_event = asyncio.Event()
-        self.pending: dict[str, asyncio.Future] = {}  # Maps request id -> Future
 
     async def connect(self):
         """Create SSE Client and wait until endpoint is ready."""
@@ -29,28 +32,27 @@ class SSETransport(BaseTransport):
         self.listen_task = asyncio.create_task(self.listen())
         await self.ready_event.wait()
 
-    async def send_request(self, request: JSONRPCRequest) -> JSONRPCResponse:
+    async def send_request(self, request: JSONRPCRequest, timeout: float | None = None) -> JSONRPCResponse:
         """
         Send JSON-RPC request and wait for its response.
         """
         if not self.session_url:
             raise MCPError(code=-1, message="Session not initialized.")
 
-        future = asyncio.get_event_loop().create_future()
-        self.pending[str(request.id)] = future
+        timeout = self.request_timeout(request, timeout)
+        future = self.add_pending(request.id)
 
         headers = {
             **self.headers,
             "Content-Type": "application/json",
         }
 
-        await self.client.post(self.session_url, headers=headers, json=request.model_dump())
-
         try:
-            response = await asyncio.wait_for(future, timeout=30)
-        except asyncio.TimeoutError:
-            self.pending.pop(str(request.id), None)
-            raise MCPError(code=-1, message="Request timed out.")
+            await self.client.post(self.session_url, headers=headers, json=request.model_dump())
+        except BaseException:
+            self.pending.pop(request.id, None)
+            raise
+        response = await self.wait_response(request, future, timeout)
 
         if isinstance(response, JSONRPCError):
             raise MCPError(code=response.error.code, message=response.error.message)
@@ -67,6 +69,16 @@ class SSETransport(BaseTransport):
         }
         await self.client.post(self.session_url, headers=headers, json=notification.model_dump())
 
+    async def send_response(self, response: JSONRPCResponse | JSONRPCError):
+        """Send the response of a server request."""
+        if not self.session_url:
+            raise MCPError(code=-1, message="Session not initialized.")
+        headers = {
+            **self.headers,
+            "Content-Type": "application/json",
+        }
+        await self.client.post(self.session_url, headers=headers, json=response.model_dump(exclude_none=True))
+
     async def listen(self):
         """Listen for messages from the MCP server."""
         async with aconnect_sse(self.client, "GET", self.url) as iter:
@@ -77,23 +89,10 @@ class SSETransport(BaseTransport):
                         self.ready_event.set()
 
                     elif obj.event == "message":
-                        content = json.loads(obj.data)
-                        message_id = str(content.get("id"))
-
-                        if "result" in content:
-                            message = JSONRPCResponse.model_validate(content)
-                        elif "error" in content:
-                            error = Error.model_validate(content["error"])
-                            message = JSONRPCError(id=message_id, error=error, message=error.message)
-                        else:
-                            continue
-
-                        future = self.pending.pop(message_id, None)
-                        if future and not future.done():
-                            future.set_result(message)
+                        await self.dispatch(json_loads(obj.data))
 
                 except Exception as e:
-                    print(f"Error processing SSE message: {e}")
+                    logger.warning(f"Error processing SSE message: {e}")
 
     async def disconnect(self):
         """Gracefully close connection."""
@@ -111,7 +110,4 @@ class SSETransport(BaseTransport):
             self.client = None
 
         # Cancel all pending futures
-        for fut in self.pending.values():
-            if not fut.done():
-                fut.cancel()
-        self.pending.clear()
+        self.cancel_pending()
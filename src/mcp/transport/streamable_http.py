@@ -3,121 +3,195 @@ from src.mcp.types.json_rpc import (
     JSONRPCNotification,
     JSONRPCResponse,
     JSONRPCError,
-    Error,
     Method,
 )
+from src.mcp.transport.utils import json_dumps, json_loads
+from httpx import AsyncClient, Limits, Timeout, Response, HTTPError
 from src.mcp.transport.base import BaseTransport
+from httpx_sse import EventSource
 from src.mcp.exception import MCPError
-from httpx import AsyncClient, Limits
-from typing import Optional, Dict
+from typing import Optional, Any
 import asyncio
-import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Attempts to resume a broken event stream with Last-Event-ID before giving up
+MAX_RESUME_ATTEMPTS = 3
+# Notifications, responses and the session DELETE are answered at once, so every phase is bounded
+MESSAGE_TIMEOUT = Timeout(10)
+# Event streams stay open as long as the server needs, so their reads are not bounded
+STREAM_TIMEOUT = Timeout(10, read=None)
 
 
 class StreamableHTTPTransport(BaseTransport):
     """
-    HTTP transport supporting streaming JSON-RPC responses
-    using asyncio.Future for one-shot request/response handling.
+    Streamable HTTP Transport for MCP.
+
+    Every message is POSTed to the endpoint. The server answers a request either inline with
+    an application/json body or with a text/event-stream that carries the response (and any
+    server messages sent before it). A broken event stream is resumed with Last-Event-ID.
+    After initialization an optional GET stream receives server-initiated messages.
+    All traffic shares one keep-alive connection pool.
     """
 
     def __init__(self, url: str, headers: Optional[dict[str, str]] = None):
+        super().__init__()
         self.url = url
         self.headers = headers or {}
         self.mcp_session_id = None
         self.protocol_version = None
         self.client: Optional[AsyncClient] = None
         self.listen_task: Optional[asyncio.Task] = None
-        self.pending: Dict[str, asyncio.Future] = {}
+        self.stream_tasks: set[asyncio.Task] = set()
 
     async def connect(self):
-        """Create an HTTP client and start the listener."""
+        """Create the pooled HTTP client, the GET stream starts once the session is initialized."""
         self.client = AsyncClient(
-            timeout=10,
+            timeout=MESSAGE_TIMEOUT,
             headers=self.headers,
-            limits=Limits(max_connections=10),
+            limits=Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=30),
         )
-        self.listen_task = asyncio.create_task(self.listen())
 
-    async def listen(self):
+    def request_headers(self, accept: str = "application/json, text/event-stream") -> dict[str, str]:
+        headers = {
+            **self.headers,
+            "Content-Type": "application/json",
+            "Accept": accept,
+        }
+        if self.mcp_session_id:
+            headers["mcp-session-id"] = self.mcp_session_id
+        if self.protocol_version:
+            headers["mcp-protocol-version"] = self.protocol_version
+        return headers
+
+    async def dispatch_body(self, content: Any):
+        """Dispatch a decoded body, which may be a JSON-RPC batch."""
+        for message in content if isinstance(content, list) else [content]:
+            await self.dispatch(message)
+
+    async def consume_stream(self, response: Response, request_id: str | int | None = None):
+        """
+        Dispatch the messages of an event stream, resuming it with Last-Event-ID if it breaks
+        before the response to `request_id` arrived.
+        """
+        last_event_id = None
+        retry = 1.0
+        attempt = 0
+        while True:
+            try:
+                async for event in EventSource(response).aiter_sse():
+                    if event.id:
+                        last_event_id = event.id
+                    if event.retry:
+                        retry = event.retry / 1000
+                    if event.event == "message" and event.data:
+                        await self.dispatch_body(json_loads(event.data))
+                return
+            except HTTPError:
+                if last_event_id is None or request_id not in self.pending or attempt == MAX_RESUME_ATTEMPTS:
+                    raise
+            finally:
+                # The first response belongs to the caller, resumed ones are closed here
+                if attempt > 0:
+                    await response.aclose()
+            attempt += 1
+            await asyncio.sleep(retry)
+            headers = {**self.request_headers(accept="text/event-stream"), "Last-Event-ID": last_event_id}
+            response = await self.client.send(self.client.build_request("GET", self.url, headers=headers, timeout=STREAM_TIMEOUT), stream=True)
+            if response.status_code != 200:
+                await response.aclose()
+                raise MCPError(code=-1, message=f"Failed to resume stream: HTTP {response.status_code}")
+
+    async def post(self, message: dict, request_id: str | int | None = None):
         """
-        Persistent stream listener for JSON-RPC responses.
-        Keeps connection open and dispatches responses to pending Futures.
+        POST one message and dispatch whatever the server answers with.
+        Only a request may be answered with an event stream, so only its reads wait unbounded.
         """
+        timeout = MESSAGE_TIMEOUT if request_id is None else STREAM_TIMEOUT
+        request = self.client.build_request("POST", self.url, headers=self.request_headers(), content=json_dumps(message), timeout=timeout)
+        response = await self.client.send(request, stream=True)
         try:
-            async with self.client.stream("GET", self.url, headers=self.headers) as response:
-                if self.mcp_session_id is None:
-                    self.mcp_session_id = response.headers.get("mcp-session-id")
-
-                buffer = bytearray()
-
-                async for chunk in response.aiter_bytes():
-                    buffer.extend(chunk)
-                    try:
-                        decoded = buffer.decode(errors="ignore").strip()
-                        for raw in decoded.splitlines():
-                            if not raw.strip():
-                                continue
-                            try:
-                                content = json.loads(raw)
-                            except json.JSONDecodeError:
-                                continue
-
-                            print(content)
-                            msg_id = content.get("id")
-                            message = None
-
-                            if "result" in content:
-                                message = JSONRPCResponse.model_validate(content)
-                            elif "error" in content:
-                                err = Error.model_validate(content["error"])
-                                message = JSONRPCError(
-                                    id=msg_id,
-                                    error=err,
-                                    message=err.message,
-                                )
-
-                            # Resolve pending Future
-                            if msg_id in self.pending:
-                                fut = self.pending.pop(msg_id)
-                                if not fut.done():
-                                    fut.set_result(message)
-
-                            buffer.clear()
-
-                    except Exception as e:
-                        print(f"[Stream Parse Error] {e}")
-                        continue
+            if self.mcp_session_id is None and response.headers.get("mcp-session-id"):
+                self.mcp_session_id = response.headers["mcp-session-id"]
+            if response.status_code == 404 and self.mcp_session_id:
+                raise MCPError(code=-1, message="MCP session expired")
+            if response.status_code >= 400:
+                await response.aread()
+                raise MCPError(code=-1, message=f"HTTP {response.status_code}: {response.text}")
+            if response.status_code == 202 or request_id is None:
+                return
+            content_type = response.headers.get("content-type", "").partition(";")[0].strip()
+            if content_type == "text/event-stream":
+                await self.consume_stream(response, request_id)
+            elif content_type == "application/json":
+                await self.dispatch_body(json_loads(await response.aread()))
+            else:
+                raise MCPError(code=-1, message=f"Unexpected content type: {content_type}")
+        finally:
+            await response.aclose()
+
+    async def post_request(self, request: JSONRPCRequest):
+        try:
+            await self.post(request.model_dump(exclude_none=True), request_id=request.id)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"[Listen Error] {e}")
+            self.fail_pending(request.id, e if isinstance(e, MCPError) else MCPError(code=-1, message=str(e)))
+        else:
+            if request.id in self.pending:
+                self.fail_pending(request.id, MCPError(code=-1, message="Server closed the response without answering"))
 
-    async def send_request(self, request: JSONRPCRequest) -> JSONRPCResponse:
+    async def listen(self):
+        """
+        GET stream for server-initiated messages, reconnected with Last-Event-ID while the transport is open.
+        Servers that do not offer it answer 405 and the listener stops.
+        """
+        last_event_id = None
+        retry = 1.0
+        while self.client:
+            headers = self.request_headers(accept="text/event-stream")
+            if last_event_id:
+                headers["Last-Event-ID"] = last_event_id
+            try:
+                async with self.client.stream("GET", self.url, headers=headers, timeout=STREAM_TIMEOUT) as response:
+                    if response.status_code != 200:
+                        return
+                    async for event in EventSource(response).aiter_sse():
+                        if event.id:
+                            last_event_id = event.id
+                        if event.retry:
+                            retry = event.retry / 1000
+                        if event.event == "message" and event.data:
+                            try:
+                                await self.dispatch_body(json_loads(event.data))
+                            except Exception as e:
+                                logger.warning(f"Error processing stream message: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stream listener error: {e}")
+            await asyncio.sleep(retry)
+
+    async def send_request(self, request: JSONRPCRequest, timeout: float | None = None) -> JSONRPCResponse:
         """
         Send a JSON-RPC request and await its response via Future.
         """
         if not self.client:
             raise MCPError(code=-1, message="HTTP client not connected")
 
-        future = asyncio.get_event_loop().create_future()
-        self.pending[request.id] = future
-
-        headers = {
-            **self.headers,
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream",
-        }
-
-        if self.mcp_session_id:
-            headers["mcp-session-id"] = self.mcp_session_id
-        if self.protocol_version:
-            headers["mcp-protocol-version"] = self.protocol_version
-
-        await self.client.post(self.url, headers=headers, json=request.model_dump())
+        timeout = self.request_timeout(request, timeout)
+        future = self.add_pending(request.id)
 
+        task = asyncio.create_task(self.post_request(request))
+        self.stream_tasks.add(task)
+        task.add_done_callback(self.stream_tasks.discard)
         try:
-            response = await asyncio.wait_for(future, timeout=30)
-        except asyncio.TimeoutError:
-            self.pending.pop(request.id, None)
-            raise MCPError(code=-1, message="Request timed out")
+            response = await self.wait_response(request, future, timeout)
+        finally:
+            # Closes the response stream if the call timed out or was cancelled
+            if not task.done():
+                task.cancel()
 
         if isinstance(response, JSONRPCError):
             raise MCPError(code=response.error.code, message=response.error.message)
@@ -133,16 +207,18 @@ class StreamableHTTPTransport(BaseTransport):
         if not self.client:
             raise MCPError(code=-1, message="HTTP client not connected")
 
-        headers = {
-            **self.headers,
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream",
-        }
+        await self.post(notification.model_dump(exclude_none=True))
 
-        if self.mcp_session_id:
-            headers["mcp-session-id"] = self.mcp_session_id
+        # The session is ready, so open the stream for server-initiated messages
+        if notification.method == Method.NOTIFICATION_INITIALIZED and self.listen_task is None:
+            self.listen_task = asyncio.create_task(self.listen())
+
+    async def send_response(self, response: JSONRPCResponse | JSONRPCError):
+        """Send the response of a server request."""
+        if not self.client:
+            raise MCPError(code=-1, message="HTTP client not connected")
 
-        await self.client.post(self.url, headers=headers, json=notification.model_dump())
+        await self.post(response.model_dump(exclude_none=True))
 
     async def disconnect(self):
         """Gracefully close the session and cancel pending Futures."""
@@ -155,25 +231,22 @@ class StreamableHTTPTransport(BaseTransport):
             finally:
                 self.listen_task = None
 
+        for task in list(self.stream_tasks):
+            task.cancel()
+        self.stream_tasks.clear()
+
         if self.client:
-            headers = {
-                **self.headers,
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            }
-            if self.mcp_session_id:
-                headers["mcp-session-id"] = self.mcp_session_id
             try:
-                await self.client.delete(self.url, headers=headers)
+                if self.mcp_session_id:
+                    await self.client.delete(self.url, headers=self.request_headers(accept="application/json"))
+            except HTTPError:
+                pass
             finally:
                 await self.client.aclose()
                 self.client = None
 
         # Cancel pending futures
-        for fut in self.pending.values():
-            if not fut.done():
-                fut.cancel()
-        self.pending.clear()
+        self.cancel_pending()
 
         self.mcp_session_id = None
         self.protocol_version = None
@@ -1,3 +1,5 @@
+from typing import Any
+import json
 import os
 import sys
 
@@ -25,4 +27,41 @@ def get_default_environment() -> dict[str, str]:
         for key in DEFAULT_INHERITED_ENV_VARS
         if (value := os.environ.get(key)) and not value.startswith("()")
     }
-    return env
\ No newline at end of file
+    return env
+
+try:
+    # Optional faster JSON backend, picked once at import time
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_loads(data: bytes | bytearray | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+class LineBuffer:
+    """
+    Newline-delimited framing for a byte stream.
+    Every complete line is returned exactly once and the partial tail is kept for the next chunk.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list[bytearray]:
+        # Only the new chunk is scanned, so a huge message costs linear time overall
+        end = chunk.rfind(b"\n")
+        if end == -1:
+            self.buffer.extend(chunk)
+            return []
+        self.buffer.extend(chunk[:end])
+        lines = self.buffer.split(b"\n")
+        self.buffer = bytearray(chunk[end + 1:])
+        return [line for line in lines if line.strip()]
@@ -1,23 +1,28 @@
-from src.mcp.types.json_rpc import JSONRPCRequest, JSONRPCResponse, JSONRPCError, Error
+from src.mcp.types.json_rpc import JSONRPCRequest, JSONRPCResponse, JSONRPCError
+from src.mcp.transport.base import BaseTransport
+from src.mcp.transport.utils import json_loads
 from src.mcp.exception import MCPError
-from typing import Optional, Dict
+from typing import Optional
 import websockets
 import asyncio
+import logging
 import json
 
+logger = logging.getLogger(__name__)
 
-class WebSocketTransport:
+
+class WebSocketTransport(BaseTransport):
     """
     WebSocket Transport for MCP
     Uses asyncio.Future for one-shot request/response correlation.
     """
 
     def __init__(self, url: str, headers: Optional[dict[str, str]] = None):
+        super().__init__()
         self.url = url
         self.headers = headers or {}
         self.websocket: Optional[websockets.ClientConnection] = None
         self.listen_task: Optional[asyncio.Task] = None
-        self.pending: Dict[str, asyncio.Future] = {}  # request.id -> Future
 
     async def connect(self):
         """Create a WebSocket client and start listening."""
@@ -33,48 +38,31 @@ class WebSocketTransport:
         try:
             async for data in self.websocket:
                 try:
-                    content: dict = json.loads(data)
-                    msg_id = content.get("id")
-
-                    if "result" in content:
-                        message = JSONRPCResponse.model_validate(content)
-                    elif "error" in content:
-                        err = Error.model_validate(content["error"])
-                        message = JSONRPCError(id=msg_id, error=err, message=err.message)
-                    else:
-                        # Ignore notifications or invalid messages for now
-                        continue
-
-                    # Resolve the corresponding pending future
-                    future = self.pending.pop(msg_id, None)
-                    if future and not future.done():
-                        future.set_result(message)
-
+                    await self.dispatch(json_loads(data))
                 except Exception as e:
-                    print(f"Error parsing WebSocket message: {e}")
+                    logger.warning(f"Error parsing WebSocket message: {e}")
 
         except websockets.exceptions.ConnectionClosed:
-            print("WebSocket connection closed.")
+            logger.info("WebSocket connection closed.")
         except Exception as e:
-            print(f"WebSocket listen error: {e}")
+            logger.error(f"WebSocket listen error: {e}")
 
-    async def send_request(self, request: JSONRPCRequest) -> JSONRPCResponse:
+    async def send_request(self, request: JSONRPCRequest, timeout: float | None = None) -> JSONRPCResponse:
         """
         Send a JSON-RPC request and wait for its response.
         """
         if not self.websocket:
             raise MCPError(code=-1, message="WebSocket not connected")
 
-        future = asyncio.get_event_loop().create_future()
-        self.pending[request.id] = future
-
-        await self.websocket.send(json.dumps(request.model_dump()))
+        timeout = self.request_timeout(request, timeout)
+        future = self.add_pending(request.id)
 
         try:
-            response = await asyncio.wait_for(future, timeout=30)
-        except asyncio.TimeoutError:
+            await self.websocket.send(json.dumps(request.model_dump()))
+        except BaseException:
             self.pending.pop(request.id, None)
-            raise MCPError(code=-1, message="Request timed out")
+            raise
+        response = await self.wait_response(request, future, timeout)
 
         if isinstance(response, JSONRPCError):
             raise MCPError(code=response.error.code, message=response.error.message)
@@ -90,6 +78,15 @@ class WebSocketTransport:
 
         await self.websocket.send(json.dumps(notification.model_dump()))
 
+    async def send_response(self, response: JSONRPCResponse | JSONRPCError):
+        """
+        Send the response of a server request.
+        """
+        if not self.websocket:
+            raise MCPError(code=-1, message="WebSocket not connected")
+
+        await self.websocket.send(json.dumps(response.model_dump(exclude_none=True)))
+
     async def disconnect(self):
         """Gracefully close the WebSocket connection."""
         if self.listen_task:
@@ -106,7 +103,4 @@ class WebSocketTransport:
             self.websocket = None
 
         # Cancel any unresolved Futures
-        for fut in self.pending.values():
-            if not fut.done():
-                fut.cancel()
-        self.pending.clear()
+        self.cancel_pending()
@@ -1,7 +1,13 @@
-from pydantic import BaseModel,Field,ConfigDict
+from pydantic import BaseModel,Field,ConfigDict,TypeAdapter
+from functools import lru_cache
 from typing import Optional,Any
 from enum import Enum
 
+@lru_cache(maxsize=None)
+def type_adapter(type_:Any)->TypeAdapter:
+    '''Build the TypeAdapter of a type once and reuse it'''
+    return TypeAdapter(type_)
+
 class JSONRPCRequest(BaseModel):
     jsonrpc: str=Field(default="2.0")
     id: Optional[str|int]=None
@@ -22,6 +28,11 @@ class JSONRPCResponse(BaseModel):
 
     model_config=ConfigDict(extra='allow')
 
+    def result_as(self,type_:Any,key:Optional[str]=None)->Any:
+        '''Validate the raw result, or one key of it, into the given type'''
+        data=self.result if key is None else (self.result or {}).get(key)
+        return type_adapter(type_).validate_python(data)
+
 class JSONRPCError(BaseModel):
     jsonrpc: str=Field(default="2.0")
     id: Optional[str|int]=None
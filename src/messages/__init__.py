@@ -1,4 +1,4 @@
-from src.messages.service import BaseMessage,SystemMessage,HumanMessage,AIMessage,ImageMessage
+from src.messages.service import BaseMessage,SystemMessage,HumanMessage,AIMessage,ImageMessage,estimate_tokens
 
 __all__=[
     'BaseMessage',
@@ -6,4 +6,5 @@ __all__=[
     'HumanMessage',
     'ImageMessage',
     'AIMessage',
+    'estimate_tokens',
 ]
\ No newline at end of file
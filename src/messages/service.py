@@ -1,6 +1,7 @@
 from typing import Literal, Union, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from PIL.Image import Image
+import PIL.Image
 from io import BytesIO
 import base64
 
@@ -28,6 +29,13 @@ class HumanMessage(BaseMessage):
 class ImageMessage(HumanMessage):
     images: List[Union[Image, bytes, str]] = Field(default_factory=list)
     mime_type: str = "image/png"
+    # Longest side in pixels the images are sent at
+    max_size: int = 1568
+    # Encodings of the prepared images, computed once and reused by every serialization
+    _prepared_from: list | None = PrivateAttr(default=None)
+    _encoded: List[bytes] = PrivateAttr(default_factory=list)
+    _base64: List[str] | None = PrivateAttr(default=None)
+    _data_urls: List[str] | None = PrivateAttr(default=None)
 
     def _to_pillow(self, image: Union[Image, bytes, str]) -> Image:
         """Convert one image (any format) to a Pillow Image."""
@@ -92,6 +100,49 @@ class ImageMessage(HumanMessage):
             scaled.append(image.resize(size))
         self.images = scaled
 
+    def _prepare(self, image: Union[Image, bytes, str]) -> bytes:
+        """Encode one image, resizing it only when it exceeds max_size."""
+        if isinstance(image, Image):
+            pillow = image
+        else:
+            data = self._to_bytes(image)
+            # Only the header is read here, the pixels are decoded when resizing
+            pillow = PIL.Image.open(BytesIO(data))
+            fmt = self.mime_type.split("/")[-1].upper()
+            if max(pillow.size) <= self.max_size and (pillow.format or "").upper() == fmt.replace("JPG", "JPEG"):
+                return data
+        if max(pillow.size) > self.max_size:
+            pillow = pillow.copy()
+            pillow.thumbnail((self.max_size, self.max_size))
+        return self._to_bytes(pillow)
+
+    def prepare_images(self) -> List[bytes]:
+        """Resize and encode the images once, later calls reuse the result."""
+        if self._prepared_from is not self.images:
+            self._encoded = [self._prepare(image) for image in self.images]
+            self._base64 = None
+            self._data_urls = None
+            self._prepared_from = self.images
+        return self._encoded
+
+    def image_bytes(self) -> List[bytes]:
+        """Prepared images as raw bytes."""
+        return self.prepare_images()
+
+    def image_base64(self) -> List[str]:
+        """Prepared images as base64 strings."""
+        encoded = self.prepare_images()
+        if self._base64 is None:
+            self._base64 = [base64.b64encode(data).decode("utf-8") for data in encoded]
+        return self._base64
+
+    def image_data_urls(self) -> List[str]:
+        """Prepared images as base64 data URLs."""
+        encoded = self.image_base64()
+        if self._data_urls is None:
+            self._data_urls = [f"data:{self.mime_type};base64,{data}" for data in encoded]
+        return self._data_urls
+
     def __repr__(self) -> str:
         types = [type(i).__name__ for i in self.images]
         return f"ImageMessage(content={self.content!r}, images={types}, mime_type={self.mime_type})"
@@ -101,4 +152,18 @@ class AIMessage(BaseMessage):
     content: str
 
     def __repr__(self) -> str:
-        return f"AIMessage(content={self.content})"
\ No newline at end of file
+        return f"AIMessage(content={self.content})"
+
+# Rough cost of one image across providers
+IMAGE_TOKENS = 765
+# Per message overhead of the role and separators
+MESSAGE_TOKENS = 4
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    '''Estimate the prompt size locally, about 4 characters per token'''
+    tokens = 0
+    for message in messages:
+        tokens += MESSAGE_TOKENS + len(message.content or '') // 4
+        if isinstance(message, ImageMessage):
+            tokens += IMAGE_TOKENS * len(message.images)
+    return tokens
\ No newline at end of file
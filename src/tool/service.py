@@ -2,9 +2,13 @@ from pydantic import BaseModel
 from typing import Callable
 
 class Tool:
-    def __init__(self, name: str|None=None, description: str|None=None, args_schema:BaseModel|dict|None=None, func: Callable|None=None):
+    def __init__(self, name: str|None=None, description: str|None=None, args_schema:BaseModel|dict|None=None, func: Callable|None=None, server: str|None=None, annotations: BaseModel|None=None):
         self.name = name
         self.description = description
+        # Name of the MCP server providing the tool, None for built-in tools
+        self.server = server
+        # Behaviour hints of an MCP tool (readOnlyHint, idempotentHint, ...), None for built-in tools
+        self.annotations = annotations
         # Handle BaseModel subclass or instance; otherwise keep dict schema
         if isinstance(args_schema, type) and issubclass(args_schema, BaseModel):
             self.model = args_schema
@@ -39,6 +43,13 @@ class Tool:
         self.function = function
         return self
     
+    @property
+    def repeatable(self) -> bool:
+        # MCP tools annotated read-only or idempotent, running them again has no further effect
+        if self.server is None or self.annotations is None:
+            return False
+        return bool(getattr(self.annotations, 'readOnlyHint', None) or getattr(self.annotations, 'idempotentHint', None))
+
     def invoke(self, *args, **kwargs):
         return self.function(*args, **kwargs)
     
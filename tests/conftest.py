@@ -0,0 +1,60 @@
+'''Fakes shared by the tests: a scripted LLM, recording MCP tools and an agent wired to them'''
+from src.llms.views import ChatLLMResponse
+from src.mcp.types.tools import Annotations
+from src.mcp.client import MCPClient
+from src.agent import Agent
+from src.tool import Tool
+
+SCHEMA={'type':'object','properties':{'path':{'type':'string'}}}
+
+READ="<Thought>read it</Thought><Action-Name>read_file</Action-Name><Action-Input>{'path':'/a'}</Action-Input>"
+WRITE="<Thought>write it</Thought><Action-Name>write_file</Action-Name><Action-Input>{'path':'/a'}</Action-Input>"
+DONE="<Thought>done</Thought><Action-Name>Done Tool</Action-Name><Action-Input>{'answer':'ok'}</Action-Input>"
+
+class ScriptedLLM:
+    '''Answers with the given responses in order and records the messages of every call.
+
+    The last response repeats once the script runs out, and an exception in the script is raised.
+    '''
+    provider='fake'
+    model_name='fake'
+
+    def __init__(self,responses:list):
+        self.responses=responses
+        self.calls:list[list]=[]
+
+    def next_response(self,messages:list):
+        self.calls.append(messages)
+        response=self.responses[min(len(self.calls),len(self.responses))-1]
+        if isinstance(response,Exception):
+            raise response
+        return response
+
+    def invoke(self,messages,structured_output=None):
+        return ChatLLMResponse(content=self.next_response(messages))
+
+    async def ainvoke(self,messages,structured_output=None):
+        return ChatLLMResponse(content=self.next_response(messages))
+
+    async def astream(self,messages):
+        yield self.next_response(messages)
+
+    async def aclose(self):
+        pass
+
+def make_tool(name:str,calls:list|None=None,server:str|None='fs',description:str|None=None,schema:dict=SCHEMA,**hints)->Tool:
+    '''An MCP tool that records (name, arguments) of every call, annotated with the given hints'''
+    async def func(**kwargs):
+        if calls is not None:
+            calls.append((name,kwargs))
+        return f"{name} {kwargs}"
+    return Tool(name=name,description=description or name,args_schema=schema,func=func,server=server,annotations=Annotations(**hints) if hints else None)
+
+def make_agent(llm,tools:list[Tool]|None=None,**kwargs)->Agent:
+    '''An agent without MCP servers, by default with a read_file and a write_file tool'''
+    agent=Agent(client=MCPClient({'mcpServers':{}}),llm=llm,**kwargs)
+    agent.registry.add_tools(tools if tools is not None else [
+        make_tool('read_file',description='Read the contents of a file'),
+        make_tool('write_file',description='Write text into a file'),
+    ])
+    return agent
\ No newline at end of file
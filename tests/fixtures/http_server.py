@@ -0,0 +1,79 @@
+'''A streamable HTTP MCP server stub served through an httpx MockTransport.
+
+`mode` picks how POSTed requests are answered: "json" inline, "sse" as an event stream, or
+"resume", where the first stream of every tools/call breaks and the answer is only available
+by resuming it with Last-Event-ID. "silent" closes the stream without answering.
+'''
+from src.mcp.transport.streamable_http import StreamableHTTPTransport
+import httpx
+import json
+
+class BrokenStream(httpx.AsyncByteStream):
+    def __init__(self,chunks:list[bytes],fail:bool=False):
+        self.chunks=chunks
+        self.fail=fail
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.fail:
+            raise httpx.ReadError('stream broken')
+
+    async def aclose(self):
+        pass
+
+def event(data:dict,event_id:str)->bytes:
+    return f'id: {event_id}\nevent: message\ndata: {json.dumps(data)}\n\n'.encode()
+
+class StreamableHTTPStub:
+    def __init__(self,mode:str='json',session_id:str='stub-session'):
+        self.mode=mode
+        self.session_id=session_id
+        self.requests:list[httpx.Request]=[]
+        # Responses of broken streams, by the event id they can be resumed from
+        self.resumable:dict[str,dict]={}
+
+    def result(self,message:dict)->dict:
+        if message['method']=='initialize':
+            content={'protocolVersion':'2025-03-26','capabilities':{},'serverInfo':{'name':'stub','version':'1'}}
+        elif message['method']=='tools/call':
+            content={'content':[{'type':'text','text':message['params']['arguments'].get('text','')}]}
+        else:
+            content={}
+        return {'jsonrpc':'2.0','id':message['id'],'result':content}
+
+    def stream(self,chunks:list[bytes],fail:bool=False)->httpx.Response:
+        return httpx.Response(200,headers={'mcp-session-id':self.session_id,'content-type':'text/event-stream'},stream=BrokenStream(chunks,fail))
+
+    async def handler(self,request:httpx.Request)->httpx.Response:
+        self.requests.append(request)
+        if request.method=='DELETE':
+            return httpx.Response(200)
+        if request.method=='GET':
+            if (event_id:=request.headers.get('last-event-id')) in self.resumable:
+                return self.stream([event(self.resumable.pop(event_id),f'{event_id}-1')])
+            return httpx.Response(405)
+        message=json.loads(request.content)
+        if 'id' not in message or 'method' not in message:
+            return httpx.Response(202)
+        response=self.result(message)
+        if self.mode=='json':
+            return httpx.Response(200,headers={'mcp-session-id':self.session_id},json=response)
+        if self.mode=='silent' and message['method']=='tools/call':
+            return self.stream([b': keep-alive\n\n'])
+        if self.mode=='resume' and message['method']=='tools/call':
+            event_id=f"call-{message['id']}"
+            self.resumable[event_id]=response
+            return self.stream([f'id: {event_id}\nretry: 10\n\n'.encode()],fail=True)
+        # A progress notification travels on the same stream ahead of the response
+        notification={'jsonrpc':'2.0','method':'notifications/progress','params':{'progressToken':1,'progress':1}}
+        return self.stream([event(notification,'1'),event(response,'2')])
+
+class StubTransport(StreamableHTTPTransport):
+    '''The streamable HTTP transport with its connection pool served by the stub'''
+    def __init__(self,stub:StreamableHTTPStub):
+        super().__init__('http://stub/mcp')
+        self.stub=stub
+
+    async def connect(self):
+        self.client=httpx.AsyncClient(transport=httpx.MockTransport(self.stub.handler))
\ No newline at end of file
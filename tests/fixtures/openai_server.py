@@ -0,0 +1,50 @@
+'''A local OpenAI-compatible chat completions server that counts the TCP connections it accepts.'''
+import asyncio
+import json
+
+COMPLETION={
+    'id':'chatcmpl-stub',
+    'object':'chat.completion',
+    'created':0,
+    'model':'stub',
+    'choices':[{'index':0,'message':{'role':'assistant','content':'ok'},'finish_reason':'stop'}],
+    'usage':{'prompt_tokens':10,'completion_tokens':1,'total_tokens':11},
+}
+
+class OpenAIServer:
+    def __init__(self):
+        self.server:asyncio.Server|None=None
+        self.connections=0
+        self.requests=0
+
+    @property
+    def url(self)->str:
+        host,port=self.server.sockets[0].getsockname()[:2]
+        return f'http://{host}:{port}/v1'
+
+    async def start(self)->'OpenAIServer':
+        self.server=await asyncio.start_server(self.handle,'127.0.0.1',0)
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self,reader:asyncio.StreamReader,writer:asyncio.StreamWriter):
+        self.connections+=1
+        try:
+            # One keep-alive connection serves requests until the client closes it
+            while request_line:=await reader.readline():
+                headers={}
+                while (line:=await reader.readline()) not in (b'\r\n',b'\n',b''):
+                    name,_,value=line.decode().partition(':')
+                    headers[name.strip().lower()]=value.strip()
+                await reader.readexactly(int(headers.get('content-length',0)))
+                self.requests+=1
+                body=json.dumps(COMPLETION).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: keep-alive\r\n'+f'Content-Length: {len(body)}\r\n\r\n'.encode()+body)
+                await writer.drain()
+        except (ConnectionError,asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
\ No newline at end of file
@@ -0,0 +1,43 @@
+'''A stdio MCP server stub for tests and benchmarks.
+
+The echo tool answers after its `delay` argument from a timer thread, so responses come back
+out of order, and `size` pads the answer to that many characters for large frames.
+'''
+import threading
+import json
+import sys
+
+lock=threading.Lock()
+
+def send(message:dict):
+    with lock:
+        sys.stdout.write(json.dumps(message)+'\n')
+        sys.stdout.flush()
+
+def call_tool(request_id,arguments:dict):
+    text=arguments.get('text','')
+    if size:=arguments.get('size',0):
+        text=text+'x'*(size-len(text))
+    send({'jsonrpc':'2.0','id':request_id,'result':{'content':[{'type':'text','text':text}]}})
+
+TOOLS=[{'name':'echo','description':'Echo the text back','inputSchema':{'type':'object','properties':{'text':{'type':'string'},'delay':{'type':'number'},'size':{'type':'integer'}}}}]
+
+for line in sys.stdin:
+    message=json.loads(line)
+    request_id,method=message.get('id'),message.get('method')
+    if request_id is None or method is None:
+        continue
+    if method=='initialize':
+        send({'jsonrpc':'2.0','id':request_id,'result':{'protocolVersion':'2024-11-05','capabilities':{'tools':{}},'serverInfo':{'name':'stub','version':'1'}}})
+    elif method=='tools/list':
+        send({'jsonrpc':'2.0','id':request_id,'result':{'tools':TOOLS}})
+    elif method=='tools/call':
+        arguments=message['params'].get('arguments') or {}
+        if delay:=arguments.get('delay',0):
+            threading.Timer(delay,call_tool,(request_id,arguments)).start()
+        else:
+            call_tool(request_id,arguments)
+    elif method=='ping':
+        send({'jsonrpc':'2.0','id':request_id,'result':{}})
+    else:
+        send({'jsonrpc':'2.0','id':request_id,'error':{'code':-32601,'message':f'Unknown method {method}'}})
\ No newline at end of file
@@ -0,0 +1,90 @@
+from src.agent.utils import extract_llm_response,extract_structured_response,is_well_formed,repair_literal,repair_llm_response
+from tests.conftest import ScriptedLLM,make_agent,READ,DONE
+from src.agent.views import AgentOutput,Action
+import asyncio
+import pytest
+
+def test_single_action_block():
+    response=extract_llm_response(READ)
+    assert response['thought']=='read it'
+    assert response['actions']==[{'action_name':'read_file','action_input':{'path':'/a'}}]
+    assert (response['action_name'],response['action_input'])==('read_file',{'path':'/a'})
+
+def test_several_action_blocks():
+    text="<Thought>both</Thought><Action><Action-Name>a</Action-Name><Action-Input>{}</Action-Input></Action><Action><Action-Name>b</Action-Name><Action-Input>{\"x\": true}</Action-Input></Action>"
+    response=extract_llm_response(text)
+    assert [action['action_name'] for action in response['actions']]==['a','b']
+    assert response['actions'][1]['action_input']=={'x':True}
+
+@pytest.mark.parametrize('content',[
+    AgentOutput(thought='t',actions=[Action(action_name='a',action_input={'x':1})]),
+    {'thought':'t','actions':[{'action_name':'a','action_input':{'x':1}}]},
+    'Here you go: {"thought": "t", "actions": [{"action_name": "a", "action_input": {"x": 1}}]} done',
+])
+def test_structured_response_in_every_form(content):
+    response=extract_structured_response(content)
+    assert response['thought']=='t' and response['actions']==[{'action_name':'a','action_input':{'x':1}}]
+
+def test_structured_mode_accepts_the_block_format():
+    assert extract_structured_response(READ)['action_name']=='read_file'
+
+def test_structured_response_without_json_raises():
+    with pytest.raises(ValueError):
+        extract_structured_response('no json here')
+
+@pytest.mark.parametrize('text,expected',[
+    (READ,True),
+    ("<thought>x</thought><Action-Name>a</Action-Name><Action-Input>{}</Action-Input>",False),
+    ("<Thought>x<Action-Name>a</Action-Name><Action-Input>{}</Action-Input>",False),
+    ("<Thought>x</Thought><Action-Name>a</Action-Input>",False),
+])
+def test_is_well_formed(text,expected):
+    assert is_well_formed(text) is expected
+
+@pytest.mark.parametrize('text,expected',[
+    ('```json\n{"path": "/a"}\n```',{'path':'/a'}),
+    ('{"path": "/a", "recursive": true,}',{'path':'/a','recursive':True}),
+    ('{"path": null, "force": false}',{'path':None,'force':False}),
+    ('{"options": {"depth": 2',{'options':{'depth':2}}),
+])
+def test_repair_literal(text,expected):
+    assert repair_literal(text)==expected
+
+@pytest.mark.parametrize('text',[
+    # Tag spellings
+    "<thought>read it</thought><action_name>read_file</action_name><ActionInput>{'path':'/a'}</ActionInput>",
+    # Unclosed leaves, closed when the next tag opens or at the end
+    "<Thought>read it<Action-Name>read_file</Action-Name><Action-Input>{'path':'/a'}",
+    # Trailing comma and a missing brace in the input
+    "<Thought>read it</Thought><Action-Name>read_file</Action-Name><Action-Input>{\"path\": \"/a\",</Action-Input>",
+    # A JSON answer in a code fence
+    '```json\n{"thought": "read it", "actions": [{"action_name": "read_file", "action_input": {"path": "/a"}}]}\n```',
+])
+def test_repair_llm_response(text):
+    response=repair_llm_response(text)
+    assert response['thought']=='read it'
+    assert response['actions']==[{'action_name':'read_file','action_input':{'path':'/a'}}]
+
+def test_near_miss_is_repaired_without_another_llm_call():
+    llm=ScriptedLLM(["<thought>read it<action_name>read_file</action_name><action_input>{'path':'/a'}",DONE])
+    agent=make_agent(llm)
+    assert asyncio.run(agent.ainvoke('read /a')).is_success
+    assert len(llm.calls)==2
+    assert (agent.parse_stats.repairs,agent.parse_stats.retries)==(1,0)
+
+def test_unrecoverable_response_costs_a_retry():
+    llm=ScriptedLLM(['<Thought>read it</Thought><Action-Name>read_file</Action-Name><Action-Input>the file /a</Action-Input>',READ,DONE])
+    agent=make_agent(llm)
+    assert asyncio.run(agent.ainvoke('read /a')).is_success
+    assert len(llm.calls)==3 and agent.parse_stats.retries==1
+
+def test_structured_mode_run():
+    outputs=[
+        AgentOutput(thought='read it',actions=[Action(action_name='read_file',action_input={'path':'/a'})]),
+        AgentOutput(thought='done',actions=[Action(action_name='Done Tool',action_input={'answer':'ok'})]),
+    ]
+    llm=ScriptedLLM(outputs)
+    agent=make_agent(llm,action_mode='structured')
+    response=asyncio.run(agent.ainvoke('read /a'))
+    assert response.is_success and response.response=='ok'
+    assert agent.parse_stats.mode=='structured' and agent.parse_stats.retries==0
\ No newline at end of file
@@ -0,0 +1,62 @@
+from tests.conftest import ScriptedLLM,make_agent,READ,WRITE,DONE
+from src.messages import SystemMessage,HumanMessage,AIMessage
+from src.agent.prompt.service import Prompt,PromptTemplates
+from importlib.resources import files
+import zipfile
+import asyncio
+import os
+
+RESPONSES=[READ,WRITE,DONE]
+
+def test_cache_friendly_prompt_keeps_a_stable_system_prefix():
+    llm=ScriptedLLM(RESPONSES)
+    agent=make_agent(llm,cache_friendly_prompt=True,max_tools=1)
+    response=asyncio.run(agent.ainvoke("read the file"))
+    assert response.is_success
+    system_prompts={messages[0].content for messages in llm.calls}
+    assert len(system_prompts)==1
+    # The retrieved schemas travel in the trailing context, not the system prompt
+    assert 'Schemas of the tools most relevant' in llm.calls[0][-1].content
+    assert 'Schemas of the tools most relevant' not in llm.calls[0][0].content
+
+def test_context_is_folded_into_the_latest_user_turn():
+    llm=ScriptedLLM(RESPONSES)
+    agent=make_agent(llm,cache_friendly_prompt=True)
+    asyncio.run(agent.ainvoke("read the file"))
+    for messages in llm.calls:
+        assert isinstance(messages[0],SystemMessage)
+        roles=[type(message) for message in messages[1:]]
+        assert all(not (a is HumanMessage and b is HumanMessage) for a,b in zip(roles,roles[1:]))
+        assert messages[-1].content.rstrip().endswith('```') and '<Context>' in messages[-1].content
+    # Earlier turns are sent exactly as before, so the cached prefix still matches
+    assert llm.calls[1][1].content==llm.calls[2][1].content=="<User-Query>read the file</User-Query>"
+    assert isinstance(llm.calls[2][2],AIMessage)
+
+
+def test_packaged_templates_are_loaded_once():
+    names={template.name for template in files('src.agent.prompt').iterdir() if template.name.endswith('.md')}
+    assert {'system.md','cached_system.md','context.md','format.md','structured_format.md'}<=names
+    assert set(Prompt.templates.templates)>=names
+    for name in names:
+        assert Prompt.templates.get(name)==files('src.agent.prompt').joinpath(name).read_text()
+
+def test_templates_load_from_a_zipped_package(tmp_path):
+    archive=tmp_path/'prompts.zip'
+    with zipfile.ZipFile(archive,'w') as zipped:
+        zipped.writestr('prompt/system.md','zipped {name}')
+        zipped.writestr('prompt/notes.txt','not a template')
+    templates=PromptTemplates(zipfile.Path(archive,'prompt/'),hot_reload=True)
+    assert list(templates.templates)==['system.md']
+    assert templates.get('system.md').format(name='prompt')=='zipped prompt'
+
+def test_hot_reload_picks_up_edited_templates(tmp_path):
+    template=tmp_path/'system.md'
+    template.write_text('first')
+    templates=PromptTemplates(tmp_path)
+    template.write_text('second')
+    os.utime(template,(0,template.stat().st_mtime+10))
+    # Without hot reload the template stays as it was first read
+    assert templates.get('system.md')=='first'
+    templates.hot_reload=True
+    assert templates.get('system.md')=='second'
+    assert templates.get('system.md')=='second'
\ No newline at end of file
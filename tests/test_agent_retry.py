@@ -0,0 +1,27 @@
+from tests.conftest import ScriptedLLM,make_agent,make_tool,READ
+import asyncio
+
+def test_failing_llm_stops_after_max_consecutive_failures():
+    llm=ScriptedLLM([RuntimeError('provider down')])
+    agent=make_agent(llm,max_consecutive_failures=3)
+    response=asyncio.run(agent.ainvoke('read /a'))
+    assert not response.is_success
+    assert response.response=='Failed to get a valid response after 3 attempts.'
+    assert len(llm.calls)==3 and agent.parse_stats.retries==2
+
+def test_previous_step_does_not_run_again_when_retries_run_out():
+    calls=[]
+    llm=ScriptedLLM([READ,RuntimeError('provider down')])
+    agent=make_agent(llm,tools=[make_tool('read_file',calls)],max_consecutive_failures=3,max_steps=5)
+    response=asyncio.run(agent.ainvoke('read /a'))
+    assert not response.is_success
+    # One call for the first step, then three failed attempts of the second
+    assert len(llm.calls)==4
+    assert calls==[('read_file',{'path':'/a'})]
+
+def test_running_out_of_steps_is_reported():
+    llm=ScriptedLLM([READ])
+    response=asyncio.run(make_agent(llm,max_steps=2).ainvoke('read /a forever'))
+    assert response is not None and not response.is_success
+    assert response.response=="No answer after 2 steps."
+    assert len(llm.calls)==2
\ No newline at end of file
@@ -0,0 +1,110 @@
+from src.llms.views import ChatLLMResponse
+from src.agent.runner import AgentRunner
+from src.mcp.client import MCPClient
+from src.messages import AIMessage
+from pathlib import Path
+import asyncio
+import sys
+
+SERVER=str(Path(__file__).parent/'fixtures'/'stdio_server.py')
+
+def connect(name:str)->str:
+    return f"<Thought>connect</Thought><Action-Name>Connect Tool</Action-Name><Action-Input>{{'name':'{name}'}}</Action-Input>"
+
+DONE="<Thought>done</Thought><Action-Name>Done Tool</Action-Name><Action-Input>{'answer':'ok'}</Action-Input>"
+
+class RoutingLLM:
+    '''Answers each agent from the script of its query, one response per step'''
+    provider='fake'
+    model_name='fake'
+
+    def __init__(self,scripts:dict[str,list[str]],delay:float=0.05):
+        self.scripts=scripts
+        self.delay=delay
+        self.active=0
+        self.peak=0
+
+    async def ainvoke(self,messages,structured_output=None):
+        self.active+=1
+        self.peak=max(self.peak,self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active-=1
+        text=' '.join(str(message.content) for message in messages)
+        script=next(script for query,script in self.scripts.items() if query in text)
+        step=sum(isinstance(message,AIMessage) for message in messages)
+        return ChatLLMResponse(content=script[min(step,len(script)-1)])
+
+    async def aclose(self):
+        pass
+
+def make_client(**kwargs)->MCPClient:
+    server={'command':sys.executable,'args':[SERVER]}
+    return MCPClient({'mcpServers':{'a':server,'b':server}},keep_alive=True,**kwargs)
+
+def test_agents_waiting_on_each_others_servers_time_out_instead_of_deadlocking():
+    # Each agent holds one of the two pooled sessions and then asks for the other one
+    client=make_client(max_sessions=2,lease_timeout=0.5)
+    llm=RoutingLLM({'first a then b':[connect('a'),connect('b'),DONE],'first b then a':[connect('b'),connect('a'),DONE]})
+    runner=AgentRunner(client,llm,concurrency=2,max_steps=5)
+    async def run():
+        try:
+            return await asyncio.wait_for(runner.arun(['first a then b','first b then a']),timeout=20)
+        finally:
+            await client.pool.close()
+    report=asyncio.run(run())
+    assert len(report.results)==2
+    assert all(result.response.is_success for result in report.results)
+    assert client.pool.live_sessions()==0
+
+def test_fork_shares_the_pool_and_registry_but_not_sessions():
+    client=make_client()
+    fork=client.fork()
+    assert fork.pool is client.pool and fork.registry is client.registry
+    assert fork.sessions is not client.sessions and fork.shared
+    async def run():
+        session=await fork.create_session('a')
+        assert 'a' not in client.sessions
+        # Closing a fork returns its sessions to the pool and leaves the pool open
+        await fork.aclose()
+        assert client.pool.idle_sessions()==1
+        assert await client.create_session('a') is session
+        await client.aclose()
+    asyncio.run(run())
+    assert client.pool.live_sessions()==0
+
+def test_queries_run_concurrently_up_to_the_limit():
+    queries=[f'query {i}' for i in range(8)]
+    llm=RoutingLLM({query:[DONE] for query in queries},delay=0.1)
+    runner=AgentRunner(MCPClient({'mcpServers':{}}),llm,concurrency=3)
+    report=asyncio.run(runner.arun(queries))
+    assert sorted(result.query for result in report.results)==sorted(queries)
+    assert all(result.response.is_success for result in report.results)
+    assert llm.peak==3
+    # Three waves of 0.1s instead of eight
+    assert report.duration<0.6 and report.tasks_per_minute>8/0.6*60
+    assert 0<report.p50_latency<=report.p95_latency
+
+def test_queries_may_arrive_from_an_async_stream():
+    async def queries():
+        for i in range(4):
+            await asyncio.sleep(0.01)
+            yield f'query {i}'
+    llm=RoutingLLM({f'query {i}':[DONE] for i in range(4)})
+    runner=AgentRunner(MCPClient({'mcpServers':{}}),llm,concurrency=2)
+    report=asyncio.run(runner.arun(queries()))
+    assert len(report.results)==4 and all(result.response.is_success for result in report.results)
+
+def test_failed_agent_is_reported_without_stopping_the_run():
+    llm=RoutingLLM({'good':[DONE],'bad':['no action at all']})
+    runner=AgentRunner(MCPClient({'mcpServers':{}}),llm,concurrency=2,max_consecutive_failures=1)
+    report=asyncio.run(runner.arun(['good','bad']))
+    results={result.query:result.response.is_success for result in report.results}
+    assert results=={'good':True,'bad':False}
+
+def test_percentile_is_nearest_rank():
+    latencies=[float(i) for i in range(1,101)]
+    assert AgentRunner.percentile(latencies,50)==50.0
+    assert AgentRunner.percentile(latencies,95)==95.0
+    assert AgentRunner.percentile([],95)==0.0
\ No newline at end of file
@@ -0,0 +1,68 @@
+from src.agent.utils import ActionStreamParser
+from tests.conftest import make_agent,make_tool
+from src.agent import Agent
+import asyncio
+
+class StreamingLLM:
+    provider='fake'
+    model_name='fake'
+
+    def __init__(self,text:str,fail:bool=False):
+        self.text=text
+        self.fail=fail
+
+    async def astream(self,messages):
+        for index in range(0,len(self.text),7):
+            yield self.text[index:index+7]
+            await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("stream dropped")
+
+def make_streaming_agent(llm)->tuple[Agent,list]:
+    calls=[]
+    agent=make_agent(llm,tools=[
+        make_tool('read',calls,description='Read a file',readOnlyHint=True),
+        make_tool('delete',calls,description='Delete a file',destructiveHint=True),
+    ],stream=True)
+    return agent,calls
+
+def response(tool:str)->str:
+    return f"<Output><Thought>t</Thought><Action-Name>{tool}</Action-Name><Action-Input>{{'path':'/a'}}</Action-Input></Output>"
+
+def test_stream_parser_reports_actions_as_tags_close():
+    parser=ActionStreamParser()
+    text=response('read')+"<Action-Name>delete</Action-Name><Action-Input>{'path':'/b'}</Action-Input>"
+    completed=[]
+    for index in range(0,len(text),5):
+        _,actions=parser.feed(text[index:index+5])
+        completed.extend(actions)
+    assert [action['action_name'] for action in completed]==['read','delete']
+    assert completed[1]['action_input']=={'path':'/b'}
+    assert parser.text==text
+
+def test_stream_parser_leaves_invalid_input_to_final_parse():
+    parser=ActionStreamParser()
+    _,actions=parser.feed("<Action-Name>read</Action-Name><Action-Input>{'path':</Action-Input>")
+    assert actions==[]
+
+def test_read_only_action_is_dispatched_early():
+    agent,calls=make_streaming_agent(StreamingLLM(response('read')))
+    async def run():
+        text,dispatched=await agent.astream_llm([])
+        assert dispatched is not None
+        result=await dispatched[1]
+        assert result.is_success
+    asyncio.run(run())
+    assert calls==[('read',{'path':'/a'})]
+
+def test_side_effecting_action_waits_for_the_full_response():
+    agent,calls=make_streaming_agent(StreamingLLM(response('delete'),fail=True))
+    async def run():
+        try:
+            await agent.astream_llm([])
+        except RuntimeError:
+            pass
+        await asyncio.sleep(0.01)
+    asyncio.run(run())
+    # The stream failed, so the destructive tool must not have run
+    assert calls==[]
@@ -0,0 +1,173 @@
+from src.mcp.types.json_rpc import JSONRPCRequest,JSONRPCResponse,JSONRPCError,JSONRPCNotification,Method,type_adapter
+from src.mcp.transport.base import BaseTransport,deadline
+from src.mcp.exception import MCPError
+import src.mcp.transport.base as base
+from src.mcp.types.tools import ToolResult
+from src.mcp.client import MCPClient
+from pathlib import Path
+import asyncio
+import logging
+import pytest
+import time
+import sys
+
+SERVER=str(Path(__file__).parent/'fixtures'/'stdio_server.py')
+
+class LoopbackTransport(BaseTransport):
+    '''Answers every request with the given raw result through the shared dispatcher'''
+    def __init__(self,result:dict|None=None,error:dict|None=None):
+        super().__init__()
+        self.result=result
+        self.error=error
+        self.sent:list=[]
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        self.cancel_pending()
+
+    async def send_request(self,request:JSONRPCRequest,timeout:float|None=None):
+        future=self.add_pending(request.id)
+        message={'jsonrpc':'2.0','id':request.id}
+        message.update({'error':self.error} if self.error else {'result':self.result})
+        await self.dispatch(message)
+        return await self.wait_response(request,future,self.request_timeout(request,timeout))
+
+    async def send_notification(self,notification:JSONRPCNotification):
+        self.sent.append(notification)
+
+    async def send_response(self,response):
+        self.sent.append(response)
+
+class SilentTransport(LoopbackTransport):
+    '''Never answers, and takes `notification_delay` seconds to send a notification'''
+    def __init__(self,notification_delay:float=0.0):
+        super().__init__()
+        self.notification_delay=notification_delay
+
+    async def send_request(self,request:JSONRPCRequest,timeout:float|None=None):
+        future=self.add_pending(request.id)
+        return await self.wait_response(request,future,self.request_timeout(request,timeout))
+
+    async def send_notification(self,notification:JSONRPCNotification):
+        await asyncio.sleep(self.notification_delay)
+        self.sent.append(notification)
+
+RESULT={'content':[{'type':'text','text':'hello'}]}
+
+def test_response_result_stays_raw_until_asked_for():
+    transport=LoopbackTransport(result=RESULT)
+    response=asyncio.run(transport.send_request(JSONRPCRequest(id=1,method=Method.TOOLS_CALL,params={})))
+    assert isinstance(response,JSONRPCResponse)
+    # The decoded dict is handed over as is, with no model validation on the read path
+    assert response.result is RESULT
+    assert response.result_as(ToolResult).content[0].text=='hello'
+
+def test_type_adapters_are_built_once():
+    assert type_adapter(ToolResult) is type_adapter(ToolResult)
+
+def test_error_resolves_the_pending_request():
+    transport=LoopbackTransport(error={'code':-32601,'message':'nope'})
+    response=asyncio.run(transport.send_request(JSONRPCRequest(id=1,method=Method.PING)))
+    assert isinstance(response,JSONRPCError) and response.error.code==-32601
+    assert transport.pending=={}
+
+def test_unknown_response_ids_are_ignored():
+    transport=LoopbackTransport()
+    asyncio.run(transport.dispatch({'jsonrpc':'2.0','id':99,'result':{}}))
+    assert transport.pending=={}
+
+def test_notifications_reach_their_handlers():
+    transport=LoopbackTransport()
+    received=[]
+    transport.on_notification(Method.NOTIFICATION_TOOLS_LIST_CHANGED,received.append)
+    asyncio.run(transport.dispatch({'jsonrpc':'2.0','method':'notifications/tools/list_changed'}))
+    assert len(received)==1 and received[0].method==Method.NOTIFICATION_TOOLS_LIST_CHANGED
+
+def test_server_requests_are_answered_off_the_read_loop():
+    transport=LoopbackTransport()
+    async def sampling(params):
+        return {'role':'assistant','content':{'type':'text','text':'sampled'},'model':'m'}
+    transport.attach_callbacks({'sampling':sampling})
+    async def run():
+        await transport.dispatch({'jsonrpc':'2.0','id':'srv-1','method':'sampling/createMessage','params':{'messages':[],'maxTokens':5}})
+        await asyncio.gather(*transport.request_tasks)
+    asyncio.run(run())
+    response=transport.sent[0]
+    assert isinstance(response,JSONRPCResponse) and response.id=='srv-1'
+    assert response.result['content']['text']=='sampled'
+
+def test_unknown_server_request_is_answered_with_method_not_found():
+    transport=LoopbackTransport()
+    async def run():
+        await transport.dispatch({'jsonrpc':'2.0','id':'srv-2','method':'experimental/unknown','params':{}})
+        await asyncio.gather(*transport.request_tasks)
+    asyncio.run(run())
+    response=transport.sent[0]
+    assert isinstance(response,JSONRPCError) and response.id=='srv-2'
+    assert response.error.code==-32601
+
+def test_unknown_notification_is_dropped_quietly(caplog):
+    transport=LoopbackTransport()
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(transport.dispatch({'jsonrpc':'2.0','method':'notifications/experimental','params':{}}))
+    assert caplog.records==[]
+
+def test_method_timeouts_override_the_default():
+    transport=LoopbackTransport()
+    transport.set_timeout(10)
+    transport.set_timeout(0.5,Method.TOOLS_CALL)
+    call=JSONRPCRequest(id=1,method=Method.TOOLS_CALL)
+    assert transport.request_timeout(call)==0.5
+    assert transport.request_timeout(JSONRPCRequest(id=2,method=Method.PING))==10
+    assert transport.request_timeout(call,timeout=3)==3
+    async def run():
+        # A deadline caps every timeout
+        with deadline(0.1):
+            return transport.request_timeout(JSONRPCRequest(id=3,method=Method.PING))
+    assert asyncio.run(run())<=0.1
+
+def test_timed_out_request_is_cancelled_on_the_server():
+    transport=SilentTransport()
+    transport.set_timeout(0.05,Method.TOOLS_CALL)
+    async def run():
+        with pytest.raises(MCPError,match='timed out'):
+            await transport.send_request(JSONRPCRequest(id=7,method=Method.TOOLS_CALL,params={}))
+        await asyncio.gather(*transport.background_tasks)
+    asyncio.run(run())
+    notification=transport.sent[0]
+    assert notification.method==Method.NOTIFICATION_CANCELLED and notification.params['requestId']==7
+    assert transport.pending=={}
+
+def test_slow_cancel_notification_does_not_delay_the_timeout(monkeypatch):
+    monkeypatch.setattr(base,'CANCEL_TIMEOUT',0.2)
+    transport=SilentTransport(notification_delay=60)
+    async def run():
+        start=time.perf_counter()
+        with pytest.raises(MCPError,match='timed out'):
+            await transport.send_request(JSONRPCRequest(id=8,method=Method.PING),timeout=0.05)
+        elapsed=time.perf_counter()-start
+        # The send gives up after CANCEL_TIMEOUT instead of lingering
+        await asyncio.wait_for(asyncio.gather(*transport.background_tasks),timeout=1)
+        return elapsed
+    assert asyncio.run(run())<0.5
+    assert transport.sent==[]
+
+def test_5mb_frame_over_stdio():
+    client=MCPClient({'mcpServers':{'stub':{'command':sys.executable,'args':[SERVER]}}})
+    async def run():
+        session=await client.create_session('stub')
+        try:
+            start=time.perf_counter()
+            result=await session.tools_call('echo',text='big',size=5_000_000)
+            elapsed=time.perf_counter()-start
+            # A small call right after shows the reader kept its framing past the large message
+            small=await session.tools_call('echo',text='small')
+        finally:
+            await client.close_all_sessions()
+        return result,small,elapsed
+    result,small,elapsed=asyncio.run(run())
+    assert len(result.content[0].text)==5_000_000 and result.content[0].text.startswith('big')
+    assert small.content[0].text=='small'
+    assert elapsed<5
\ No newline at end of file
@@ -0,0 +1,60 @@
+from src.agent.history import SlidingWindowPolicy,TruncatePolicy,SummarizePolicy,estimate_tokens
+from src.messages import SystemMessage,HumanMessage,AIMessage
+from src.llms.views import ChatLLMResponse
+import asyncio
+
+def conversation(steps:int,size:int)->list:
+    messages=[HumanMessage(content="<User-Query>q</User-Query>")]
+    for step in range(steps):
+        messages.append(AIMessage(content=f"action {step}"))
+        messages.append(HumanMessage(content=f"observation {step} "+"x"*size))
+    return messages
+
+class SummaryLLM:
+    def __init__(self):
+        self.calls=0
+
+    async def ainvoke(self,messages,structured_output=None):
+        self.calls+=1
+        return ChatLLMResponse(content="short summary")
+
+def test_sliding_window_keeps_the_query_and_latest_turns():
+    messages=conversation(steps=6,size=4000)
+    history=asyncio.run(SlidingWindowPolicy(max_tokens=3000).acompact(messages))
+    assert history[0] is messages[0]
+    assert history[-2:]==messages[-2:]
+    assert estimate_tokens(history)<=3000
+
+def test_sliding_window_never_cuts_into_the_last_messages():
+    # An odd-length history, the latest action has no observation yet
+    messages=conversation(steps=3,size=4000)+[AIMessage(content="action 3")]
+    for keep_last in (1,2,3):
+        history=asyncio.run(SlidingWindowPolicy(max_tokens=100,keep_last=keep_last).acompact(messages))
+        assert history[0] is messages[0]
+        assert history[-keep_last:]==messages[-keep_last:] and len(history)-1>=keep_last
+        # Pairs are dropped whole, so the history still alternates after the query
+        assert isinstance(history[1],AIMessage)
+
+def test_truncate_leaves_a_history_under_budget_untouched():
+    messages=conversation(steps=2,size=100)
+    assert asyncio.run(TruncatePolicy(max_tokens=3000).acompact(messages))==messages
+
+def test_system_prompt_counts_against_the_budget():
+    messages=conversation(steps=4,size=2000)
+    system_message=SystemMessage(content="s"*8000)
+    policy=TruncatePolicy(max_tokens=3000,head=100,tail=100)
+    without_system=asyncio.run(policy.acompact(messages))
+    with_system=asyncio.run(policy.acompact(messages,system_message=system_message))
+    assert estimate_tokens(without_system)<=3000
+    # The same history no longer fits once the 2000 tokens of system prompt are reserved
+    assert estimate_tokens(with_system)<estimate_tokens(without_system)
+    assert estimate_tokens([system_message,*with_system])<=3000
+
+def test_summaries_are_computed_once_per_observation():
+    llm=SummaryLLM()
+    policy=SummarizePolicy(llm=llm,max_tokens=500,min_length=100)
+    messages=conversation(steps=3,size=2000)
+    first=asyncio.run(policy.acompact(messages))
+    asyncio.run(policy.acompact(messages))
+    assert "<Summary>short summary</Summary>" in first[2].content
+    assert llm.calls==2
@@ -0,0 +1,50 @@
+from src.messages import ImageMessage
+from PIL import Image
+from io import BytesIO
+import time
+
+def png(width:int,height:int)->bytes:
+    buffer=BytesIO()
+    Image.new('RGB',(width,height),'blue').save(buffer,format='PNG')
+    return buffer.getvalue()
+
+def size(data:bytes)->tuple[int,int]:
+    return Image.open(BytesIO(data)).size
+
+def test_large_image_is_resized_once_to_the_max_size():
+    message=ImageMessage(content='screen',images=[png(3000,1500)],max_size=1000)
+    assert size(message.image_bytes()[0])==(1000,500)
+
+def test_repeated_serialization_does_not_degrade_the_image():
+    message=ImageMessage(content='screen',images=[Image.new('RGB',(1200,800),'blue')],max_size=1568)
+    sizes={size(message.image_bytes()[0]) for _ in range(10)}
+    # Scaling in place shrank the same screenshot by 0.7 on every step
+    assert sizes=={(1200,800)}
+    assert message.images[0].size==(1200,800)
+
+def test_small_png_is_sent_without_re_encoding():
+    data=png(64,64)
+    message=ImageMessage(content='icon',images=[data])
+    assert message.image_bytes()[0] is data
+
+def test_every_format_is_derived_from_the_same_encoding():
+    message=ImageMessage(content='screen',images=[png(64,64)])
+    assert message.image_base64() is message.image_base64()
+    assert message.image_data_urls()[0]==f'data:image/png;base64,{message.image_base64()[0]}'
+
+def test_new_images_are_prepared_again():
+    message=ImageMessage(content='screen',images=[png(64,64)])
+    first=message.image_bytes()
+    message.images=[png(32,32)]
+    assert size(message.image_bytes()[0])==(32,32) and message.image_bytes() is not first
+
+def test_ten_steps_encode_each_image_once():
+    message=ImageMessage(content='screen',images=[Image.effect_noise((1920,1080),64).convert('RGB')])
+    start=time.perf_counter()
+    message.image_data_urls()
+    first=time.perf_counter()-start
+    start=time.perf_counter()
+    for _ in range(9):
+        message.image_data_urls()
+    # The nine later steps reuse the encoding, so together they cost a fraction of the first
+    assert time.perf_counter()-start<first/10
\ No newline at end of file
@@ -0,0 +1,92 @@
+from src.llms.limiter import RateLimiter,backoff_delay,retry_after
+from src.messages import HumanMessage,estimate_tokens
+from src.agent.history import estimate_tokens as history_estimate_tokens
+from src.llms.views import ChatLLMUsage
+import asyncio
+
+MESSAGES=[HumanMessage(content='x'*400)]
+
+class RateLimitError(Exception):
+    def __init__(self,headers:dict):
+        self.status_code=429
+        self.response=type('Response',(),{'headers':headers})()
+
+def test_history_and_limiter_share_one_estimate():
+    assert history_estimate_tokens is estimate_tokens
+    assert estimate_tokens(MESSAGES)==104
+
+def test_limiter_survives_separate_event_loops():
+    limiter=RateLimiter()
+    async def call():
+        async with limiter.acquire(MESSAGES) as slot:
+            await asyncio.sleep(0)
+        slot.record(None)
+    # A module level limiter is reused by every asyncio.run of the agent
+    asyncio.run(call())
+    asyncio.run(call())
+    assert limiter.active==0
+
+def test_concurrency_is_capped():
+    limiter=RateLimiter(initial_concurrency=2,max_concurrency=2)
+    peak=0
+    async def call():
+        nonlocal peak
+        async with limiter.acquire(MESSAGES):
+            peak=max(peak,limiter.active)
+            await asyncio.sleep(0.01)
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+    asyncio.run(run())
+    assert peak==2
+
+def test_record_charges_actual_usage():
+    limiter=RateLimiter(tpm=10_000)
+    async def run():
+        async with limiter.acquire(MESSAGES) as slot:
+            pass
+        slot.record(ChatLLMUsage(prompt_tokens=100,completion_tokens=900,total_tokens=1000))
+    asyncio.run(run())
+    assert 8_990<=limiter.tpm.tokens<=9_010
+
+def test_stream_charges_its_output():
+    limiter=RateLimiter(tpm=10_000)
+    async def stream():
+        async with limiter.acquire(MESSAGES,stream=True) as slot:
+            for _ in range(10):
+                slot.add_output('y'*400)
+                yield 'y'*400
+    async def run():
+        async for _ in stream():
+            pass
+    asyncio.run(run())
+    # 104 estimated prompt tokens plus 4000 characters of output
+    assert 8_890<=limiter.tpm.tokens<=8_910
+    assert 'first_token' in limiter.latency
+
+def test_long_answers_do_not_shrink_concurrency():
+    limiter=RateLimiter(initial_concurrency=8)
+    # Ten times the tokens in ten times the time is the same per token latency
+    for completion_tokens,elapsed in [(10,0.1),(100,1.0),(1000,10.0)]:
+        limiter.on_success(elapsed/completion_tokens,'completion')
+    assert limiter.concurrency>8
+
+def test_slow_tokens_shrink_concurrency():
+    limiter=RateLimiter(initial_concurrency=8)
+    limiter.on_success(0.01,'completion')
+    for _ in range(10):
+        limiter.on_success(0.1,'completion')
+    assert limiter.concurrency<8
+
+def test_rate_limit_halves_concurrency_and_honours_retry_after():
+    limiter=RateLimiter(initial_concurrency=8)
+    error=RateLimitError({'retry-after':'2'})
+    async def run():
+        async with limiter.acquire(MESSAGES):
+            raise error
+    try:
+        asyncio.run(run())
+    except RateLimitError:
+        pass
+    assert limiter.concurrency==4 and limiter.rate_limited==1
+    assert retry_after(error)==2.0 and backoff_delay(0,error)==2.0
+    assert retry_after(RateLimitError({'retry-after-ms':'250'}))==0.25
\ No newline at end of file
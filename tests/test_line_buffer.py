@@ -0,0 +1,29 @@
+from src.mcp.transport.utils import LineBuffer,json_dumps,json_loads
+import time
+
+def test_two_messages_in_one_chunk_are_both_returned():
+    framer=LineBuffer()
+    lines=framer.feed(b'{"id":1}\n{"id":2}\n')
+    assert [json_loads(line) for line in lines]==[{'id':1},{'id':2}]
+
+def test_partial_tail_is_kept_for_the_next_chunk():
+    framer=LineBuffer()
+    assert framer.feed(b'{"id":1}\n{"id"')==[bytearray(b'{"id":1}')]
+    assert framer.feed(b':2')==[]
+    assert framer.feed(b'}\n\n')==[bytearray(b'{"id":2}')]
+    assert framer.buffer==bytearray()
+
+def test_byte_by_byte_feed_yields_each_line_once():
+    framer=LineBuffer()
+    data=b''.join(json_dumps({'id':i})+b'\n' for i in range(50))
+    lines=[line for byte in range(len(data)) for line in framer.feed(data[byte:byte+1])]
+    assert [json_loads(line)['id'] for line in lines]==list(range(50))
+
+def test_large_message_in_small_chunks_is_linear():
+    framer=LineBuffer()
+    data=json_dumps({'result':'x'*5_000_000})+b'\n'
+    start=time.perf_counter()
+    lines=[line for offset in range(0,len(data),1024) for line in framer.feed(data[offset:offset+1024])]
+    # Re-parsing the whole buffer after every 1 KB chunk took minutes for this size
+    assert time.perf_counter()-start<5
+    assert len(lines)==1 and len(json_loads(lines[0])['result'])==5_000_000
\ No newline at end of file
@@ -0,0 +1,67 @@
+from tests.conftest import ScriptedLLM,make_agent,READ,DONE
+from src.messages import SystemMessage,HumanMessage
+from src.llms.cache import CachedChatLLM
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime,timedelta
+import src.agent.prompt.service as prompt_service
+import asyncio
+
+RESPONSES=[READ,DONE]
+
+class Clock:
+    '''Every call is a second later, as the agent's prompts would be across two real runs'''
+    current=datetime(2025,1,31,12,0,0)
+
+    @classmethod
+    def now(cls):
+        cls.current+=timedelta(seconds=1)
+        return cls.current
+
+def test_identical_agent_runs_hit_the_cache(tmp_path,monkeypatch):
+    monkeypatch.setattr(prompt_service,'datetime',Clock)
+    inner=ScriptedLLM(RESPONSES)
+    llm=CachedChatLLM(inner,path=tmp_path/'cache.sqlite')
+    first=asyncio.run(make_agent(llm).ainvoke("read the file"))
+    second=asyncio.run(make_agent(llm).ainvoke("read the file"))
+    assert first.is_success and second.is_success
+    assert second.response==first.response
+    assert len(inner.calls)==2 and llm.hits==2 and llm.misses==2
+
+def test_normalizer_can_be_disabled(tmp_path):
+    llm=CachedChatLLM(ScriptedLLM(RESPONSES),path=tmp_path/'cache.sqlite',normalize=None)
+    first=[SystemMessage(content='Today is 2025-01-31 12:00:00'),HumanMessage(content='hi')]
+    second=[SystemMessage(content='Today is 2025-01-31 12:00:01'),HumanMessage(content='hi')]
+    assert llm.cache_key(first)!=llm.cache_key(second)
+    llm.normalize=lambda content:content.split('Today is')[0]
+    assert llm.cache_key(first)==llm.cache_key(second)
+
+def test_replay_is_streamed_in_chunks(tmp_path):
+    inner=ScriptedLLM(RESPONSES)
+    llm=CachedChatLLM(inner,path=tmp_path/'cache.sqlite')
+    messages=[HumanMessage(content='hi')]
+    async def collect():
+        return [delta async for delta in llm.astream(messages)]
+    first=asyncio.run(collect())
+    replay=asyncio.run(collect())
+    assert len(inner.calls)==1
+    assert ''.join(replay)==''.join(first)==RESPONSES[0]
+    assert len(replay)>1
+
+def test_sync_calls_from_many_threads_share_the_connection(tmp_path):
+    inner=ScriptedLLM(RESPONSES)
+    llm=CachedChatLLM(inner,path=tmp_path/'cache.sqlite')
+    prompts=[[HumanMessage(content=f"prompt {i%20}")] for i in range(400)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        responses=list(executor.map(llm.invoke,prompts))
+    assert all(response.content in RESPONSES for response in responses)
+    assert llm.hits+llm.misses==400 and llm.misses==len(inner.calls)
+
+def test_cache_is_shared_across_event_loops(tmp_path):
+    inner=ScriptedLLM(RESPONSES)
+    llm=CachedChatLLM(inner,path=tmp_path/'cache.sqlite')
+    async def run():
+        # Contended calls, which would bind a loop bound lock to the first loop
+        return await asyncio.gather(*(llm.ainvoke([HumanMessage(content=f"prompt {i%5}")]) for i in range(20)))
+    asyncio.run(run())
+    asyncio.run(run())
+    assert llm.hits+llm.misses==40 and llm.hits>=20
\ No newline at end of file
@@ -0,0 +1,48 @@
+from tests.fixtures.openai_server import OpenAIServer
+from src.llms.openai import ChatOpenAI
+from src.messages import HumanMessage
+import asyncio
+
+MESSAGES=[HumanMessage(content='hi')]
+
+def test_adapter_reuses_one_connection_across_calls():
+    async def run():
+        server=await OpenAIServer().start()
+        llm=ChatOpenAI(model='stub',api_key='test',base_url=server.url,max_retries=0)
+        try:
+            client=llm.async_client
+            for _ in range(100):
+                response=await llm.ainvoke(MESSAGES)
+                assert response.content=='ok'
+            assert llm.async_client is client
+        finally:
+            await llm.aclose()
+            await server.stop()
+        return server
+    server=asyncio.run(run())
+    assert server.requests==100 and server.connections==1
+
+def test_concurrent_calls_stay_within_the_pool_limits():
+    async def run():
+        server=await OpenAIServer().start()
+        llm=ChatOpenAI(model='stub',api_key='test',base_url=server.url,max_retries=0)
+        try:
+            for _ in range(5):
+                await asyncio.gather(*(llm.ainvoke(MESSAGES) for _ in range(20)))
+        finally:
+            await llm.aclose()
+            await server.stop()
+        return server
+    server=asyncio.run(run())
+    # Later rounds reuse the keep-alive connections opened by the first
+    assert server.requests==100 and server.connections<=20
+
+def test_aclose_drops_the_cached_client():
+    async def run():
+        server=await OpenAIServer().start()
+        llm=ChatOpenAI(model='stub',api_key='test',base_url=server.url,max_retries=0)
+        await llm.ainvoke(MESSAGES)
+        await llm.aclose()
+        assert llm._async_client is None
+        await server.stop()
+    asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,72 @@
+from src.messages import SystemMessage,HumanMessage,AIMessage,ImageMessage
+from PIL import Image
+import pytest
+
+def adapter(module:str,name:str,**kwargs):
+    '''Build an adapter, skipping when its provider SDK is missing or of another version'''
+    return getattr(pytest.importorskip(f'src.llms.{module}',exc_type=ImportError),name)(model='m',**kwargs)
+
+def image_message()->ImageMessage:
+    return ImageMessage(content="what is this?",images=[Image.new('RGB',(32,32),'red')])
+
+def conversation(message:ImageMessage)->list:
+    return [SystemMessage(content="system"),HumanMessage(content="hello"),AIMessage(content="hi"),message]
+
+def dump(item)->dict:
+    return item.model_dump() if hasattr(item,'model_dump') else item
+
+def data_url_parts(serialized:list)->list[str]:
+    user=dump(serialized[-1])
+    return [dump(part)['image_url']['url'] for part in user['content'] if dump(part).get('type')=='image_url']
+
+@pytest.mark.parametrize('module,name',[
+    ('openai','ChatOpenAI'),
+    ('open_router','ChatOpenRouter'),
+    ('groq','ChatGroq'),
+    ('mistral','ChatMistral'),
+])
+def test_image_message_is_sent_as_data_urls(module,name):
+    llm=adapter(module,name,api_key='k')
+    message=image_message()
+    serialized=llm.serialize_messages(conversation(message))
+    assert len(serialized)==4
+    urls=data_url_parts(serialized)
+    assert urls==message.image_data_urls()
+    assert urls[0].startswith('data:image/png;base64,')
+
+def test_anthropic_sends_bare_base64_images():
+    message=image_message()
+    system,serialized=adapter('anthropic','ChatAnthropic',api_key='k').serialize_messages(conversation(message))
+    assert system[0]['text']=="system"
+    images=[part for part in serialized[-1]['content'] if part['type']=='image']
+    assert [image['source']['data'] for image in images]==message.image_base64()
+    assert images[0]['source']['media_type']=='image/png'
+
+def test_google_sends_image_bytes():
+    message=image_message()
+    system,serialized=adapter('google','ChatGoogle',api_key='k').serialize_messages(conversation(message))
+    assert system=="system"
+    parts=serialized[-1].parts
+    assert parts[0].text=="what is this?"
+    assert parts[1].inline_data.data==message.image_bytes()[0]
+
+def test_ollama_sends_image_bytes():
+    message=image_message()
+    serialized=adapter('ollama','ChatOllama').serialize_messages(conversation(message))
+    images=serialized[-1].images
+    assert len(images)==1
+    assert images[0].value==message.image_bytes()[0]
+
+def test_cerebras_keeps_the_text_of_image_messages():
+    serialized=adapter('cerebras','ChatCerebras',api_key='k').serialize_messages(conversation(image_message()))
+    assert serialized[-1]['role']=='user'
+    assert serialized[-1]['content'][0]['text']=="what is this?"
+
+def test_images_are_encoded_once_across_calls():
+    message=image_message()
+    llm=adapter('openai','ChatOpenAI',api_key='k')
+    first=data_url_parts(llm.serialize_messages([message]))
+    encoded=message.image_bytes()
+    second=data_url_parts(llm.serialize_messages([message]))
+    assert first==second
+    assert message.image_bytes() is encoded
@@ -0,0 +1,58 @@
+from src.mcp.types.registry import ListServersRequest
+from src.mcp.registry.service import MCPRegistry
+from httpx import AsyncClient,MockTransport,Response
+from collections import Counter
+import asyncio
+import pytest
+
+PAGES={None:'b',"b":'c',"c":None}
+
+def make_registry(tmp_path)->tuple[MCPRegistry,Counter]:
+    requests=Counter()
+    async def handler(request):
+        cursor=request.url.params.get('cursor')
+        requests[cursor]+=1
+        # Slow enough that the next request arrives while the prefetch is still in flight
+        await asyncio.sleep(0.05)
+        servers=[{'server':{'name':f"io.example/{cursor or 'a'}-{index}",'description':'filesystem tools'}} for index in range(2)]
+        return Response(200,json={'metadata':{'count':2,'nextCursor':PAGES[cursor]},'servers':servers})
+    registry=MCPRegistry(snapshot_path=tmp_path/'snapshot.json')
+    registry.client=AsyncClient(base_url=registry.base_url,transport=MockTransport(handler))
+    return registry,requests
+
+def test_sync_snapshot_fetches_every_page_once(tmp_path):
+    registry,requests=make_registry(tmp_path)
+    async def run():
+        count=await registry.sync_snapshot()
+        await registry.aclose()
+        return count
+    assert asyncio.run(run())==6
+    assert requests==Counter({None:1,'b':1,'c':1})
+
+def test_repeated_search_is_served_from_the_cache(tmp_path):
+    registry,requests=make_registry(tmp_path)
+    async def run():
+        request=ListServersRequest(search='filesystem')
+        first,second=await asyncio.gather(registry.list_servers(request),registry.list_servers(request))
+        await registry.list_servers(request)
+        await registry.aclose()
+        return first,second
+    first,second=asyncio.run(run())
+    assert first is second
+    assert sum(requests.values())==1
+
+def test_snapshot_search_pages_by_offset(tmp_path):
+    registry,_=make_registry(tmp_path)
+    asyncio.run(registry.sync_snapshot())
+    registry.offline=True
+    page=asyncio.run(registry.list_servers(ListServersRequest(search='FILESYSTEM',limit=4)))
+    assert page.metadata.count==4 and page.metadata.nextCursor=='4'
+    rest=asyncio.run(registry.list_servers(ListServersRequest(search='filesystem',limit=4,cursor='4')))
+    assert rest.metadata.count==2 and rest.metadata.nextCursor is None
+
+def test_snapshot_search_rejects_a_live_cursor(tmp_path):
+    registry,_=make_registry(tmp_path)
+    asyncio.run(registry.sync_snapshot())
+    registry.offline=True
+    with pytest.raises(ValueError,match="not a snapshot cursor"):
+        registry.search_snapshot(ListServersRequest(cursor='io.example/b-1'))
@@ -0,0 +1,70 @@
+from src.agent.tools import read_result_tool
+from concurrent.futures import ThreadPoolExecutor
+from src.agent.results import ResultStore
+import threading
+import asyncio
+import pytest
+import re
+
+def content(lines:int)->str:
+    return '\n'.join(f"line {i} {'é'*5}" for i in range(lines))
+
+def test_small_results_are_not_spilled(tmp_path):
+    store=ResultStore(directory=tmp_path,threshold=100)
+    assert store.spill('short')=='short'
+    assert list(tmp_path.iterdir())==[]
+
+def test_large_result_is_replaced_by_a_preview_and_handle(tmp_path):
+    store=ResultStore(directory=tmp_path,threshold=100,preview=20)
+    text=content(1000)
+    spilled=store.spill(text)
+    handle=re.search(r"handle '([0-9a-f]{64})'",spilled).group(1)
+    assert spilled.startswith(text[:20]) and len(spilled)<200
+    assert store.size(handle)==len(text.encode('utf-8'))
+    assert store.read(handle,offset=0,length=store.size(handle))==text
+
+def test_pages_and_matches_are_read_back_by_byte_offset(tmp_path):
+    store=ResultStore(directory=tmp_path)
+    text=content(1000)
+    handle=store.put(text)
+    data=text.encode('utf-8')
+    assert store.read(handle,offset=500,length=300)==data[500:800].decode('utf-8',errors='ignore')
+    assert store.read(handle,offset=len(data)+10)==''
+    start=data.index(b'line 742 ')
+    assert store.grep(handle,'line 742 ')==f"[{start}] line 742 {'é'*5}"
+    assert store.grep(handle,'no such line')==''
+
+def test_same_content_is_stored_once(tmp_path):
+    store=ResultStore(directory=tmp_path)
+    assert store.put('x'*10000)==store.put('x'*10000)
+    assert len(list(tmp_path.iterdir()))==1
+
+def test_concurrent_writers_of_the_same_content(tmp_path):
+    store=ResultStore(directory=tmp_path)
+    text=content(200000)
+    barrier=threading.Barrier(16)
+    def put(_):
+        # Every writer finds the file missing and writes it at the same time
+        barrier.wait()
+        return store.put(text)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        handles=set(executor.map(put,range(16)))
+    assert len(handles)==1
+    handle=handles.pop()
+    assert store.read(handle,length=store.size(handle))==text
+    # Every writer used a temporary file of its own, none is left behind
+    assert [path.name for path in tmp_path.iterdir()]==[f"{handle}.txt"]
+
+@pytest.mark.parametrize('handle',['../../etc/passwd','0'*64])
+def test_unknown_or_invalid_handles_are_rejected(tmp_path,handle):
+    store=ResultStore(directory=tmp_path)
+    with pytest.raises(ValueError):
+        store.read(handle)
+
+def test_read_result_tool_pages_and_searches(tmp_path):
+    store=ResultStore(directory=tmp_path)
+    handle=store.put(content(1000))
+    page=asyncio.run(read_result_tool.ainvoke(handle=handle,offset=0,length=10,result_store=store))
+    assert page.startswith(f"Bytes 0-10 of {store.size(handle)}:\nline 0 é")
+    found=asyncio.run(read_result_tool.ainvoke(handle=handle,pattern='line 999 ',result_store=store))
+    assert found.endswith(f"line 999 {'é'*5}")
\ No newline at end of file
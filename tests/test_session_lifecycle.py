@@ -0,0 +1,76 @@
+from src.mcp.client.session import MCPSession
+from src.mcp.client import MCPClient
+from pathlib import Path
+import asyncio
+import time
+import sys
+
+SERVER=str(Path(__file__).parent/'fixtures'/'stdio_server.py')
+STUB={'command':sys.executable,'args':[SERVER]}
+# Starts but never answers initialize
+HANGING={'command':sys.executable,'args':['-c','import time; time.sleep(60)']}
+MISSING={'command':'/nonexistent/mcp-server','args':[]}
+
+def test_failing_servers_do_not_stop_the_others():
+    client=MCPClient({'mcpServers':{'a':STUB,'missing':MISSING,'b':STUB}})
+    async def run():
+        try:
+            return await client.create_all_sessions(),sorted(client.sessions)
+        finally:
+            await client.close_all_sessions()
+    reports,connected=asyncio.run(run())
+    assert [report.name for report in reports]==['a','missing','b']
+    assert all(report.operation=='startup' for report in reports)
+    assert [report.is_success for report in reports]==[True,False,True]
+    assert reports[1].error and connected==['a','b']
+
+def test_startup_timeout_is_reported_and_the_server_stopped(monkeypatch):
+    stopped=[]
+    shutdown=MCPSession.shutdown
+    async def recording_shutdown(self):
+        stopped.append(self.name)
+        await shutdown(self)
+    monkeypatch.setattr(MCPSession,'shutdown',recording_shutdown)
+    client=MCPClient({'mcpServers':{'a':STUB,'hanging':HANGING}})
+    async def run():
+        start=time.perf_counter()
+        reports=await client.create_all_sessions(timeout=1.0)
+        elapsed=time.perf_counter()-start
+        await client.close_all_sessions()
+        return reports,elapsed
+    reports,elapsed=asyncio.run(run())
+    hanging=reports[1]
+    assert reports[0].is_success
+    assert not hanging.is_success and hanging.error=='Timed out after 1.0s'
+    assert 1.0<=hanging.duration<3 and elapsed<5
+    assert stopped==['hanging','a']
+
+def test_sessions_start_and_close_concurrently():
+    servers={f'server{i}':STUB for i in range(4)}
+    client=MCPClient({'mcpServers':servers})
+    async def run():
+        startup=await client.create_all_sessions()
+        start=time.perf_counter()
+        shutdown=await client.close_all_sessions()
+        return startup,shutdown,time.perf_counter()-start
+    startup,shutdown,elapsed=asyncio.run(run())
+    assert all(report.is_success for report in startup+shutdown)
+    assert {report.operation for report in shutdown}=={'shutdown'} and len(shutdown)==4
+    assert client.sessions=={}
+    # Closing at once takes about as long as the slowest server, not the sum
+    assert elapsed<max(report.duration for report in shutdown)+0.5
+
+def test_concurrency_is_bounded():
+    client=MCPClient()
+    running,peak=0,0
+    async def operation():
+        nonlocal running,peak
+        running+=1
+        peak=max(peak,running)
+        await asyncio.sleep(0.05)
+        running-=1
+    async def run():
+        semaphore=asyncio.Semaphore(2)
+        return await asyncio.gather(*(client.run_timed(f's{i}','startup',operation(),semaphore,timeout=1) for i in range(6)))
+    reports=asyncio.run(run())
+    assert peak==2 and all(report.is_success for report in reports)
\ No newline at end of file
@@ -0,0 +1,103 @@
+from src.mcp.client.pool import SessionPool
+import asyncio
+import time
+
+class FakeSession:
+    def __init__(self,name:str,shutdown_delay:float=0.0):
+        self.name=name
+        self.shutdown_delay=shutdown_delay
+        self.alive=True
+        self.closed=False
+
+    async def ping(self)->bool:
+        if not self.alive:
+            raise ConnectionError("transport closed")
+        return True
+
+    async def shutdown(self)->None:
+        await asyncio.sleep(self.shutdown_delay)
+        self.closed=True
+
+def make_pool(shutdown_delay:float=0.0,**kwargs)->tuple[SessionPool,list[FakeSession]]:
+    started=[]
+    async def factory(name:str)->FakeSession:
+        session=FakeSession(name,shutdown_delay)
+        started.append(session)
+        return session
+    return SessionPool(factory=factory,**kwargs),started
+
+def test_released_session_is_reused():
+    pool,started=make_pool()
+    async def run():
+        first=await pool.lease('fs')
+        await pool.release(first)
+        second=await pool.lease('fs')
+        assert second is first
+        await pool.close()
+    asyncio.run(run())
+    assert len(started)==1 and pool.hits==1 and pool.misses==1
+
+def test_concurrent_leases_get_separate_sessions_up_to_the_cap():
+    pool,started=make_pool(max_sessions=2)
+    async def run():
+        first,second=await asyncio.gather(pool.lease('fs'),pool.lease('fs'))
+        assert first is not second
+        waiter=asyncio.create_task(pool.lease('fs'))
+        await asyncio.sleep(0.01)
+        # The cap is reached, the third lease waits for a release
+        assert not waiter.done()
+        await pool.release(first)
+        assert await waiter is first
+        await pool.close()
+    asyncio.run(run())
+    assert len(started)==2
+
+def test_unhealthy_idle_session_is_replaced():
+    pool,started=make_pool()
+    async def run():
+        first=await pool.lease('fs')
+        await pool.release(first)
+        first.alive=False
+        second=await pool.lease('fs')
+        assert second is not first and first.closed
+        await pool.close()
+    asyncio.run(run())
+
+def test_eviction_does_not_block_other_leases():
+    pool,started=make_pool(shutdown_delay=0.5,max_sessions=2)
+    async def run():
+        fs=await pool.lease('fs')
+        web=await pool.lease('web')
+        await pool.release(fs)
+        # Leasing another server evicts the idle fs session, whose shutdown takes 0.5s
+        evicting=asyncio.create_task(pool.lease('db'))
+        await asyncio.sleep(0.01)
+        start=time.monotonic()
+        await pool.release(web)
+        assert time.monotonic()-start<0.1
+        db=await evicting
+        assert db.name=='db' and fs.closed
+        await pool.close()
+    asyncio.run(run())
+
+def test_lease_cancelled_while_pinging_keeps_the_idle_session():
+    pool,started=make_pool(max_sessions=1)
+    async def run():
+        first=await pool.lease('fs')
+        await pool.release(first)
+        async def slow_ping():
+            await asyncio.sleep(1)
+            return True
+        first.ping=slow_ping
+        # run_timed bounds a lease the same way
+        try:
+            await asyncio.wait_for(pool.lease('fs'),timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        assert pool.live_sessions()==1 and pool.idle_sessions()==1 and not first.closed
+        del first.ping
+        # The slot was not lost, so the single-session pool can still lease
+        assert await asyncio.wait_for(pool.lease('fs'),timeout=1) is first
+        await pool.close()
+    asyncio.run(run())
+    assert len(started)==1
\ No newline at end of file
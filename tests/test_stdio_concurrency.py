@@ -0,0 +1,34 @@
+from src.mcp.client import MCPClient
+from pathlib import Path
+import asyncio
+import random
+import sys
+
+SERVER=str(Path(__file__).parent/'fixtures'/'stdio_server.py')
+
+def make_client()->MCPClient:
+    return MCPClient({'mcpServers':{'stub':{'command':sys.executable,'args':[SERVER]}}})
+
+def test_500_concurrent_calls_on_one_session():
+    client=make_client()
+    async def run():
+        session=await client.create_session('stub')
+        try:
+            # Random delays make the server answer out of order
+            results=await asyncio.gather(*(session.tools_call('echo',text=str(i),delay=random.random()*0.2) for i in range(500)))
+            assert [result.content[0].text for result in results]==[str(i) for i in range(500)]
+            assert session.transport.pending=={}
+        finally:
+            await client.close_all_sessions()
+    asyncio.run(run())
+
+def test_request_ids_are_unique_per_session():
+    client=make_client()
+    async def run():
+        session=await client.create_session('stub')
+        try:
+            ids=[session.next_request_id() for _ in range(1000)]
+            assert len(set(ids))==1000
+        finally:
+            await client.close_all_sessions()
+    asyncio.run(run())
\ No newline at end of file
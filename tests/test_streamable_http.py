@@ -0,0 +1,107 @@
+from tests.fixtures.http_server import StreamableHTTPStub,StubTransport
+from src.mcp.client.session import MCPSession
+from src.mcp.types.json_rpc import Method
+from src.mcp.types.info import ClientInfo
+from src.mcp.exception import MCPError
+import asyncio
+import json
+import pytest
+import time
+
+async def open_session(stub:StreamableHTTPStub)->MCPSession:
+    session=MCPSession(transport=StubTransport(stub),client_info=ClientInfo(name='test',version='1'))
+    await session.connect()
+    await session.initialize()
+    return session
+
+@pytest.mark.parametrize('mode',['json','sse','resume'])
+def test_tool_call_is_answered_from_the_post_response(mode):
+    stub=StreamableHTTPStub(mode)
+    async def run():
+        session=await open_session(stub)
+        try:
+            start=time.perf_counter()
+            result=await session.tools_call('echo',text='hi')
+            return result,time.perf_counter()-start
+        finally:
+            await session.transport.disconnect()
+    result,elapsed=asyncio.run(run())
+    assert result.content[0].text=='hi'
+    # Well under the 30s the transport used to wait for the GET stream
+    assert elapsed<2
+
+def test_session_id_and_protocol_version_are_sent_back():
+    stub=StreamableHTTPStub('json')
+    async def run():
+        session=await open_session(stub)
+        await session.tools_call('echo',text='hi')
+        await session.transport.disconnect()
+    asyncio.run(run())
+    posts=[request for request in stub.requests if request.method=='POST']
+    assert 'mcp-session-id' not in posts[0].headers
+    assert all(request.headers['mcp-session-id']=='stub-session' for request in posts[1:])
+    assert posts[-1].headers['mcp-protocol-version']=='2025-03-26'
+    # The session is closed on the server when the transport disconnects
+    assert stub.requests[-1].method=='DELETE'
+
+def test_resume_sends_the_last_event_id():
+    stub=StreamableHTTPStub('resume')
+    async def run():
+        session=await open_session(stub)
+        await session.tools_call('echo',text='hi')
+        await session.transport.disconnect()
+    asyncio.run(run())
+    resumed=[request for request in stub.requests if request.method=='GET' and 'last-event-id' in request.headers]
+    assert len(resumed)==1 and resumed[0].headers['last-event-id'].startswith('call-')
+    assert stub.resumable=={}
+
+def test_messages_ahead_of_the_response_are_dispatched():
+    stub=StreamableHTTPStub('sse')
+    received=[]
+    async def run():
+        session=await open_session(stub)
+        session.transport.on_notification(Method.NOTIFICATION_PROGRESS,received.append)
+        await session.tools_call('echo',text='hi')
+        await session.transport.disconnect()
+    asyncio.run(run())
+    assert len(received)==1
+
+@pytest.mark.parametrize('mode',['json','sse'])
+def test_concurrent_calls_share_one_transport(mode):
+    stub=StreamableHTTPStub(mode)
+    async def run():
+        session=await open_session(stub)
+        try:
+            return await asyncio.gather(*(session.tools_call('echo',text=str(i)) for i in range(200)))
+        finally:
+            await session.transport.disconnect()
+    results=asyncio.run(run())
+    assert [result.content[0].text for result in results]==[str(i) for i in range(200)]
+
+def test_stream_closed_without_a_response_fails_fast():
+    stub=StreamableHTTPStub('silent')
+    async def run():
+        session=await open_session(stub)
+        try:
+            start=time.perf_counter()
+            with pytest.raises(MCPError,match='without answering'):
+                await session.tools_call('echo',text='hi')
+            return time.perf_counter()-start
+        finally:
+            await session.transport.disconnect()
+    assert asyncio.run(run())<2
+
+def test_only_event_streams_wait_for_reads_without_a_bound():
+    stub=StreamableHTTPStub('sse')
+    async def run():
+        session=await open_session(stub)
+        await session.tools_call('echo',text='hi')
+        # Let the GET listener opened after initialization reach the stub
+        await asyncio.sleep(0.1)
+        await session.transport.disconnect()
+    asyncio.run(run())
+    reads={(request.method,json.loads(request.content).get('method') if request.content else None):request.extensions['timeout']['read'] for request in stub.requests}
+    assert reads[('POST','tools/call')] is None
+    assert reads[('GET',None)] is None
+    assert reads[('POST','notifications/initialized')]==10
+    assert reads[('DELETE',None)] is not None
\ No newline at end of file
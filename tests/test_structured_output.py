@@ -0,0 +1,78 @@
+from src.llms.base import StructuredOutputError
+from src.llms.mistral import ChatMistral
+from src.llms.google import ChatGoogle
+from src.llms.ollama import ChatOllama
+from src.messages import HumanMessage
+from src.agent.views import AgentOutput
+from tests.conftest import make_agent
+from types import SimpleNamespace
+import asyncio
+import pytest
+
+# A trailing comma, which the schema check of the adapter rejects but the local repair fixes
+NEAR_MISS='{"thought": "read it", "actions": [{"action_name": "read_file", "action_input": {"path": "/a"}},]}'
+DONE='{"thought": "done", "actions": [{"action_name": "Done Tool", "action_input": {"answer": "ok"}}]}'
+
+class OllamaCompletion(dict):
+    def __init__(self,text:str):
+        super().__init__(prompt_eval_count=1,eval_count=1)
+        self.message=SimpleNamespace(content=text)
+
+def ollama(texts:list[str])->tuple[ChatOllama,list]:
+    calls=[]
+    async def chat(**kwargs):
+        calls.append(kwargs)
+        return OllamaCompletion(texts[len(calls)-1])
+    llm=ChatOllama(model='stub')
+    llm._async_client=SimpleNamespace(chat=chat)
+    return llm,calls
+
+def mistral(texts:list[str])->tuple[ChatMistral,list]:
+    calls=[]
+    async def complete_async(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=texts[len(calls)-1]))],
+            usage=SimpleNamespace(prompt_tokens=1,completion_tokens=1,total_tokens=2)
+        )
+    llm=ChatMistral(model='stub',api_key='test')
+    llm._client=SimpleNamespace(chat=SimpleNamespace(complete_async=complete_async))
+    return llm,calls
+
+def google(texts:list[str])->tuple[ChatGoogle,list]:
+    calls=[]
+    async def generate_content(**kwargs):
+        calls.append(kwargs)
+        # The SDK leaves parsed unset when the text is not valid JSON
+        return SimpleNamespace(
+            text=texts[len(calls)-1],
+            parsed=None,
+            usage_metadata=SimpleNamespace(prompt_token_count=1,candidates_token_count=1,total_token_count=2,cached_content_token_count=None)
+        )
+    llm=ChatGoogle(model='stub',api_key='test')
+    llm._client=SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+    return llm,calls
+
+ADAPTERS=[ollama,mistral,google]
+
+@pytest.mark.parametrize('adapter',ADAPTERS)
+def test_schema_mismatch_keeps_the_raw_text(adapter):
+    llm,_=adapter([NEAR_MISS])
+    with pytest.raises(StructuredOutputError) as error:
+        asyncio.run(llm.ainvoke([HumanMessage(content='hi')],structured_output=AgentOutput))
+    assert error.value.raw==NEAR_MISS
+
+@pytest.mark.parametrize('adapter',ADAPTERS)
+def test_valid_output_is_validated_by_the_adapter(adapter):
+    llm,_=adapter([DONE])
+    response=asyncio.run(llm.ainvoke([HumanMessage(content='hi')],structured_output=AgentOutput))
+    assert isinstance(response.content,AgentOutput) and response.content.actions[0].action_name=='Done Tool'
+
+@pytest.mark.parametrize('adapter',ADAPTERS)
+def test_near_miss_rejected_by_the_adapter_is_repaired(adapter):
+    llm,calls=adapter([NEAR_MISS,DONE])
+    agent=make_agent(llm,action_mode='structured')
+    response=asyncio.run(agent.ainvoke('read /a'))
+    assert response.is_success and response.response=='ok'
+    assert len(calls)==2
+    assert (agent.parse_stats.repairs,agent.parse_stats.retries)==(1,0)
\ No newline at end of file
@@ -0,0 +1,78 @@
+from tests.conftest import ScriptedLLM,make_agent,make_tool,DONE
+from src.agent.registry import Registry,ToolResultCache
+from src.agent.registry.views import ToolResult
+import asyncio
+import time
+
+def test_arguments_are_canonicalized():
+    cache=ToolResultCache()
+    tool=make_tool('list_directory',[],readOnlyHint=True)
+    cache.put(tool,{'path':'/a','depth':1},ToolResult(is_success=True,content='listing'))
+    result=cache.get(tool,{'depth':1,'path':'/a'})
+    assert result.content=='listing' and result.cached
+    assert cache.get(tool,{'path':'/b','depth':1}) is None
+    assert (cache.hits,cache.misses)==(1,1)
+
+def test_entries_expire_after_the_ttl():
+    cache=ToolResultCache(ttl=0.05)
+    tool=make_tool('list_directory',[],readOnlyHint=True)
+    cache.put(tool,{'path':'/a'},ToolResult(is_success=True,content='listing'))
+    time.sleep(0.1)
+    assert cache.get(tool,{'path':'/a'}) is None and cache.entries=={}
+
+def test_least_recently_used_entry_is_evicted():
+    cache=ToolResultCache(max_entries=2)
+    tool=make_tool('list_directory',[],readOnlyHint=True)
+    for path in ['/a','/b']:
+        cache.put(tool,{'path':path},ToolResult(is_success=True,content=path))
+    cache.get(tool,{'path':'/a'})
+    cache.put(tool,{'path':'/c'},ToolResult(is_success=True,content='/c'))
+    assert cache.get(tool,{'path':'/b'}) is None
+    assert cache.get(tool,{'path':'/a'}) is not None and cache.get(tool,{'path':'/c'}) is not None
+
+def test_invalidate_only_drops_one_server():
+    cache=ToolResultCache()
+    fs,git=make_tool('read',[],readOnlyHint=True),make_tool('read',[],server='git',readOnlyHint=True)
+    cache.put(fs,{'path':'/a'},ToolResult(is_success=True,content='fs'))
+    cache.put(git,{'path':'/a'},ToolResult(is_success=True,content='git'))
+    cache.invalidate('fs')
+    assert cache.get(fs,{'path':'/a'}) is None and cache.get(git,{'path':'/a'}).content=='git'
+
+def test_registry_serves_repeated_read_only_calls_from_the_cache():
+    calls=[]
+    registry=Registry(tools=[],tool_cache=ToolResultCache())
+    registry.add_tools([
+        make_tool('read_file',calls,readOnlyHint=True),
+        make_tool('create_directory',calls,idempotentHint=True),
+        make_tool('write_file',calls),
+    ])
+    async def run():
+        first=await registry.aexecute('read_file',path='/a')
+        second=await registry.aexecute('read_file',path='/a')
+        assert not first.cached and second.cached and second.content==first.content
+        await registry.aexecute('create_directory',path='/d')
+        await registry.aexecute('create_directory',path='/d')
+        # Unannotated tools always run and may change what the read-only ones return
+        await registry.aexecute('write_file',path='/a')
+        await registry.aexecute('write_file',path='/a')
+        third=await registry.aexecute('read_file',path='/a')
+        assert not third.cached
+    asyncio.run(run())
+    assert [name for name,_ in calls]==['read_file','create_directory','write_file','write_file','read_file']
+
+def test_builtin_tools_are_never_cached():
+    calls=[]
+    registry=Registry(tools=[],tool_cache=ToolResultCache())
+    registry.add_tools([make_tool('builtin',calls,server=None,readOnlyHint=True)])
+    asyncio.run(registry.aexecute('builtin',path='/a'))
+    asyncio.run(registry.aexecute('builtin',path='/a'))
+    assert len(calls)==2
+
+def test_agent_run_reports_cache_hits():
+    read="<Thought>list it</Thought><Action-Name>list_directory</Action-Name><Action-Input>{'path':'/a'}</Action-Input>"
+    calls=[]
+    agent=make_agent(ScriptedLLM([read,read,DONE]),tools=[make_tool('list_directory',calls,readOnlyHint=True)],cache_tool_results=True)
+    response=asyncio.run(agent.ainvoke('list /a twice'))
+    assert response.is_success
+    assert len(calls)==1
+    assert (agent.registry.tool_cache.hits,agent.registry.tool_cache.misses)==(1,1)
\ No newline at end of file
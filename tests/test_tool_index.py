@@ -0,0 +1,64 @@
+from src.mcp.types.tools import Tool as MCPTool
+from src.agent.registry import Registry
+from src.agent.tools import done_tool
+from types import SimpleNamespace
+import asyncio
+
+SCHEMA={'type':'object','properties':{'path':{'type':'string'}}}
+
+def make_session(name:str)->SimpleNamespace:
+    async def tools_call(tool_name:str,**kwargs):
+        return f"{name}:{tool_name}"
+    return SimpleNamespace(name=name,id=name,tools_call=tools_call)
+
+def mcp_tools(*names:str)->list[MCPTool]:
+    return [MCPTool(name=name,description=f"{name} tool",inputSchema=SCHEMA) for name in names]
+
+def test_server_tools_are_indexed_by_name():
+    registry=Registry(tools=[done_tool])
+    registry.set_server_tools(make_session('fs'),mcp_tools('read_file','write_file'))
+    assert set(registry.registry_tools)=={'Done Tool','read_file','write_file'}
+    assert [tool.name for tool in registry.get_server_tools('fs')]==['read_file','write_file']
+    assert asyncio.run(registry.aexecute('read_file',path='/a')).content=='fs:read_file'
+
+def test_colliding_names_are_namespaced_by_server():
+    registry=Registry(tools=[])
+    registry.set_server_tools(make_session('a'),mcp_tools('read'))
+    registry.set_server_tools(make_session('b'),mcp_tools('read'))
+    assert set(registry.registry_tools)=={'a/read','b/read'}
+    assert asyncio.run(registry.aexecute('b/read')).content=='b:read'
+    # Once the collision is gone the remaining tool takes its plain name back
+    registry.remove_server_tools('a')
+    assert set(registry.registry_tools)=={'read'}
+    assert asyncio.run(registry.aexecute('read')).content=='b:read'
+
+def test_builtin_tools_keep_their_name():
+    registry=Registry(tools=[done_tool])
+    registry.set_server_tools(make_session('fs'),mcp_tools('Done Tool'))
+    assert registry.registry_tools['Done Tool'] is done_tool
+    assert registry.registry_tools['fs/Done Tool'].server=='fs'
+
+def test_unchanged_tool_list_is_not_reindexed():
+    registry=Registry(tools=[])
+    session,tools=make_session('fs'),mcp_tools('read_file')
+    registry.set_server_tools(session,tools)
+    version=registry.version
+    prompt=registry.get_tools_prompt()
+    registry.set_server_tools(session,tools)
+    assert registry.version==version
+    assert registry.get_tools_prompt() is prompt
+    # A new list from the server is indexed again and the prompt rebuilt
+    registry.set_server_tools(session,mcp_tools('read_file','list_directory'))
+    assert registry.version>version and 'list_directory' in registry.get_tools_prompt()
+
+def test_sessions_no_longer_connected_are_dropped():
+    registry=Registry(tools=[])
+    sessions={name:make_session(name) for name in ('a','b')}
+    for session in sessions.values():
+        async def get_tools(name=session.name):
+            return mcp_tools(f"{name}_tool")
+        session.get_tools=get_tools
+    asyncio.run(registry.add_tools_from_sessions(list(sessions.values())))
+    assert set(registry.registry_tools)=={'a_tool','b_tool'}
+    asyncio.run(registry.add_tools_from_sessions([sessions['b']]))
+    assert set(registry.registry_tools)=={'b_tool'} and 'a' not in registry.server_tools
\ No newline at end of file
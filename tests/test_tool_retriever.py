@@ -0,0 +1,67 @@
+from src.agent.registry.retriever import ToolRetriever
+from src.agent.registry import Registry
+from src.agent.tools import lookup_tool
+from src.tool import Tool
+import asyncio
+
+def schema(*names:str)->dict:
+    return {'type':'object','properties':{name:{'type':'string'} for name in names}}
+
+def make_tools()->list[Tool]:
+    async def noop(**kwargs):
+        return ''
+    tools=[
+        Tool(name='read_file',description='Read the complete contents of a file from disk',args_schema=schema('path'),func=noop,server='filesystem'),
+        Tool(name='write_file',description='Create or overwrite a file with new content',args_schema=schema('path','content'),func=noop,server='filesystem'),
+        Tool(name='list_directory',description='List the files and folders inside a directory',args_schema=schema('path'),func=noop,server='filesystem'),
+        Tool(name='createIssue',description='Open a new issue in a GitHub repository',args_schema=schema('owner','repo','title','body'),func=noop,server='github'),
+        Tool(name='search_repositories',description='Search GitHub repositories by keyword',args_schema=schema('query'),func=noop,server='github'),
+        Tool(name='send_message',description='Post a message to a Slack channel',args_schema=schema('channel','text'),func=noop,server='slack'),
+    ]
+    # Filler tools that share no words with the queries below
+    tools+=[Tool(name=f'metric_{i}',description=f'Report gauge number {i} of the cluster',args_schema=schema('cluster'),func=noop,server='monitoring') for i in range(50)]
+    return tools
+
+QUERIES={
+    'show me what is inside the src folder':'list_directory',
+    'read the contents of config.json':'read_file',
+    'open an issue about the failing build':'createIssue',
+    'post the summary to the team slack channel':'send_message',
+    'find repositories about pydantic':'search_repositories',
+}
+
+def test_relevant_tool_is_in_the_top_k():
+    retriever=ToolRetriever()
+    retriever.build({tool.name:tool for tool in make_tools()})
+    for query,expected in QUERIES.items():
+        assert expected in retriever.search(query,k=3),query
+
+def test_identifiers_are_split_into_words():
+    assert ToolRetriever.tokenize('createIssue read_file')==['create','issue','read','file']
+
+def test_unrelated_query_returns_nothing():
+    retriever=ToolRetriever()
+    retriever.build({tool.name:tool for tool in make_tools()})
+    assert retriever.search('the of and',k=5)==[]
+
+def test_selected_prompt_is_much_smaller_than_the_full_prompt():
+    registry=Registry(tools=[lookup_tool])
+    registry.add_tools(make_tools())
+    names=registry.search_tools('read the contents of config.json',k=3)
+    selected=registry.get_tools_prompt(tool_names=names)
+    full=registry.get_tools_prompt()
+    assert 'read_file' in names
+    assert len(selected)*3<len(full)
+    # Unselected tools stay reachable through the Lookup Tool
+    assert 'metric_7' in selected and 'Report gauge number 7' not in selected
+    schema_prompt=asyncio.run(lookup_tool.ainvoke(name='metric_7',registry=registry))
+    assert 'Report gauge number 7' in schema_prompt
+
+def test_index_is_rebuilt_when_tools_change():
+    registry=Registry(tools=[])
+    registry.add_tools(make_tools())
+    assert registry.search_tools('translate into french',k=3)==[]
+    async def noop(**kwargs):
+        return ''
+    registry.add_tools([Tool(name='translate',description='Translate text to another language',args_schema=schema('text','language'),func=noop,server='deepl')])
+    assert registry.search_tools('translate into french',k=3)==['translate']
\ No newline at end of file